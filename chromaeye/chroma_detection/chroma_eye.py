@@ -19,563 +19,624 @@ Chroma eye take the light and dark mode screenshot as an input and find the inco
 
 '''
 
+import argparse
 import shutil
-import json
 import os
+import time
 from tqdm import tqdm
-from collections import defaultdict
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
 
 from chromaeye.chroma_detection.edge_based_detection.edge_based import edge_inconsistency
 from chromaeye.chroma_detection.object_based_detection.object_based_detection import icon_inconsistency
-from chromaeye.chroma_detection.partial_conversion_detection.partial_conversion import partial_conversion_inconsistency
+from chromaeye.chroma_detection.partial_conversion_detection.partial_conversion import partial_conversion_inconsistency, \
+    render_partial_conversion
 from chromaeye.chroma_detection.text_based_detection.invisible_text import invisible_text_inconsistency
 from chromaeye.chroma_detection.text_based_detection.missing_text import missing_text
-
-
-def create_folder(folder_name):
-    if os.path.exists(folder_name):
+from chromaeye.chroma_detection.utils.artifacts import ARTIFACT_POLICIES, save_side_by_side
+from chromaeye.chroma_detection.utils.edge_match import EDGE_MATCHERS
+from chromaeye.chroma_detection.utils.json_io import dumps, load_json, save_json
+from chromaeye.chroma_detection.utils.ocr_words import OCR_WORDS_DIR, load_ocr_words
+from chromaeye.chroma_detection.utils.pair_context import PairContext
+from chromaeye.chroma_detection.utils.result_cache import (CACHE_FILE_NAME, load_cache, pair_key, prune_file_cache,
+                                                         save_cache)
+from chromaeye.chroma_detection.utils.result_stream import JsonlSink, index_stream, read_record, write_json_array
+from chromaeye.chroma_detection.utils.text_similarity import DEFAULT_SIMILARITY_BACKEND, SIMILARITY_BACKENDS
+
+# bump when a detector or one of its thresholds changes, the cached results of older versions are discarded
+DETECTOR_VERSION = '3'
+
+
+def create_folder(folder_name, clean=True):
+    if clean and os.path.exists(folder_name):
         shutil.rmtree(folder_name)
-    os.makedirs(folder_name)
+    os.makedirs(folder_name, exist_ok=True)
     return folder_name
 
 
-def load_json(json_path: str) -> Dict[str, Any]:
-    """Load JSON file."""
-    # code update, november 18
-    # Ticket: I-TI3,
-    if not os.path.exists(json_path):
-        raise FileNotFoundError(f"JSON file not found at path: {json_path}")
-    with open(json_path, 'r') as f:
-        return json.load(f)
-
+# get the scroll_percentage
+def scroll_percentage(basefilename: str) -> int:
+    scroll_value = int(basefilename.split("_")[-2])
+    return scroll_value
 
-# detect the edge and text inconsistency
-def edge_text_inconsistency_detection(image_dir, json_dir, output_dir):
-    # 1 Edge Inconsistency
-    edge_inconsistency_output_folder = create_folder(os.path.join(output_dir, 'edge_inconsistency'))
-    edgeld = create_folder(os.path.join(edge_inconsistency_output_folder, 'edge_overlay'))
-    missing_edges = create_folder(os.path.join(edge_inconsistency_output_folder, 'missing_edges'))
 
-    # 2 Text Inconsistency
-    text_inconsistency_output_folder = create_folder(os.path.join(output_dir, 'text_inconsistency'))
-    missing_text_output_folder = create_folder(os.path.join(text_inconsistency_output_folder, 'missing_text'))
-    invisible_text_output_folder = create_folder(os.path.join(text_inconsistency_output_folder, 'invisible_text'))
-
-    # Initialize summaries for each type
-    edge_inconsistency_detection = []
-    invisible_text_detection = []
-    missing_text_detection = []
-
-    # Sort files in ascending order
-    files = sorted(
-        [f for f in os.listdir(image_dir) if f.endswith('light.png')],
+# light mode screenshots of the directory in ascending order
+def list_light_images(*image_dirs):
+    return sorted(
+        {f for image_dir in image_dirs for f in os.listdir(image_dir) if f.endswith('light.png')},
         key=lambda x: int(x.split('light')[0]) if x.split('light')[0].isdigit() else x
     )
 
-    for filename in tqdm(files):
-        try:
-            # Define base filename
-            base_filename = filename.replace('light.png', '')
-            id = base_filename.split("_")[0]
-
-            # Input files
-            light_image_file = os.path.join(image_dir, filename)
-            dark_image_file = os.path.join(image_dir, filename.replace('light', 'dark'))
-
-            # JSON paths
-            light_json_file = os.path.join(json_dir, f"{base_filename}light.json")
-            dark_json_file = os.path.join(json_dir, f"{base_filename}dark.json")
-
-            '''Output directory'''
-            # 1.Edge Inconsistency
-            edge_overlay = os.path.join(edgeld, f"{base_filename}_overlay.png")
-            problematic_edge = os.path.join(missing_edges, f"{base_filename}_problematic_area.png")
-
-            # 2.Text Inconsistency
-
-            # a. Invisible text
-            invisible_text_image = os.path.join(invisible_text_output_folder, f"{base_filename}invisible.png")
-            invisible_text_json = os.path.join(invisible_text_output_folder, f"{base_filename}invisible.json")
-
-            # b. Missing text
-            missing_text_image = os.path.join(missing_text_output_folder, f"{base_filename}missing.png")
-            missing_text_json = os.path.join(missing_text_output_folder, f"{base_filename}missing.json")
-
-            '''Inconsistency detection'''
-
-            # 1. Edge Inconsistency
-            edge_output = edge_inconsistency(
-                light_image_file,
-                dark_image_file,
-                edge_overlay,
-                problematic_edge
-            )
-
-            # text inconsistency
-            # a. invisible text inconsistencies
-            invisible_text_output = invisible_text_inconsistency(
-                light_image_file,
-                dark_image_file,
-                light_json_file,
-                dark_json_file,
-                invisible_text_image,
-                invisible_text_json
-            )
-
-            # b.  missing text inconsistencies
-            missing_text_output = missing_text(
-                light_image_file,
-                dark_image_file,
-                light_json_file,
-                dark_json_file,
-                missing_text_image,
-                missing_text_json
-            )
-
-            '''Add to respective summaries'''
-
-            # get the scroll_percentage
-
-            def scroll_percentage(basefilename: str) -> int:
-                scroll_value = int(basefilename.split("_")[-2])
-                return scroll_value
-
-            # 1. Edge Inconsistency
-            if edge_output:
-                edge_inconsistency_detection.append({
-                    "id": id,
-                    "file": base_filename,
-                    "scroll_percentage": scroll_percentage(base_filename),
-                    "image_directory": edge_output
-                })
-
-            # 2. Text Inconsistency
-            # a. Invisible text
-            if invisible_text_output:
-                invisible_text_detection.append({
-                    "id": id,
-                    "file": base_filename,
-                    "scroll_percentage": scroll_percentage(base_filename),
-                    "invisible_text_summary": invisible_text_output
-                })
-
-            # b. Missing text
-            if missing_text_output:
-                missing_text_detection.append({
-                    "id": id,
-                    "file": base_filename,
-                    "scroll_percentage": scroll_percentage(base_filename),
-                    "missing_text_summary": missing_text_output
-                })
 
-        except Exception as e:
-            print(f"Error processing file {base_filename}: {e}")
+# output folder of each inconsistency type
+def output_folders(output_dir):
+    folders = {}
 
-    # sort the file name to save the result in ascending order
-    edge_inconsistency_detection.sort(key=lambda x: x['file'])
-    invisible_text_detection.sort(key=lambda x: x['file'])
-    missing_text_detection.sort(key=lambda x: x['file'])
+    # 1 Edge Inconsistency
+    folders['edge_inconsistency'] = os.path.join(output_dir, 'edge_inconsistency')
+    folders['edge_overlay'] = os.path.join(folders['edge_inconsistency'], 'edge_overlay')
+    folders['missing_edges'] = os.path.join(folders['edge_inconsistency'], 'missing_edges')
 
-    # path to save the result of each inconsistency type
-    edge_summary_path = os.path.join(edge_inconsistency_output_folder, 'edge_inconsistency.json')
-    invisible_text_summary_path = os.path.join(invisible_text_output_folder, 'invisible_text.json')
-    missing_text_summary_path = os.path.join(missing_text_output_folder, 'missing_text.json')
+    # 2 Text Inconsistency
+    folders['text_inconsistency'] = os.path.join(output_dir, 'text_inconsistency')
+    folders['missing_text'] = os.path.join(folders['text_inconsistency'], 'missing_text')
+    folders['invisible_text'] = os.path.join(folders['text_inconsistency'], 'invisible_text')
 
-    with open(edge_summary_path, 'w') as edges_file:
-        json.dump(edge_inconsistency_detection, edges_file, indent=4)
+    # 3. Partial Conversion
+    folders['partial_conversion'] = os.path.join(output_dir, 'partial_conversion_inconsistency')
 
-    with open(missing_text_summary_path, 'w') as missing_file:
-        json.dump(missing_text_detection, missing_file, indent=4)
+    # 4. Icon Inconsistency
+    folders['icon_inconsistency'] = os.path.join(output_dir, 'icon_inconsistency')
 
-    with open(invisible_text_summary_path, 'w') as invisible_file:
-        json.dump(invisible_text_detection, invisible_file, indent=4)
+    return folders
 
-    return edge_inconsistency_detection, invisible_text_detection, missing_text_detection
 
+def create_output_folders(output_dir, clean=True):
+    folders = output_folders(output_dir)
+    # parent folders come first, cleaning them never removes a sub folder created before
+    for folder in folders.values():
+        create_folder(folder, clean)
+    return folders
 
-# detect the partial and icon inconsistency
-def partial_conversion_icon_detection(image_dir, uied_json_dir, output_dir):
-    """Process a batch of images and JSON files for invisible and missing text checks, with separate summaries."""
 
-    # Create output folder
+# summary file of each inconsistency type: (output folder, file name)
+SUMMARY_FILES = {
+    'edge_inconsistency': ('edge_inconsistency', 'edge_inconsistency.json'),
+    'invisible_text': ('invisible_text', 'invisible_text.json'),
+    'missing_text': ('missing_text', 'missing_text.json'),
+    'partial_conversion': ('partial_conversion', 'partial_conversion_inconsistency.json'),
+    'invisible_icon': ('icon_inconsistency', 'icon_inconsistency.json')
+}
 
-    # 3. Partial Conversion
-    partial_conversion_output_folder = create_folder(os.path.join(output_dir, 'partial_conversion_inconsistency'))
 
-    # 4. Icon Inconsistency
-    icon_inconsistency_output_folder = create_folder(os.path.join(output_dir, 'icon_inconsistency'))
+def summary_paths(folders, extension='.json'):
+    return {
+        inconsistency_type: os.path.join(folders[folder], os.path.splitext(file_name)[0] + extension)
+        for inconsistency_type, (folder, file_name) in SUMMARY_FILES.items()
+    }
 
-    # Initialize summaries
-    partial_conversion_detection = []
-    invisible_icon_detection = []
 
-    # Sort files in ascending order
-    files = sorted(
-        [f for f in os.listdir(image_dir) if f.endswith('light.png')],
-        key=lambda x: int(x.split('light')[0]) if x.split('light')[0].isdigit() else x
+# visualization images of one pair, written by the detection or later by render_artifacts
+def artifact_paths(base_filename, folders):
+    return {
+        'edge_overlay': os.path.join(folders['edge_overlay'], f"{base_filename}_overlay.png"),
+        'problematic_edge': os.path.join(folders['missing_edges'], f"{base_filename}_problematic_area.png"),
+        'invisible_text': os.path.join(folders['invisible_text'], f"{base_filename}invisible.png"),
+        'missing_text': os.path.join(folders['missing_text'], f"{base_filename}missing.png"),
+        'partial_conversion': os.path.join(folders['partial_conversion'], f"{base_filename}partial_conversion.png"),
+        'icon_inconsistency': os.path.join(folders['icon_inconsistency'], f"{base_filename}icon_inconsistency.png")
+    }
+
+
+def map_pairs(detect_pair, files, workers=1):
+    """
+    Run detect_pair on every file, in a process pool when workers > 1.
+    (file, result) pairs are yielded in the order of files as soon as they are ready, with one progress update per
+    pair.
+    """
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(files) > 1 else None
+    pair_results = executor.map(detect_pair, files) if executor else map(detect_pair, files)
+    try:
+        with tqdm(pair_results, total=len(files)) as progress:
+            for pair_result, filename in zip(progress, files):
+                progress.set_postfix(file=pair_result['file'], seconds=pair_result['seconds'])
+                yield filename, pair_result
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+
+# detect the edge and text inconsistency of one light/dark pair
+def edge_text_pair_detection(filename, image_dir, json_dir, folders, similarity_backend=DEFAULT_SIMILARITY_BACKEND,
+                             edge_matcher='kdtree', artifacts='all', pretty_json=False, ocr_words_dir=None):
+    edge_entry, invisible_text_entry, missing_text_entry = None, None, None
+    base_filename = filename.replace('light.png', '')
+    # Define base filename
+    id = base_filename.split("_")[0]
+
+    # Input files
+    light_image_file = os.path.join(image_dir, filename)
+    dark_image_file = os.path.join(image_dir, filename.replace('light', 'dark'))
+
+    # JSON paths
+    light_json_file = os.path.join(json_dir, f"{base_filename}light.json")
+    dark_json_file = os.path.join(json_dir, f"{base_filename}dark.json")
+
+    '''Output directory'''
+    images = artifact_paths(base_filename, folders)
+
+    # 1.Edge Inconsistency
+    edge_overlay = images['edge_overlay']
+    problematic_edge = images['problematic_edge']
+
+    # 2.Text Inconsistency
+
+    # a. Invisible text
+    invisible_text_image = images['invisible_text']
+    invisible_text_json = os.path.join(folders['invisible_text'], f"{base_filename}invisible.json")
+
+    # b. Missing text
+    missing_text_image = images['missing_text']
+    missing_text_json = os.path.join(folders['missing_text'], f"{base_filename}missing.json")
+
+    '''Inconsistency detection'''
+
+    # screenshots are decoded once and shared by all the detectors of the pair
+    context = PairContext(light_image_file, dark_image_file)
+
+    # 1. Edge Inconsistency
+    edge_output = edge_inconsistency(
+        light_image_file,
+        dark_image_file,
+        edge_overlay,
+        problematic_edge,
+        context=context,
+        matcher=edge_matcher,
+        artifacts=artifacts
     )
 
-    for filename in tqdm(files):
-        try:
-            # Define base filename
-            base_filename = filename.replace('light.png', '')
-            id = base_filename.split("_")[0]
-
-            # Input files
-            light_image_file = os.path.join(image_dir, filename)
-            dark_image_file = os.path.join(image_dir, filename.replace('light', 'dark'))
-
-            uied_json = os.path.join(uied_json_dir, f"{base_filename}light.json")
-
-            '''Output directory'''
-
-            # 3. Partial conversion
-            partial_conversion_image = os.path.join(partial_conversion_output_folder,
-                                                    f"{base_filename}partial_conversion.png")
-
-            # 4. Icon Inconsistency
-            icon_inconsistency_image = os.path.join(icon_inconsistency_output_folder,
-                                                    f"{base_filename}icon_inconsistency.png")
-
-            '''Inconsistency detection'''
-            # 3. Partial Conversion Inconsistency
-            partial_conversion_output = partial_conversion_inconsistency(
-                light_image_file,
-                dark_image_file,
-                uied_json,
-                partial_conversion_image
-            )
-
-            # 4. Icon inconsistency
-            invisible_icon_output = icon_inconsistency(
-                light_image_file,
-                dark_image_file,
-                uied_json,
-                icon_inconsistency_image
-            )
-
-            '''Add to respective summaries'''
-
-            # get the scroll_percentage
-
-            def scroll_percentage(basefilename: str) -> int:
-                scroll_value = int(basefilename.split("_")[-2])
-                return scroll_value
-
-            if partial_conversion_output:
-                partial_conversion_detection.append({
-                    "id": id,
-                    "file": base_filename,
-                    "scroll_percentage": scroll_percentage(base_filename),
-                    'partial_conversion_summary': partial_conversion_output
-                })
-
-            if invisible_icon_output:
-                invisible_icon_detection.append({
-                    "id": id,
-                    "file": base_filename,
-                    "scroll_percentage": scroll_percentage(base_filename),
-                    "invisible_icon": invisible_icon_output
-                })
+    # text inconsistency, the OCR words are loaded once for both detectors, cached in ocr_words_dir when given
+    light_words = load_ocr_words(light_json_file, ocr_words_dir)
+    dark_words = load_ocr_words(dark_json_file, ocr_words_dir)
 
-        except Exception as e:
-            print(f"Error processing file {base_filename}: {e}")
+    # a. invisible text inconsistencies
+    invisible_text_output = invisible_text_inconsistency(
+        light_image_file,
+        dark_image_file,
+        light_json_file,
+        dark_json_file,
+        invisible_text_image,
+        invisible_text_json,
+        context=context,
+        artifacts=artifacts,
+        light_words=light_words,
+        dark_words=dark_words,
+        pretty_json=pretty_json
+    )
 
-    # Sort summaries in ascending order by file name
+    # b.  missing text inconsistencies
+    missing_text_output = missing_text(
+        light_image_file,
+        dark_image_file,
+        light_json_file,
+        dark_json_file,
+        missing_text_image,
+        missing_text_json,
+        context=context,
+        similarity_backend=similarity_backend,
+        artifacts=artifacts,
+        light_words=light_words,
+        dark_words=dark_words,
+        pretty_json=pretty_json
+    )
 
-    partial_conversion_detection.sort(key=lambda x: x['file'])
-    invisible_icon_detection.sort(key=lambda x: x['file'])
+    '''Add to respective summaries'''
+
+    # 1. Edge Inconsistency
+    if edge_output:
+        edge_entry = {
+            "id": id,
+            "file": base_filename,
+            "scroll_percentage": scroll_percentage(base_filename),
+            "image_directory": edge_output
+        }
+
+    # 2. Text Inconsistency
+    # a. Invisible text
+    if invisible_text_output:
+        invisible_text_entry = {
+            "id": id,
+            "file": base_filename,
+            "scroll_percentage": scroll_percentage(base_filename),
+            "invisible_text_summary": invisible_text_output
+        }
+
+    # b. Missing text
+    if missing_text_output:
+        missing_text_entry = {
+            "id": id,
+            "file": base_filename,
+            "scroll_percentage": scroll_percentage(base_filename),
+            "missing_text_summary": missing_text_output
+        }
+
+    return edge_entry, invisible_text_entry, missing_text_entry
+
+
+# detect the partial and icon inconsistency of one light/dark pair
+def partial_conversion_icon_pair_detection(filename, image_dir, uied_json_dir, folders, artifacts='all'):
+    partial_conversion_entry, invisible_icon_entry = None, None
+    base_filename = filename.replace('light.png', '')
+    # Define base filename
+    id = base_filename.split("_")[0]
+
+    # Input files
+    light_image_file = os.path.join(image_dir, filename)
+    dark_image_file = os.path.join(image_dir, filename.replace('light', 'dark'))
+
+    uied_json = os.path.join(uied_json_dir, f"{base_filename}light.json")
+
+    '''Output directory'''
+    images = artifact_paths(base_filename, folders)
+
+    # 3. Partial conversion
+    partial_conversion_image = images['partial_conversion']
 
-    # path to save the inconsistency result
-    partial_conversion_summary_path = os.path.join(partial_conversion_output_folder,
-                                                   "partial_conversion_inconsistency.json")
-    invisible_icon_summary_path = os.path.join(icon_inconsistency_output_folder, "icon_inconsistency.json")
+    # 4. Icon Inconsistency
+    icon_inconsistency_image = images['icon_inconsistency']
 
-    with open(partial_conversion_summary_path, 'w') as partial_conversion_inconsistency_file:
-        json.dump(partial_conversion_detection, partial_conversion_inconsistency_file, indent=4)
+    '''Inconsistency detection'''
 
-    with open(invisible_icon_summary_path, "w") as invisible_icon_file:
-        json.dump(invisible_icon_detection, invisible_icon_file, indent=4)
+    # uied size screenshots are decoded once and shared by the partial conversion and icon detection
+    context = PairContext(light_image_file, dark_image_file)
 
-    return partial_conversion_detection, invisible_icon_detection
+    # 3. Partial Conversion Inconsistency
+    partial_conversion_output = partial_conversion_inconsistency(
+        light_image_file,
+        dark_image_file,
+        uied_json,
+        partial_conversion_image,
+        context=context,
+        artifacts=artifacts
+    )
 
+    # 4. Icon inconsistency
+    invisible_icon_output = icon_inconsistency(
+        light_image_file,
+        dark_image_file,
+        uied_json,
+        icon_inconsistency_image,
+        context=context,
+        artifacts=artifacts
+    )
 
-# inconsistency detection
-def inconsistency_detection(image_dir, json_dir, uied_image_dir, uied_json_dir, screenshot_mata_dir, output_dir):
-    screenshot_meta_information = load_json(screenshot_mata_dir)
-    print("edge and text inconsistency detection started....")
-    edge_inconsistency_detection, invisible_text_detection, missing_text_detection = edge_text_inconsistency_detection(
-        image_dir, json_dir, output_dir)
-    print("edge and text inconsistency detection completed....")
+    '''Add to respective summaries'''
+
+    if partial_conversion_output:
+        partial_conversion_entry = {
+            "id": id,
+            "file": base_filename,
+            "scroll_percentage": scroll_percentage(base_filename),
+            'partial_conversion_summary': partial_conversion_output
+        }
+
+    if invisible_icon_output:
+        invisible_icon_entry = {
+            "id": id,
+            "file": base_filename,
+            "scroll_percentage": scroll_percentage(base_filename),
+            "invisible_icon": invisible_icon_output
+        }
+
+    return partial_conversion_entry, invisible_icon_entry
+
+
+# input files of a pair, a change in any of them invalidates the cached result of the pair
+def pair_input_files(filename, image_dir, json_dir, uied_image_dir, uied_json_dir):
+    base_filename = filename.replace('light.png', '')
+    return [
+        os.path.join(image_dir, filename),
+        os.path.join(image_dir, filename.replace('light', 'dark')),
+        os.path.join(json_dir, f"{base_filename}light.json"),
+        os.path.join(json_dir, f"{base_filename}dark.json"),
+        os.path.join(uied_image_dir, filename),
+        os.path.join(uied_image_dir, filename.replace('light', 'dark')),
+        os.path.join(uied_json_dir, f"{base_filename}light.json")
+    ]
+
+
+# detect every inconsistency type of one light/dark pair
+def pair_detection(filename, image_dir, json_dir, uied_image_dir, uied_json_dir, folders,
+                   similarity_backend=DEFAULT_SIMILARITY_BACKEND, edge_matcher='kdtree', artifacts='all',
+                   pretty_json=False, ocr_words_dir=None):
+    start_time = time.perf_counter()
+    base_filename = filename.replace('light.png', '')
+    pair_result = {"file": base_filename}
+
+    # 1. Edge and 2. Text inconsistency on the original size screenshots
+    if os.path.exists(os.path.join(image_dir, filename)):
+        try:
+            (pair_result['edge_inconsistency'], pair_result['invisible_text'],
+             pair_result['missing_text']) = edge_text_pair_detection(filename, image_dir, json_dir, folders,
+                                                                      similarity_backend, edge_matcher, artifacts,
+                                                                      pretty_json, ocr_words_dir)
+        except Exception as e:
+            print(f"Error processing file {base_filename}: {e}")
+            pair_result['error'] = str(e)
 
-    print("partial conversion and icon inconsistency detection started")
-    partial_conversion_detection, invisible_icon_detection = partial_conversion_icon_detection(uied_image_dir,
-                                                                                               uied_json_dir,
-                                                                                               output_dir)
+    # 3. Partial conversion and 4. Icon inconsistency on the uied size screenshots
+    if os.path.exists(os.path.join(uied_image_dir, filename)):
+        try:
+            (pair_result['partial_conversion'],
+             pair_result['invisible_icon']) = partial_conversion_icon_pair_detection(filename, uied_image_dir,
+                                                                                     uied_json_dir, folders, artifacts)
+        except Exception as e:
+            print(f"Error processing file {base_filename}: {e}")
+            pair_result['error'] = str(e)
 
-    inconsistency_report_path = os.path.join(output_dir, "inconsistency.json")
+    pair_result['seconds'] = round(time.perf_counter() - start_time, 2)
+    return pair_result
 
-    report = generate_inconsistency_report(screenshot_meta_information, edge_inconsistency_detection,
-                                           invisible_text_detection, missing_text_detection,
-                                           partial_conversion_detection, invisible_icon_detection)
 
-    print('Inconsistency detection complete')
+def save_summary(summary, summary_path, pretty_json=False):
+    """Save the summary of one inconsistency type, in ascending order of the file name."""
+    summary.sort(key=lambda x: x['file'])
+    save_json(summary, summary_path, pretty_json)
+    return summary
 
-    with open(inconsistency_report_path, 'w') as invisible_file:
-        json.dump(report, invisible_file, indent=4)
 
+# inconsistency detection
+def inconsistency_detection(image_dir, json_dir, uied_image_dir, uied_json_dir, screenshot_mata_dir, output_dir,
+                            workers=1, incremental=False, stream=False,
+                            similarity_backend=DEFAULT_SIMILARITY_BACKEND, edge_matcher='kdtree', artifacts='all',
+                            pretty_json=False):
+    screenshot_meta_information = load_json(screenshot_mata_dir)
 
-def generate_inconsistency_report(screenshot_meta_information, edge_inconsistency_detection, invisible_text_detection,
-                                  missing_text_detection, partial_conversion_detection, invisible_icon_detection):
-    # Load JSON data
-    application_name = screenshot_meta_information["applications"]
-    screenshot_data = screenshot_meta_information["screenshots"]
+    # an incremental run keeps the output of the unchanged pairs
+    folders = create_output_folders(output_dir, clean=not incremental)
+
+    # every pair is listed once, the original and uied size screenshots are joined by the file name
+    files = list_light_images(image_dir, uied_image_dir)
+
+    cached_results = {}
+    pair_keys = {}
+    cache_path = os.path.join(output_dir, CACHE_FILE_NAME)
+    # the text similarity backend can change the missing text result and the artifacts policy the written images,
+    # results of another backend, policy or json layout are not reused
+    cache_version = f"{DETECTOR_VERSION}-{similarity_backend}-{artifacts}-{'pretty' if pretty_json else 'compact'}"
+    if incremental:
+        cache = load_cache(cache_path, cache_version)
+        hashed_files = []
+        for filename in files:
+            input_files = pair_input_files(filename, image_dir, json_dir, uied_image_dir, uied_json_dir)
+            hashed_files += input_files
+            pair_keys[filename] = pair_key(input_files, cache['files'], cache_version)
+            cached_pair = cache['pairs'].get(filename)
+            if cached_pair and cached_pair['key'] == pair_keys[filename]:
+                cached_results[filename] = cached_pair['result']
+        print(f"{len(cached_results)} of {len(files)} pairs unchanged, reusing the cached result....")
+        # the cache only keeps the files and pairs of this run
+        cache['files'] = prune_file_cache(cache['files'], hashed_files)
+        cache['pairs'] = {}
+
+    print("inconsistency detection started....")
+    pending_files = [filename for filename in files if filename not in cached_results]
+    detect_pair = partial(pair_detection, image_dir=image_dir, json_dir=json_dir, uied_image_dir=uied_image_dir,
+                          uied_json_dir=uied_json_dir, folders=folders, similarity_backend=similarity_backend,
+                          edge_matcher=edge_matcher, artifacts=artifacts, pretty_json=pretty_json,
+                          ocr_words_dir=os.path.join(output_dir, OCR_WORDS_DIR))
+    pair_results = chain(cached_results.items(), map_pairs(detect_pair, pending_files, workers))
+
+    # Initialize summaries for each type, a streaming run appends each pair to the jsonl files instead
+    summaries = {inconsistency_type: [] for inconsistency_type in SUMMARY_FILES}
+    sink = JsonlSink(summary_paths(folders, '.jsonl')) if stream else None
+    try:
+        for filename, pair_result in pair_results:
+            # pairs that failed are detected again in the next run
+            if incremental and 'error' not in pair_result:
+                cache['pairs'][filename] = {"key": pair_keys[filename], "result": pair_result}
+
+            for inconsistency_type, summary in summaries.items():
+                if not pair_result.get(inconsistency_type):
+                    continue
+                if sink:
+                    sink.write(inconsistency_type, pair_result[inconsistency_type])
+                else:
+                    summary.append(pair_result[inconsistency_type])
+    finally:
+        if sink:
+            sink.close()
+        if incremental:
+            save_cache(cache, cache_path)
+
+    if stream:
+        merge_inconsistency_report(screenshot_meta_information, output_dir, pretty_json)
+        print('Inconsistency detection complete')
+        return
 
-    edge_inc_info = edge_inconsistency_detection
-    invisible_text_info = invisible_text_detection
-    missing_text_info = missing_text_detection
+    # path to save the result of each inconsistency type
+    for inconsistency_type, summary_path in summary_paths(folders).items():
+        save_summary(summaries[inconsistency_type], summary_path, pretty_json)
 
-    partial_conversion_info = partial_conversion_detection
-    invisible_icon_info = invisible_icon_detection
+    inconsistency_report_path = os.path.join(output_dir, "inconsistency.json")
 
-    # Organize data
-    page_info = {item['id']: {"title": item['page_title'], "url": item['url']} for item in screenshot_data.values()}
+    report = generate_inconsistency_report(screenshot_meta_information, summaries['edge_inconsistency'],
+                                           summaries['invisible_text'], summaries['missing_text'],
+                                           summaries['partial_conversion'], summaries['invisible_icon'])
 
-    # Categorize inconsistencies
-    partial_conversion_issues = defaultdict(set)
-    partial_conversion_details = defaultdict(list)
+    print('Inconsistency detection complete')
 
-    edge_page_map = {}
-    invisible_text_page_map = {}
-    missing_page_map = {}
-    partial_conversion_page_map = {}
-    icon_page_map = {}
+    save_json(report, inconsistency_report_path, pretty_json)
 
-    structured_edge_data = {"pages": []}
-    structured_invisible_text = {"pages": []}
-    structured_missing_text = {"pages": []}
-    structured_partial_conversion_data = {"pages": []}
-    structured_icon_data = {"pages": []}
 
-    # 1.  Organizing edge inconsistencies per page
-    for entry in edge_inc_info:
-        page_id = entry.get('id')
-        scroll_percentage = entry.get('scroll_percentage', 0)
+# 1.  edge inconsistency of one pair in the report
+def edge_report_items(entry):
+    # Extract edge overlay path if available
+    image_directory = entry.get("image_directory", [{}])
+    edge_overlay_path = image_directory[0].get("edge_overlay", "No overlay image found")
 
-        if page_id not in page_info:
-            continue  # Skip missing page IDs
+    return [{
+        "scroll_percentage": entry.get('scroll_percentage', 0),
+        "image_directory": edge_overlay_path  # Added image directory path
+    }]
 
-        page_title = page_info[page_id]['title']
-        url = page_info[page_id]['url']
 
-        # If the page is not in structured_edge_data, add a new entry
-        if url not in edge_page_map:
-            page_entry = {
-                "url": url,
-                "page_title": page_title,
-                "edge_inconsistencies": [],
-            }
-            structured_edge_data["pages"].append(page_entry)
-            edge_page_map[url] = page_entry  # Map URL to page entry
+# 2. a. invisible text inconsistencies of one pair in the report
+def invisible_text_report_items(entry):
+    items = []
+    for item in entry.get('invisible_text_summary', []):
+        dark_mode_failed_texts = item.get('Dark mode failed text', [])
 
-        # Reference existing page entry
-        page_entry = edge_page_map[url]
+        if not dark_mode_failed_texts:
+            continue  # Skip if no failed texts
 
-        # Extract edge overlay path if available
-        image_directory = entry.get("image_directory", [{}])
-        edge_overlay_path = image_directory[0].get("edge_overlay", "No overlay image found")
+        failed_texts = [
+            {
+                "text": text_entry["text"],
+                "bounding_box": text_entry["bounding_box"],
+                "contrast_ratio": float(text_entry["contrast_ratio"]),
+                "text_color": text_entry["text_color"],
+                "background_color": text_entry["background_color"]
+            }
+            for text_entry in dark_mode_failed_texts
+        ]
 
-        # Append scroll data entry
-        page_entry["edge_inconsistencies"].append({
-            "scroll_percentage": scroll_percentage,
-            "image_directory": edge_overlay_path  # Added image directory path
+        items.append({
+            "scroll_percentage": entry.get('scroll_percentage', 0),
+            "out_dir": item.get("File", "Unknown File"),
+            "light_mode_failed_text": len(item.get('Light mode failed text', [])),
+            "dark_mode_failed_text": len(dark_mode_failed_texts),
+            "failed_text": failed_texts
         })
+    return items
 
-    # Organizing text inconsistency
-    # a. invisible text inconsistencies
-    for entry in invisible_text_info:
-        page_id = entry.get('id')
-        if page_id not in page_info:
-            continue  # Skip missing page IDs
 
-        url = page_info[page_id].get('url', 'Unknown URL')
-        page_title = page_info[page_id].get('title', 'Unknown Title')
-        scroll_percentage = entry.get('scroll_percentage', 0)
+# 2. b. missing text of one pair in the report
+def missing_text_report_items(entry):
+    # Extract only the missing text information (ignoring bounding box)
+    missing_text_only = [
+        text_entry["tex_info"]  # Extract only text info, ignore bounding box
+        for text_entry in entry.get('missing_text_summary', {}).get('missing_info', [])
+    ]
 
-        # Check if the page exists in structured_data, if not, create a new entry
-        if url not in invisible_text_page_map:
-            page_entry = {
-                "url": url,
-                "page_title": page_title,
-                "failed_text": [],
-            }
-            structured_invisible_text["pages"].append(page_entry)
-            invisible_text_page_map[url] = page_entry  # Map URL to page entry
-
-        # Reference existing page entry
-        page_entry = invisible_text_page_map[url]
-
-        for item in entry.get('invisible_text_summary', []):
-            dark_mode_failed_texts = item.get('Dark mode failed text', [])
-
-            if not dark_mode_failed_texts:
-                continue  # Skip if no failed texts
-
-            failed_texts = [
-                {
-                    "text": text_entry["text"],
-                    "bounding_box": text_entry["bounding_box"],
-                    "contrast_ratio": float(text_entry["contrast_ratio"]),
-                    "text_color": text_entry["text_color"],
-                    "background_color": text_entry["background_color"]
-                }
-                for text_entry in dark_mode_failed_texts
-            ]
-
-            # Append scroll data entry
-            page_entry["failed_text"].append({
-                "scroll_percentage": scroll_percentage,
-                "out_dir": item.get("File", "Unknown File"),
-                "light_mode_failed_text": len(item.get('Light mode failed text', [])),
-                "dark_mode_failed_text": len(dark_mode_failed_texts),
-                "failed_text": failed_texts
-            })
-
-    # b missing text
-
-    for entry in missing_text_info:
-        page_id = entry.get('id')
-        scroll_percentage = entry.get('scroll_percentage', 0)
+    return [{
+        "scroll_percentage": entry.get('scroll_percentage', 0),
+        "missing_text_count": entry.get('missing_text_summary', {}).get('missing_texts', 0),
+        "missing_text_info": missing_text_only  # Store only text info
+    }]
 
-        if page_id not in page_info:
-            continue  # Skip missing page IDs
 
-        page_title = page_info[page_id]['title']
-        url = page_info[page_id]['url']
+# 3. partial conversion of one pair in the report
+def partial_conversion_report_items(entry):
+    # Extract the image directory from partial_conversion_summary
+    image_path = entry.get('partial_conversion_summary', [{}])[0].get('image', "No image found")
 
-        # If the page is not in structured_missing_text, add a new entry
-        if url not in missing_page_map:
-            page_entry = {
-                "url": url,
-                "page_title": page_title,
-                "missing_text": [],
-            }
-            structured_missing_text["pages"].append(page_entry)
-            missing_page_map[url] = page_entry  # Map URL to page entry
+    return [{
+        "scroll_percentage": entry.get("scroll_percentage", 0),
+        "image_directory": image_path  # Added image path
+    }]
 
-        # Reference existing page entry
-        page_entry = missing_page_map[url]
 
-        # Extract only the missing text information (ignoring bounding box)
-        missing_text_only = [
-            text_entry["tex_info"]  # Extract only text info, ignore bounding box
-            for text_entry in entry.get('missing_text_summary', {}).get('missing_info', [])
-        ]
+# 4. invisible icon of one pair in the report
+def invisible_icon_report_items(entry):
+    invisible_icon = entry.get('invisible_icon', [{}])[0]
 
-        # Append scroll data entry
-        page_entry["missing_text"].append({
-            "scroll_percentage": scroll_percentage,
-            "missing_text_count": entry.get('missing_text_summary', {}).get('missing_texts', 0),
-            "missing_text_info": missing_text_only  # Store only text info
-        })
+    # Extract problematic file (filename)
+    file_name = invisible_icon.get('problematic file', "No file found")
 
-    # Organizing partial conversion inconsistencies per page
-    structured_partial_conversion_data = {"pages": []}
-    partial_conversion_page_map = {}
+    # Extract all contrast ratios for `low_contrast_icon_light`
+    light_contrast_ratios = [
+        float(icon.get("contast ratio", 0))  # Convert to float for consistency
+        for icon in invisible_icon.get('low_contrast_icon_light', [])
+    ]
 
-    for entry in partial_conversion_info:
-        page_id = entry.get('id')
-        scroll_percentage = entry.get("scroll_percentage", 0)
+    # Extract all contrast ratios for `low_contrast_icon_dark`
+    dark_contrast_ratios = [
+        float(icon.get("contast ratio", 0))  # Convert to float for consistency
+        for icon in invisible_icon.get('low_contrast_icon_dark', [])
+    ]
 
-        if page_id not in page_info:
-            continue  # Skip missing page IDs
+    return [{
+        "scroll_percentage": entry.get("scroll_percentage", 0),
+        "file_name": file_name,  # Added filename
+        "low_contrast_icon_light": light_contrast_ratios,  # Light contrast ratios
+        "low_contrast_icon_dark": dark_contrast_ratios  # Dark contrast ratios
+    }]
 
-        page_title = page_info[page_id]['title']
-        url = page_info[page_id]['url']
 
-        # If the page is not in structured_partial_conversion_data, add a new entry
-        if url not in partial_conversion_page_map:
-            page_entry = {
-                "url": url,
-                "page_title": page_title,
-                "partial_conversion": [],
-            }
-            structured_partial_conversion_data["pages"].append(page_entry)
-            partial_conversion_page_map[url] = page_entry  # Map URL to page entry
-
-        # Reference existing page entry
-        page_entry = partial_conversion_page_map[url]
+# report section of each inconsistency type: (key of the inconsistency list of a page, report items of one pair)
+REPORT_SECTIONS = {
+    'edge_inconsistency': ("edge_inconsistencies", edge_report_items),
+    'invisible_text': ("failed_text", invisible_text_report_items),
+    'missing_text': ("missing_text", missing_text_report_items),
+    'partial_conversion': ("partial_conversion", partial_conversion_report_items),
+    'invisible_icon': ("invisible_icons", invisible_icon_report_items)
+}
 
-        # Extract the image directory from partial_conversion_summary
-        image_path = entry.get('partial_conversion_summary', [{}])[0].get('image', "No image found")
 
-        # Append structured partial conversion details
-        page_entry["partial_conversion"].append({
-            "scroll_percentage": scroll_percentage,
-            "image_directory": image_path  # Added image path
-        })
+def page_information(screenshot_meta_information):
+    screenshot_data = screenshot_meta_information["screenshots"]
+    return {item['id']: {"title": item['page_title'], "url": item['url']} for item in screenshot_data.values()}
 
-    # 4. invisible icon
-    # # Organizing invisible icon inconsistencies per page
-    for entry in invisible_icon_info:
-        page_id = entry.get('id')
-        scroll_percentage = entry.get("scroll_percentage", 0)
 
+def group_by_page(entry_ids, page_info):
+    """Group (entry, page id) by page url, in order of the first appearance. Entries of unknown pages are skipped."""
+    pages = {}
+    for entry, page_id in entry_ids:
         if page_id not in page_info:
             continue  # Skip missing page IDs
+        pages.setdefault(page_info[page_id]['url'], []).append(entry)
+    return pages
 
-        page_title = page_info[page_id]['title']
-        url = page_info[page_id]['url']
-
-        # If the page is not in structured_icon_data, add a new entry
-        if url not in icon_page_map:
-            page_entry = {
-                "url": url,
-                "page_title": page_title,
-                "invisible_icons": [],
-            }
-            structured_icon_data["pages"].append(page_entry)
-            icon_page_map[url] = page_entry  # Map URL to page entry
 
-        # Reference existing page entry
-        page_entry = icon_page_map[url]
+def report_pages(pages, page_info, page_key, report_items, load_entry=lambda entry: entry):
+    """Yield the report entry of each page, loading the entries of one page at a time."""
+    page_titles = {page['url']: page['title'] for page in page_info.values()}
+    for url, entries in pages.items():
+        page_entry = {
+            "url": url,
+            "page_title": page_titles[url],
+            page_key: [],
+        }
+        for entry in entries:
+            page_entry[page_key].extend(report_items(load_entry(entry)))
+        yield page_entry
 
-        # Extract problematic file (filename)
-        file_name = entry.get('invisible_icon', [{}])[0].get('problematic file', "No file found")
 
-        # Extract all contrast ratios for `low_contrast_icon_light`
-        light_contrast_ratios = [
-            float(icon.get("contast ratio", 0))  # Convert to float for consistency
-            for icon in entry.get('invisible_icon', [{}])[0].get('low_contrast_icon_light', [])
-        ]
-
-        # Extract all contrast ratios for `low_contrast_icon_dark`
-        dark_contrast_ratios = [
-            float(icon.get("contast ratio", 0))  # Convert to float for consistency
-            for icon in entry.get('invisible_icon', [{}])[0].get('low_contrast_icon_dark', [])
-        ]
+def generate_inconsistency_report(screenshot_meta_information, edge_inconsistency_detection, invisible_text_detection,
+                                  missing_text_detection, partial_conversion_detection, invisible_icon_detection):
+    # Load JSON data
+    application_name = screenshot_meta_information["applications"]
 
-        # Append structured invisible icon details
-        page_entry["invisible_icons"].append({
-            "scroll_percentage": scroll_percentage,
-            "file_name": file_name,  # Added filename
-            "low_contrast_icon_light": light_contrast_ratios,  # Light contrast ratios
-            "low_contrast_icon_dark": dark_contrast_ratios  # Dark contrast ratios
-        })
+    # Organize data
+    page_info = page_information(screenshot_meta_information)
+
+    # Categorize inconsistencies per page
+    detections = {
+        'edge_inconsistency': edge_inconsistency_detection,
+        'invisible_text': invisible_text_detection,
+        'missing_text': missing_text_detection,
+        'partial_conversion': partial_conversion_detection,
+        'invisible_icon': invisible_icon_detection
+    }
+    structured_data = {}
+    for inconsistency_type, (page_key, report_items) in REPORT_SECTIONS.items():
+        pages = group_by_page(((entry, entry.get('id')) for entry in detections[inconsistency_type]), page_info)
+        structured_data[inconsistency_type] = {"pages": list(report_pages(pages, page_info, page_key, report_items))}
 
     # Structure the JSON report
     report = {
         "application_name": application_name,
         # "edge_inconsistency": [{"details": edge_inconsistency_detail[page]} for page in edge_issues],
-        "edge_inconsistency": structured_edge_data,
+        "edge_inconsistency": structured_data['edge_inconsistency'],
         "text_inconsistency": {
-            "invisible_text": structured_invisible_text,
-            "missing_text": structured_missing_text
+            "invisible_text": structured_data['invisible_text'],
+            "missing_text": structured_data['missing_text']
         },
 
-        "partial_conversion": structured_partial_conversion_data,
-        "icon_inconsistency": structured_icon_data
+        "partial_conversion": structured_data['partial_conversion'],
+        "icon_inconsistency": structured_data['invisible_icon']
 
         # "partial_conversion":[{'details': partial_conversion_details[page] for page in partial_conversion_issues}],
         # "icon_inconsistency":[{'details': invisible_icon_details[page] for page in invisible_icon_issues}]
@@ -584,7 +645,135 @@ def generate_inconsistency_report(screenshot_meta_information, edge_inconsistenc
     return report
 
 
+def merge_inconsistency_report(screenshot_meta_information, output_dir, pretty_json=False):
+    """
+    Build the summary of each inconsistency type and inconsistency.json from the jsonl files of a streaming run.
+    only one record, or the entries of one page, is in memory at a time. Also works on the output of a run that crashed.
+    the files are the same as the ones of a run without streaming, compact or pretty.
+    """
+    page_info = page_information(screenshot_meta_information)
+    folders = output_folders(output_dir)
+    stream_paths = summary_paths(folders, '.jsonl')
+    report_path = os.path.join(output_dir, "inconsistency.json")
+
+    def layout(text):
+        # the structure of the report is written in the indent=4 layout, compact json has no whitespace in it
+        return text if pretty_json else ''.join(text.split())
+
+    def write_section(report_file, inconsistency_type, summary_path, depth):
+        page_key, report_items = REPORT_SECTIONS[inconsistency_type]
+        stream_path = stream_paths[inconsistency_type]
+        if not os.path.exists(stream_path):
+            open(stream_path, 'w').close()  # no pair of this type was streamed
+        index = index_stream(stream_path, ('id',))
+
+        with open(stream_path, 'rb') as stream_file:
+            load_entry = partial(read_record, stream_file)
+
+            # summary of the inconsistency type, in ascending order of the file name
+            with open(summary_path, 'w', encoding='utf-8') as summary_file:
+                write_json_array(summary_file, (load_entry(offset) for _, offset, _ in index), pretty=pretty_json)
+
+            # {"pages": [...]} of the inconsistency type, nested depth levels deep in the report
+            pages = group_by_page(((offset, page_id) for _, offset, (page_id,) in index), page_info)
+            report_file.write(layout('{\n' + ' ' * 4 * (depth + 1) + '"pages": '))
+            write_json_array(report_file, report_pages(pages, page_info, page_key, report_items, load_entry),
+                             depth + 1, pretty_json)
+            report_file.write(layout('\n' + ' ' * 4 * depth + '}'))
+
+    summary_files = summary_paths(folders)
+    with open(report_path, 'w', encoding='utf-8') as report_file:
+        # same structure as generate_inconsistency_report
+        application_name = dumps(screenshot_meta_information["applications"], pretty_json).replace('\n', '\n    ')
+        report_file.write(layout('{\n    "application_name": ') + application_name)
+        report_file.write(layout(',\n    "edge_inconsistency": '))
+        write_section(report_file, 'edge_inconsistency', summary_files['edge_inconsistency'], 1)
+        report_file.write(layout(',\n    "text_inconsistency": {\n        "invisible_text": '))
+        write_section(report_file, 'invisible_text', summary_files['invisible_text'], 2)
+        report_file.write(layout(',\n        "missing_text": '))
+        write_section(report_file, 'missing_text', summary_files['missing_text'], 2)
+        report_file.write(layout('\n    },\n    "partial_conversion": '))
+        write_section(report_file, 'partial_conversion', summary_files['partial_conversion'], 1)
+        report_file.write(layout(',\n    "icon_inconsistency": '))
+        write_section(report_file, 'invisible_icon', summary_files['invisible_icon'], 1)
+        report_file.write(layout('\n}'))
+
+
+def render_artifacts(image_dir, uied_image_dir, uied_json_dir, output_dir, edge_matcher='dilate'):
+    """
+    Draw the visualizations of an earlier run again from its json summaries, e.g. after a run with --artifacts none.
+    boxes come from the summaries, edge maps and the partial conversion area are computed again from the screenshots.
+    """
+    folders = output_folders(output_dir)
+    summaries = {inconsistency_type: load_json(summary_path) if os.path.exists(summary_path) else []
+                 for inconsistency_type, summary_path in summary_paths(folders).items()}
+
+    def pair_context(screenshot_dir, base_filename):
+        return PairContext(os.path.join(screenshot_dir, f"{base_filename}light.png"),
+                           os.path.join(screenshot_dir, f"{base_filename}dark.png"))
+
+    # 1. Edge inconsistency
+    for entry in summaries['edge_inconsistency']:
+        images = artifact_paths(entry['file'], folders)
+        context = pair_context(image_dir, entry['file'])
+        edge_inconsistency(context.light_image_path, context.dark_image_path, images['edge_overlay'],
+                           images['problematic_edge'], context=context, matcher=edge_matcher)
+
+    # 2. Text inconsistency, the failed text boxes are drawn on the dark screenshot
+    for entry in summaries['invisible_text']:
+        context = pair_context(image_dir, entry['file'])
+        boxes = [text_info['bounding_box'] for summary in entry['invisible_text_summary']
+                 for text_info in summary['Dark mode failed text']]
+        save_side_by_side(context.light, context.dark, boxes, artifact_paths(entry['file'], folders)['invisible_text'])
+
+    for entry in summaries['missing_text']:
+        context = pair_context(image_dir, entry['file'])
+        boxes = [text_info['bounding_box'] for text_info in entry['missing_text_summary']['missing_info']]
+        save_side_by_side(context.light, context.dark, boxes, artifact_paths(entry['file'], folders)['missing_text'])
+
+    # 3. Partial conversion
+    for entry in summaries['partial_conversion']:
+        context = pair_context(uied_image_dir, entry['file'])
+        render_partial_conversion(context.light, context.dark,
+                                  os.path.join(uied_json_dir, f"{entry['file']}light.json"),
+                                  artifact_paths(entry['file'], folders)['partial_conversion'], context)
+
+    # 4. Icon inconsistency
+    for entry in summaries['invisible_icon']:
+        context = pair_context(uied_image_dir, entry['file'])
+        boxes = [icon['bbox'] for icon in entry['invisible_icon']]
+        save_side_by_side(context.light, context.dark, boxes,
+                          artifact_paths(entry['file'], folders)['icon_inconsistency'])
+
+    print(f"Rendered the visualizations of {sum(len(summary) for summary in summaries.values())} results")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Detect the inconsistency between light and dark mode screenshots.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of processes used to detect the screenshot pairs (default: 1)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="keep the previous output and only detect the pairs whose input files changed")
+    parser.add_argument('--stream', action='store_true',
+                        help="append the result of each pair to jsonl files as soon as it is detected, "
+                             "then merge them into the summaries and the report in bounded memory")
+    parser.add_argument('--merge-only', action='store_true',
+                        help="only merge the jsonl files of an earlier streaming run (e.g. after a crash)")
+    parser.add_argument('--text-similarity', choices=sorted(SIMILARITY_BACKENDS), default=DEFAULT_SIMILARITY_BACKEND,
+                        help="backend that scores the OCR words of the missing text detection "
+                             f"(default: {DEFAULT_SIMILARITY_BACKEND})")
+    parser.add_argument('--edge-matcher', choices=sorted(EDGE_MATCHERS), default='kdtree',
+                        help="how the edge based detection matches the edges of the two modes, all give the same "
+                             "result, dilate is the fastest (default: kdtree)")
+    parser.add_argument('--artifacts', choices=ARTIFACT_POLICIES, default='all',
+                        help="visualization images to write: all, failures-only (pairs with an inconsistency) "
+                             "or none (default: all)")
+    parser.add_argument('--pretty-json', action='store_true',
+                        help="write the json results indented for reading, they are compact by default")
+    parser.add_argument('--render', action='store_true',
+                        help="only draw the visualizations of an earlier run again from its json summaries")
+    args = parser.parse_args()
+
     # image with normal size
     image_dir = '/chromaeye/example_dataset/edge_based/flashscore/input/image/org_size'
 
@@ -603,7 +792,17 @@ def main():
     # output directory where you want to save the result
     output_dir = '/chromaeye/example_dataset/edge_based/flashscore/output'
 
-    inconsistency_detection(image_dir, json_dir, uied_image_dir, uied_json_dir, screenshot_meta_data, output_dir)
+    if args.render:
+        render_artifacts(image_dir, uied_image_dir, uied_json_dir, output_dir, args.edge_matcher)
+        return
+
+    if args.merge_only:
+        merge_inconsistency_report(load_json(screenshot_meta_data), output_dir, args.pretty_json)
+        return
+
+    inconsistency_detection(image_dir, json_dir, uied_image_dir, uied_json_dir, screenshot_meta_data, output_dir,
+                            args.workers, args.incremental, args.stream, args.text_similarity,
+                            args.edge_matcher, args.artifacts, args.pretty_json)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,77 @@
+'''
+chromaeye: color histogram benchmark
+time the most common colors of the OCR word boxes of a dataset, in milliseconds per word:
+- pixel loop: cv2.pointPolygonTest of every pixel of the box and Counter.most_common, as the text detectors did before
+  utils/color_histogram.py (slow, only the first --loop-words words are timed)
+- region: region_top_colors, one word after the other
+- batch: box_top_colors, all the words of a screenshot at once
+
+prerequisite
+please pass the dataset folder, every input/ocr json below it with its screenshot in input/image/org_size is used
+'''
+
+import argparse
+from collections import Counter
+
+import cv2
+import numpy as np
+
+from chromaeye.chroma_detection.text_based_detection.invisible_text_benchmark import best_time, ocr_pages
+from chromaeye.chroma_detection.utils.color_histogram import box_top_colors, region_top_colors
+
+
+def pixel_loop_top_colors(image, bbox, num_colors=20):
+    """get_color_pixel_value of the text detectors before the color histogram."""
+    x_min, y_min, x_max, y_max = bbox
+    height, width = image.shape[:2]
+    x_min, y_min = max(0, x_min), max(0, y_min)
+    x_max, y_max = min(width, x_max), min(height, y_max)
+
+    points = np.array([[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]])
+    color_pixel_values = []
+    for y in range(y_min, y_max):
+        for x in range(x_min, x_max):
+            if cv2.pointPolygonTest(points, (x, y), False) >= 0:
+                color_pixel_values.append(tuple(image[y, x]))
+
+    color_counts = Counter(color_pixel_values)
+    return color_counts.most_common(min(len(color_counts), num_colors))
+
+
+def color_histogram_benchmark(dataset_dir, repeat=3, loop_words=100):
+    pages = ocr_pages(dataset_dir)
+    words = [(image, tuple(page_words.box(index))) for image, page_words in pages for index in range(len(page_words))]
+    print(f"{len(pages)} screenshots, {len(words)} words")
+
+    def report(name, seconds, word_count):
+        print(f"  {name:<12} {seconds * 1000 / word_count:8.3f} ms/word  {word_count / seconds:9.0f} words/s")
+
+    loop_sample = words[:loop_words]
+    if loop_sample:
+        seconds = best_time(lambda: [pixel_loop_top_colors(image, bbox) for image, bbox in loop_sample], 1)
+        report('pixel loop', seconds, len(loop_sample))
+        same = all([(tuple(map(int, color)), count) for color, count in region_top_colors(image, bbox)] ==
+                   [(tuple(map(int, color)), count) for color, count in pixel_loop_top_colors(image, bbox)]
+                   for image, bbox in loop_sample)
+        print(f"  region_top_colors {'same as' if same else 'DIFFERENT from'} the pixel loop on these words")
+
+    report('region', best_time(lambda: [region_top_colors(image, bbox) for image, bbox in words], repeat), len(words))
+    report('batch', best_time(lambda: [box_top_colors(image, page_words.clamped(image.shape[1], image.shape[0]))
+                                       for image, page_words in pages], repeat), len(words))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the most common colors of the OCR word boxes.")
+    parser.add_argument('--repeat', type=int, default=3, help="runs of each measurement, the fastest counts")
+    parser.add_argument('--loop-words', type=int, default=100,
+                        help="words timed with the per-pixel loop, it takes tens of milliseconds per word")
+    args = parser.parse_args()
+
+    # dataset with the screenshots and their OCR json files
+    dataset_dir = '/chromaeye/example_dataset'
+
+    color_histogram_benchmark(dataset_dir, args.repeat, args.loop_words)
+
+
+if __name__ == '__main__':
+    main()
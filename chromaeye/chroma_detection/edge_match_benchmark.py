@@ -0,0 +1,85 @@
+'''
+chromaeye: edge match benchmark
+time the edge matchers of utils/edge_match.py (kdtree, dilate, dt) on the screenshot pairs of a dataset, both
+directions of a pair like edge_based.py, and check that they find the same unmatched edges.
+
+prerequisite
+please pass the dataset folder, every input/image/org_size folder below it with *_light.png / *_dark.png pairs is used
+'''
+
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from chromaeye.chroma_detection.utils.edge_match import EDGE_MATCHERS, EDGE_TILE_HEIGHT, unmatched_edges
+
+# distance threshold of edge_based.py
+DISTANCE_THRESHOLD = 3
+
+
+def edge_pairs(dataset_dir):
+    """[(light edges, dark edges), ...] of every screenshot pair, Canny like edge_based.py."""
+    pairs = []
+    for light_path in sorted(glob.glob(os.path.join(dataset_dir, '**', 'input', 'image', 'org_size', '*_light.png'),
+                                       recursive=True)):
+        dark_path = light_path[:-len('_light.png')] + '_dark.png'
+        if not os.path.exists(dark_path):
+            continue
+        light_gray = cv2.imread(light_path, cv2.IMREAD_GRAYSCALE)
+        dark_gray = cv2.imread(dark_path, cv2.IMREAD_GRAYSCALE)
+        if light_gray.shape != dark_gray.shape:
+            continue
+        pairs.append((cv2.Canny(light_gray, 10, 55), cv2.Canny(dark_gray, 10, 55)))
+    return pairs
+
+
+def match_pairs(pairs, matcher, tile_height):
+    return [(unmatched_edges(light_edges, dark_edges, DISTANCE_THRESHOLD, matcher, tile_height),
+             unmatched_edges(dark_edges, light_edges, DISTANCE_THRESHOLD, matcher, tile_height))
+            for light_edges, dark_edges in pairs]
+
+
+def best_time(function, repeat):
+    """Fastest of repeat runs in seconds, the others are slowed down by the rest of the machine."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def edge_match_benchmark(dataset_dir, repeat=3, tile_height=EDGE_TILE_HEIGHT):
+    pairs = edge_pairs(dataset_dir)
+    megapixels = sum(light_edges.size for light_edges, _ in pairs) / 1e6
+    print(f"{len(pairs)} screenshot pairs, {megapixels:.1f} megapixels per mode, tile height {tile_height}")
+
+    expected = match_pairs(pairs, 'kdtree', tile_height)
+    for matcher in sorted(EDGE_MATCHERS):
+        same = all(np.array_equal(mask, expected_mask)
+                   for masks, expected_masks in zip(match_pairs(pairs, matcher, tile_height), expected)
+                   for mask, expected_mask in zip(masks, expected_masks))
+        seconds = best_time(lambda: match_pairs(pairs, matcher, tile_height), repeat)
+        print(f"  {matcher:<8} {seconds * 1000:8.1f} ms  {megapixels / seconds:7.1f} megapixels/s  "
+              f"{'same as kdtree' if same else 'DIFFERENT from kdtree'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the edge matchers on the edge based screenshot pairs.")
+    parser.add_argument('--repeat', type=int, default=3, help="runs of each measurement, the fastest counts")
+    parser.add_argument('--tile-height', type=int, default=EDGE_TILE_HEIGHT,
+                        help=f"rows per band, 0 compares the whole screenshots at once (default: {EDGE_TILE_HEIGHT})")
+    args = parser.parse_args()
+
+    # edge based dataset with the screenshot pairs
+    dataset_dir = '/chromaeye/example_dataset/edge_based'
+
+    edge_match_benchmark(dataset_dir, args.repeat, args.tile_height or None)
+
+
+if __name__ == '__main__':
+    main()
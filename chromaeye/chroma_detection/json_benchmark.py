@@ -0,0 +1,86 @@
+'''
+chromaeye: json benchmark
+time the json backends of utils/json_io.py on the OCR and UIED json files of a dataset:
+- load: parse the file content
+- save: compact json of every backend, and the indent=4 layout the pipeline wrote before (stdlib, pretty)
+- memoized load: load_json(..., memoize=True) of a file right after it was loaded
+
+prerequisite
+please pass the dataset folder, every input/ocr, input/uied and input/uied_dl_json folder below it is used
+'''
+
+import argparse
+import glob
+import os
+import time
+
+from chromaeye.chroma_detection.utils.json_io import JSON_BACKENDS, dumps, json_codec, load_json, loads
+
+
+def json_files(dataset_dir):
+    return sorted(path for folder in ('ocr', 'uied', 'uied_dl_json')
+                  for path in glob.glob(os.path.join(dataset_dir, '**', 'input', folder, '*.json'), recursive=True))
+
+
+def best_time(function, repeat):
+    """Fastest of repeat runs in seconds, the others are slowed down by the rest of the machine."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def json_benchmark(dataset_dir, repeat=5):
+    paths = json_files(dataset_dir)
+    contents = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            contents.append(f.read())
+    megabytes = sum(len(content) for content in contents) / 1e6
+    documents = [loads(content) for content in contents]
+    print(f"{len(paths)} json files, {megabytes:.1f} MB")
+
+    def report(name, seconds):
+        print(f"  {name:<28} {seconds * 1000:8.1f} ms  {megabytes / seconds:7.1f} MB/s")
+
+    for backend in JSON_BACKENDS:
+        try:
+            json_codec(backend)
+        except ImportError:
+            print(f"{backend}: not installed")
+            continue
+        print(backend)
+        report('load', best_time(lambda: [loads(content, backend) for content in contents], repeat))
+        report('save compact', best_time(lambda: [dumps(document, backend=backend) for document in documents],
+                                         repeat))
+
+    print('json, indent=4 (before)')
+    report('save pretty', best_time(lambda: [dumps(document, pretty=True) for document in documents], repeat))
+    pretty_megabytes = sum(len(dumps(document, pretty=True)) for document in documents) / 1e6
+    print(f"  size: {pretty_megabytes:.1f} MB pretty, {megabytes:.1f} MB as read, "
+          f"{sum(len(dumps(document)) for document in documents) / 1e6:.1f} MB compact")
+
+    # a file loaded again, like the UIED json of a pair read by the partial conversion and the icon detection
+    seconds = 0
+    for path in paths:
+        load_json(path, memoize=True)
+        seconds += best_time(lambda: load_json(path, memoize=True), repeat)
+    print('memoized')
+    report('load again', seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the json backends on the OCR and UIED json files.")
+    parser.add_argument('--repeat', type=int, default=5, help="runs of each measurement, the fastest counts")
+    args = parser.parse_args()
+
+    # dataset with the OCR and UIED json files
+    dataset_dir = '/chromaeye/example_dataset'
+
+    json_benchmark(dataset_dir, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,45 +5,30 @@ detect inconsistency for gui component, like button icon that are inconsistent b
 
 
 import math
-import os
-import json
 import cv2
 import numpy as np
-from collections import Counter
+
+from chromaeye.chroma_detection.utils.artifacts import save_side_by_side, should_write
+from chromaeye.chroma_detection.utils.color_histogram import box_top_colors, top_colors
+from chromaeye.chroma_detection.utils.color_math import contrast_ratio
+from chromaeye.chroma_detection.utils.json_io import load_json as read_json
+from chromaeye.chroma_detection.utils.pair_context import PairContext
+from chromaeye.chroma_detection.utils.uied_boxes import compo_boxes, pad_boxes
 
 
 
 def load_json(json_path):
-    with open(json_path, 'r') as f:
-        data = json.load(f)
-    return data
+    # the partial conversion detection reads the same UIED json, it is parsed once (utils/json_io.py)
+    return read_json(json_path, memoize=True)
 
 def get_top_colors(image):
     num_colors = 100
-    pixels = image.reshape(-1, image.shape[-1])
-    colors_rgb = [tuple(pixel) for pixel in pixels]
-    color_counter = Counter(colors_rgb)
-    most_appear = color_counter.most_common(num_colors)
+    most_appear = top_colors(image, num_colors)
     return most_appear
 
-def relative_luminance(color):
-    color = np.array(color) / 255.0
-    R, G, B = color
-    R = R / 12.92 if R <= 0.04045 else ((R + 0.055) / 1.055) ** 2.4
-    G = G / 12.92 if G <= 0.04045 else ((G + 0.055) / 1.055) ** 2.4
-    B = B / 12.92 if B <= 0.04045 else ((B + 0.055) / 1.055) ** 2.4
-    return 0.2126 * R + 0.7152 * G + 0.0722 * B
-
 def get_contrast_ratio(foreground_color, background_color):
     """Calculate contrast ratio between text and background."""
-
-    L1 = relative_luminance(foreground_color)
-    L2 = relative_luminance(background_color)
-
-    if L1 > L2:
-        return (L1 + 0.05) / (L2 + 0.05)
-    else:
-        return (L2 + 0.05) / (L1 + 0.05)
+    return contrast_ratio(foreground_color, background_color)
 
 def euclidean_distance(color1, color2):
     '''Calculate the Euclidean distance between two colors in BGR format.'''
@@ -54,66 +39,65 @@ def convert_color_format(bgr_color):
     return color_rgb
 
 
-def analyze_icon_contrast(image, json_data):
+def icon_boxes(json_data, padding=2, max_size=50):
+    """
+    The icons, the small "Compo" components, in json order.
+    Returns (components, boxes): the index of every icon in json_data["compos"] and its padded
+    (x_min, y_min, x_max, y_max) box.
+    """
+    compos = json_data["compos"]
+    small = np.array([compo["class"] == "Compo" and compo["height"] < max_size and compo["width"] < max_size
+                      for compo in compos], dtype=bool)
+    components = np.flatnonzero(small)
+    return components, pad_boxes(compo_boxes(compos), padding)[components]
+
+
+def icon_contrast(image, boxes):
+    """
+    Contrast of every icon against its background color, all icons of the image at once.
+    Returns (ratios, low_contrast): one ratio per box (nan for a single color box), and True for the icons that
+    stay below the wcag ratio with the second most common color and with the farthest remaining color.
+    """
     wcag_ratio = 2.9
-    results = []
+    num_colors = 100
+
+    # row i: the colors of icon i, most common first, like get_top_colors
+    colors, found = box_top_colors(image, boxes, num_colors)
+
+    # the most common color is the background, the second one the foreground, the colors are converted to rgb
+    background_color = colors[:, 0, ::-1]
+    ratio = contrast_ratio(background_color, colors[:, 1, ::-1])
+    try_other_foreground = found[:, 1] & (ratio < wcag_ratio) & found[:, 2]
 
-    for compo in json_data["compos"]:
-        if compo["class"] == "Compo" and compo["height"] < 50 and compo["width"] < 50:
-            position = compo["position"]
-            padding = 2
-
-            col_min = max(0, position["column_min"] - padding)
-            row_min = max(0, position["row_min"] - padding)
-            col_max = position["column_max"] + padding
-            row_max = position["row_max"] + padding
-
-            # Extract bounding box area from image
-            component_image = image[row_min:row_max, col_min:col_max]
-
-            # Get the most and second most common colors
-            most_appear = get_top_colors(component_image)
-
-            if len(most_appear) < 2:
-                continue
-
-            # assign the colors
-            background_color_bgr = most_appear[0][0]
-            foreground_color_bgr = most_appear[1][0]
-            remaining_colors = most_appear[2:]
-
-            # convert the color to the rgb
-            background_color = convert_color_format(background_color_bgr)
-            foreground_color = convert_color_format(foreground_color_bgr)
-
-            # Calculate contrast ratio
-            ratio = get_contrast_ratio(background_color, foreground_color)
-
-            # Try alternative foreground if needed
-            # if ratio < wcag_ratio and remaining_colors:
-            #     candidates = [c[0] for c in remaining_colors]
-            #     new_fg_bgr = max(candidates,
-            #                      key=lambda c: euclidean_distance(background_bgr, c))
-            #     nratio = get_contrast_ratio(background,
-            #                                convert_color_format(new_fg_bgr))
-            #     if nratio < wcag_ratio:
-            #         results.append({
-            #             "bbox": (col_min, row_min, col_max, row_max),
-            #             "ratio": nratio
-            #         })
-            if ratio < wcag_ratio:
-                foreground_color_candidates = [color[0] for color in remaining_colors]
-                if foreground_color_candidates:
-                    new_foreground_color_bgr = max(foreground_color_candidates,
-                                                   key=lambda color: euclidean_distance(background_color, color))
-                    new_foreground_color = convert_color_format(new_foreground_color_bgr)
-                    new_ratio = get_contrast_ratio(background_color, new_foreground_color)
-                    if new_ratio < wcag_ratio:
-                        # cv2.rectangle(image, (col_min, row_min), (col_max, row_max), (0, 0, 255), 2)
-                        results.append({
-                            "contrast_ratio": new_ratio,
-                            "bbox": (col_min, row_min, col_max, row_max),\
-                        })
+    # Try the remaining color farthest from the background as the foreground. as before, the rgb background is
+    # compared with the bgr candidates, and the first farthest candidate wins
+    remaining_colors = colors[:, 2:].astype(np.int32)
+    distances = ((remaining_colors - background_color[:, None, :].astype(np.int32)) ** 2).sum(axis=-1)
+    distances[~found[:, 2:]] = -1
+    new_foreground_color = colors[np.arange(len(colors)), 2 + np.argmax(distances, axis=1), ::-1]
+    new_ratio = contrast_ratio(background_color, new_foreground_color)
+
+    ratios = np.where(try_other_foreground, new_ratio, ratio)
+    ratios[~found[:, 1]] = np.nan
+    return ratios, try_other_foreground & (new_ratio < wcag_ratio)
+
+
+def analyze_icon_contrast(image, json_data, icons=None):
+    """
+    Return the low contrast icons of the image.
+    icons: icon_boxes(json_data), pass it to share the icons between the light and the dark image
+    """
+    components, boxes = icons if icons is not None else icon_boxes(json_data)
+    ratios, low_contrast = icon_contrast(image, boxes)
+
+    results = []
+    for index in np.flatnonzero(low_contrast):
+        # cv2.rectangle(image, (col_min, row_min), (col_max, row_max), (0, 0, 255), 2)
+        results.append({
+            "component": int(components[index]),
+            "contrast_ratio": float(ratios[index]),
+            "bbox": tuple(boxes[index].tolist()),
+        })
 
     return results
 
@@ -122,15 +106,6 @@ def combine_images_side_by_side(image1, image2):
     return np.concatenate((image1, image2), axis=1)
 
 
-def load_image(image_path):
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image not found at path:{image_path}")
-    image = cv2.imread(image_path)
-    if image is None:
-        raise FileNotFoundError(f"Failed to laod image at path: {image_path}")
-    return image
-
-
 def compare_light_dark_mode_pixels(light_image, dark_image, bbox, threshold=15):
     """
     Compare pixel values between light and dark mode images for a given bounding box.
@@ -162,55 +137,47 @@ def compare_light_dark_mode_pixels(light_image, dark_image, bbox, threshold=15):
     return mean_diff < threshold
 
 
-def icon_inconsistency(light_image_path, dark_image_path, json_path, output_image_dir):
-    light_image = load_image(light_image_path)
-    dark_image = load_image(dark_image_path)
-    json_data = load_json(json_path)
+def icon_inconsistency(light_image_path, dark_image_path, json_path, output_image_dir, context=None, artifacts='all'):
+    if context is None:
+        context = PairContext(light_image_path, dark_image_path)
 
-    if light_image.shape[:2] != dark_image.shape[:2]:
-        dark_image = cv2.resize(dark_image,
-                                (light_image.shape[1], light_image.shape[0]))
+    light_image = context.light
+    dark_image = context.dark
+    json_data = load_json(json_path)
 
-    light_results = analyze_icon_contrast(light_image, json_data)
-    dark_results = analyze_icon_contrast(dark_image, json_data)
-    # print(light_results)
-    # print(dark_results)
+    # one icon list for both screenshots, the ratios at the same position belong to the same component
+    components, boxes = icon_boxes(json_data)
+    light_ratios, _ = icon_contrast(light_image, boxes)
+    dark_ratios, dark_low_contrast = icon_contrast(dark_image, boxes)
 
     failed = []
 
-    for light_res, dark_res in zip(light_results, dark_results):
-        light_ratio = light_res["contrast_ratio"]
+    for index in np.flatnonzero(dark_low_contrast):
+        # nan: the icon is a single color in light mode
+        light_ratio = None if np.isnan(light_ratios[index]) else float(light_ratios[index])
 
-        print("l", light_ratio)
-        dark_ratio = dark_res["contrast_ratio"]
-        print("d",dark_ratio)
-        col_min, row_min, col_max, row_max = dark_res["bbox"]
+        dark_ratio = float(dark_ratios[index])
+        bbox = tuple(boxes[index].tolist())
 
         # Check 1: both low contrast? ignore
         # if light_ratio < 0.5 and dark_ratio < 0.5:
         #     continue
 
         # Check 2: pixel similarity? ignore
-        # if compare_light_dark_mode_pixels(light_image, dark_image, dark_res["bbox"]):
+        # if compare_light_dark_mode_pixels(light_image, dark_image, bbox):
         #     continue
 
-        # Otherwise, draw bounding box
-        cv2.rectangle(
-            dark_image,
-            (col_min, row_min),
-            (col_max, row_max),
-            (0, 0, 255),
-            2
-        )
-
+        # Otherwise, keep the bounding box to draw it
         failed.append({
+            "component": int(components[index]),
             "light_ratio": light_ratio,
             "dark_ratio": dark_ratio,
-            "bbox": dark_res["bbox"]
+            "bbox": bbox
         })
 
-    combined = combine_images_side_by_side(light_image, dark_image)
-    cv2.imwrite(output_image_dir, combined)
+    # the failed icons are drawn on a copy of the dark screenshot
+    if should_write(artifacts, failed):
+        save_side_by_side(light_image, dark_image, [res["bbox"] for res in failed], output_image_dir)
 
     return failed
 
@@ -4,51 +4,43 @@ chroma eye will check whether the application support the dark mode throughout t
 '''
 
 
-import os
-import json
 import cv2
 import numpy as np
-import matplotlib.pyplot as plt
-from collections import Counter
 
-# Load the image
-def load_image(image_path):
+from chromaeye.chroma_detection.utils.artifacts import should_write
+from chromaeye.chroma_detection.utils.color_histogram import count_colors
+from chromaeye.chroma_detection.utils.json_io import load_json as read_json
+from chromaeye.chroma_detection.utils.pair_context import PairContext
+from chromaeye.chroma_detection.utils.uied_boxes import box_mask, compo_boxes
 
-    # update: Ticket: I-PC-4
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image not found at path:{image_path}")
-    image = cv2.imread(image_path)
-    if image is None:
-        raise FileNotFoundError(f"Image not found at path: {image_path}")
-    return image
+# pixels sampled for the k-means of the dominant background color, and the seed of the sample and of k-means
+DOMINANT_COLOR_SAMPLE_SIZE = 20000
+DOMINANT_COLOR_SEED = 0
 
 # Load the JSON file
 def load_json(json_path):
 
     # update: Ticket: I-PC-4
-    if not os.path.exists(json_path):
-        raise FileNotFoundError(f"Json file not found at path:{json_path}")
-
-    with open(json_path, 'r') as f:
-        json_data = json.load(f)
+    # the icon detection reads the same UIED json, it is parsed once (utils/json_io.py)
+    json_data = read_json(json_path, memoize=True)
     if 'compos' not in json_data:
         raise KeyError("JSON file does not contain the expected 'compos' key.")
     return json_data
 
-# Create a mask that excludes all UI elements
+# Create a mask that excludes all UI elements, bounding_boxes: int32 box array of the compos (utils/uied_boxes.py)
 def create_non_ui_mask(image, bounding_boxes):
-    non_ui_mask = np.ones(image.shape[:2], dtype=np.uint8)
-    for box in bounding_boxes:
-        x1, y1, x2, y2 = box['position']['column_min'], box['position']['row_min'], \
-            box['position']['column_max'], box['position']['row_max']
-        non_ui_mask[y1:y2, x1:x2] = 0
+    non_ui_mask = box_mask(bounding_boxes, image.shape, inside=0, outside=1)
     return non_ui_mask
 
 
 # Calculate dominant color in a masked area using K-means
-def calculate_dominant_color(image, mask, k=3):
+# on a seeded random sample of the pixels: the same result in every run, and a time that does not grow with the area
+def calculate_dominant_color(image, mask, k=3, sample_size=DOMINANT_COLOR_SAMPLE_SIZE, seed=DOMINANT_COLOR_SEED):
     masked_area = image[mask == 1]
+    if sample_size and len(masked_area) > sample_size:
+        masked_area = masked_area[np.random.default_rng(seed).integers(0, len(masked_area), sample_size)]
     pixels = np.float32(masked_area.reshape(-1, 3))
+    cv2.setRNGSeed(seed)
     _, labels, palette = cv2.kmeans(pixels, k, None, (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 100, 0.2), 10, cv2.KMEANS_RANDOM_CENTERS)
     dominant_color = palette[np.argmax(np.bincount(labels.flatten()))]
     return tuple(int(c) for c in dominant_color)
@@ -57,8 +49,8 @@ def calculate_dominant_color(image, mask, k=3):
 # Calculate the most frequent color in a masked area
 def calculate_most_frequent_color(image, mask):
     masked_area = image[mask == 1]
-    pixels = [tuple(pixel) for pixel in masked_area]
-    most_common_color = Counter(pixels).most_common(1)[0][0]
+    colors, _ = count_colors(masked_area)
+    most_common_color = tuple(colors[0])
     return most_common_color
 
 
@@ -70,23 +62,26 @@ def highlight_partial_conversion(image, non_ui_mask):
     highlight_image = image.copy()
     highlight_image[non_ui_mask ==1] = [0, 0, 255] # fill red color to partially converted area
 
-    # apply highlight in the image
-    plt.imshow(cv2.cvtColor(highlight_image, cv2.COLOR_BGR2RGB))
-    plt.title("Highlighted Areas with Improper Conversion")
-    plt.axis('off')
-    # plt.show()
+    # to inspect the highlight while debugging:
+    # show_bgr_image(highlight_image, "Highlighted Areas with Improper Conversion")  # utils/visualize.py
     return highlight_image
 
 
 # Highlight insufficient color changes in HSV
-def partial_conversion_areas_hsv(light_image, dark_image, non_ui_mask):
-    hue_threshold = 10,
-    saturation_threshold = 20,
+def partial_conversion_areas_hsv(light_image, dark_image, non_ui_mask, context=None):
+    hue_threshold = 10
+    saturation_threshold = 20
     brightness_threshold = 20
     # output_path = "highlighted_no_conversion.png"
-    light_hsv = cv2.cvtColor(light_image, cv2.COLOR_BGR2HSV)
-    dark_hsv = cv2.cvtColor(dark_image, cv2.COLOR_BGR2HSV)
+    if context is not None:
+        light_hsv, dark_hsv = context.light_hsv, context.dark_hsv
+    else:
+        light_hsv = cv2.cvtColor(light_image, cv2.COLOR_BGR2HSV)
+        dark_hsv = cv2.cvtColor(dark_image, cv2.COLOR_BGR2HSV)
+    # signed differences, uint8 subtraction wraps around
+    light_hsv, dark_hsv = light_hsv.astype(np.int16), dark_hsv.astype(np.int16)
     hue_diff = np.abs(light_hsv[:, :, 0] - dark_hsv[:, :, 0])
+    hue_diff = np.minimum(hue_diff, 180 - hue_diff)  # hue is an angle, 0-179 in opencv
     saturation_diff = np.abs(light_hsv[:, :, 1] - dark_hsv[:, :, 1])
     brightness_diff = np.abs(light_hsv[:, :, 2] - dark_hsv[:, :, 2])
     no_conversion_mask = (
@@ -98,21 +93,26 @@ def partial_conversion_areas_hsv(light_image, dark_image, non_ui_mask):
     highlighted_image = highlight_partial_conversion(dark_image, no_conversion_mask)
     return highlighted_image
 
+# draw the improper conversion area again from the screenshots, e.g. after a run without artifacts
+def render_partial_conversion(light_image, dark_image, json_path, output_image_path, context=None):
+    non_ui_mask = create_non_ui_mask(light_image, compo_boxes(load_json(json_path).get('compos', [])))
+    cv2.imwrite(output_image_path, partial_conversion_areas_hsv(light_image, dark_image, non_ui_mask, context))
+
+
 # Analyze color conversion for a single light-dark image pair
-def analyze_color_conversion(light_image, dark_image, json_path, output_image_path):
-    partial_conversion_area = None
+def analyze_color_conversion(light_image, dark_image, json_path, output_image_path, context=None, artifacts='all'):
+    improper_conversion = False
 
     # Load images and JSON data
     light_image = light_image
     # print(light_image)
     dark_image = dark_image
     json_data = load_json(json_path)
-    bounding_boxes = json_data.get('compos', [])
+    bounding_boxes = compo_boxes(json_data.get('compos', []))
 
     non_ui_mask = create_non_ui_mask(light_image, bounding_boxes)
 
-    plt.imshow(non_ui_mask, cmap='gray')
-    # plt.show()
+    # show_image(non_ui_mask, cmap='gray')  # utils/visualize.py, to inspect the mask while debugging
 
     # Calculate colors
     light_dominant_color = calculate_dominant_color(light_image, non_ui_mask)
@@ -151,7 +151,7 @@ def analyze_color_conversion(light_image, dark_image, json_path, output_image_pa
     if dark_in_bright_range or dark_frequent_in_bright_range:
         conversion_status = ("Improper conversion detected: Dark mode background appear to be light color,"
                              "indicating the insufficient changes for dark mode adaptation.")
-        partial_conversion_area = partial_conversion_areas_hsv(light_image, dark_image, non_ui_mask)
+        improper_conversion = True
 
     elif light_in_dark_range or light_frequent_in_dark_range:
         # print('Light mode large section consist of the dark region, might be the feature of application. skip the partial inconsistency comparison...')
@@ -159,34 +159,34 @@ def analyze_color_conversion(light_image, dark_image, json_path, output_image_pa
 
     elif dark_matches_light:
         conversion_status = "Improper conversion detected: Dark mode background match the light background, which indicates the improper conversion"
-        partial_conversion_area = partial_conversion_areas_hsv(light_image, dark_image, non_ui_mask)
+        improper_conversion = True
     else:
         conversion_status = "Proper conversion of the mode: Light and dark background are sufficiently distinct."
 
-    if partial_conversion_area is not None:
+    # the highlighted area is only computed for the image, written as the artifacts policy says
+    if improper_conversion and should_write(artifacts, improper_conversion):
+        partial_conversion_area = partial_conversion_areas_hsv(light_image, dark_image, non_ui_mask, context)
         cv2.imwrite(output_image_path, partial_conversion_area)
 
     return {"Conversion Status": conversion_status}
 
 
 # check whether the application support the dark mode
-def partial_conversion_inconsistency(light_image_path:str, dark_image_path:str, json_dir:str, output_image:str):
+def partial_conversion_inconsistency(light_image_path:str, dark_image_path:str, json_dir:str, output_image:str,
+                                     context=None, artifacts='all'):
     total_image = 0
     image_with_issues = 0
     issues_details = []
 
-    light_image = load_image(light_image_path)
-    dark_image = load_image(dark_image_path)
+    if context is None:
+        context = PairContext(light_image_path, dark_image_path)
 
-    if light_image is None or dark_image is None:
-        print(f"Error: Image not found or cannot be read at specified path.")
-        return
-    if light_image.shape[:2] != dark_image.shape[:2]:
-        dark_image =cv2.resize(dark_image, (light_image.shape[1], light_image.shape[0]))
+    light_image = context.light
+    dark_image = context.dark
 
     total_image +=1
 
-    conversion_result = analyze_color_conversion(light_image, dark_image, json_dir, output_image)
+    conversion_result = analyze_color_conversion(light_image, dark_image, json_dir, output_image, context, artifacts)
 
     issue_percentage = (image_with_issues/total_image) * 100 if total_image > 0 else 0
 
@@ -8,11 +8,10 @@ and output directory to verify the pairs of screenshots "output_dir"
 
 '''
 import shutil
-import json
 import os
-from typing import List, Dict, Any
 
 from chromaeye.chroma_detection.edge_based_detection.edge_based import edge_inconsistency
+from chromaeye.chroma_detection.utils.json_io import save_json
 
 
 def create_folder(folder_name):
@@ -22,14 +21,6 @@ def create_folder(folder_name):
     return folder_name
 
 
-def load_json(json_path: str) -> Dict[str, Any]:
-    """Load JSON file."""
-    if not os.path.exists(json_path):
-        raise FileNotFoundError(f"JSON file not found at path: {json_path}")
-    with open(json_path, 'r') as f:
-        return json.load(f)
-
-
 def check_sc_pairs(image_dir, output_dir):
     #1 Edge Inconsistency
     edge_inconsistency_output_folder = create_folder(os.path.join(output_dir, 'check_identical_pairs'))
@@ -95,8 +86,7 @@ def check_sc_pairs(image_dir, output_dir):
 
     edge_summary_path = os.path.join(edge_inconsistency_output_folder, 'edge_inconsistency.json')
 
-    with open(edge_summary_path, 'w') as edges_file:
-        json.dump(edge_inconsistency_detection, edges_file, indent=4)
+    save_json(edge_inconsistency_detection, edge_summary_path)
 
 
 def main():
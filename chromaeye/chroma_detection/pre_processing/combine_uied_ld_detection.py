@@ -9,23 +9,17 @@ Please pass the absolute path
 
 
 import cv2
-import json
 import os
-import matplotlib.pyplot as plt
+from collections import defaultdict
 from typing import Dict, List
 import numpy as np
 
+from chromaeye.chroma_detection.utils.box_index import BoxGrid
+from chromaeye.chroma_detection.utils.json_io import load_json, save_json
+from chromaeye.chroma_detection.utils.uied_boxes import compo_boxes
 
-def load_json(file_path: str) -> Dict:
-    """Load JSON file containing bounding box"""
-    with open(file_path, 'r') as file:
-        return json.load(file)
-
-
-def save_json(data: Dict, file_path: str):
-    """Save data to JSON file."""
-    with open(file_path, 'w') as file:
-        json.dump(data, file, indent=4)
+# UIED components are larger than OCR words, a coarser grid than the default keeps each box in few cells
+GRID_CELL_SIZE = 256
 
 
 def get_bounding_box_position(comp: Dict) -> Dict:
@@ -51,23 +45,77 @@ def calculate_overlap(pos1: Dict, pos2: Dict) -> float:
     return overlap_area / union_area if union_area > 0 else 0
 
 
-def match_elements(light_compos: List[Dict], dark_compos: List[Dict], thrpanzoidhold: float = 0.3) -> List[Dict]:
-    """Match elements between light and dark JSON filpanzoid based on overlap."""
-    matchpanzoid = []
-    for light_comp in light_compos:
-        matched = False
-        for dark_comp in dark_compos:
-            if light_comp['class'] == dark_comp['class']:
-                overlap = calculate_overlap(get_bounding_box_position(light_comp), get_bounding_box_position(dark_comp))
+def overlapping_candidates(light_compos: List[Dict], dark_compos: List[Dict], thrpanzoidhold: float) -> List[List]:
+    """
+    For every light component, the (dark index, overlap) of the dark components of the same class with an overlap
+    above the threshold, in dark order. Only the dark boxes that touch the light box are compared (utils/box_index.py).
+    """
+    dark_boxes = compo_boxes(dark_compos).tolist()
+    class_indices = defaultdict(list)
+    for index, dark_comp in enumerate(dark_compos):
+        class_indices[dark_comp['class']].append(index)
+    class_grids = {comp_class: BoxGrid([dark_boxes[index] for index in indices], GRID_CELL_SIZE)
+                   for comp_class, indices in class_indices.items()}
+
+    candidates = []
+    for light_comp, light_box in zip(light_compos, compo_boxes(light_compos).tolist()):
+        comp_class = light_comp['class']
+        light_candidates = []
+        if comp_class in class_grids:
+            for grid_index in class_grids[comp_class].query(light_box):
+                index = class_indices[comp_class][grid_index]
+                overlap = calculate_overlap(get_bounding_box_position(light_comp),
+                                            get_bounding_box_position(dark_compos[index]))
                 if overlap > thrpanzoidhold:
-                    matchpanzoid.append({'light': light_comp, 'dark': dark_comp})
-                    matched = True
-                    break
-        if not matched:
-            matchpanzoid.append({'light': light_comp, 'dark': None})
-
-    for dark_comp in dark_compos:
-        if not any(match['dark'] == dark_comp for match in matchpanzoid):
+                    light_candidates.append((index, overlap))
+        candidates.append(light_candidates)
+    return candidates
+
+
+def optimal_assignment(candidates: List[List]) -> Dict[int, int]:
+    """One to one light -> dark assignment with the largest total overlap among the candidates."""
+    light_indices = [index for index, light_candidates in enumerate(candidates) if light_candidates]
+    dark_indices = sorted({index for light_candidates in candidates for index, _ in light_candidates})
+    if not light_indices:
+        return {}
+    from scipy.optimize import linear_sum_assignment
+
+    dark_columns = {index: column for column, index in enumerate(dark_indices)}
+    overlaps = np.zeros((len(light_indices), len(dark_indices)))
+    for row, light_index in enumerate(light_indices):
+        for dark_index, overlap in candidates[light_index]:
+            overlaps[row, dark_columns[dark_index]] = overlap
+
+    rows, columns = linear_sum_assignment(overlaps, maximize=True)
+    return {light_indices[row]: dark_indices[column] for row, column in zip(rows, columns) if overlaps[row, column] > 0}
+
+
+def match_elements(light_compos: List[Dict], dark_compos: List[Dict], thrpanzoidhold: float = 0.3,
+                   assignment: str = 'first') -> List[Dict]:
+    """
+    Match elements between light and dark JSON filpanzoid based on overlap.
+    assignment:
+    - first: every light component takes the first dark component of its class above the threshold,
+      a dark component can match several light components
+    - optimal: one to one matching with the largest total overlap
+    """
+    candidates = overlapping_candidates(light_compos, dark_compos, thrpanzoidhold)
+    if assignment == 'optimal':
+        light_to_dark = optimal_assignment(candidates)
+    elif assignment == 'first':
+        light_to_dark = {index: light_candidates[0][0] for index, light_candidates in enumerate(candidates)
+                         if light_candidates}
+    else:
+        raise ValueError(f"Unknown assignment {assignment}, expected 'first' or 'optimal'")
+
+    matchpanzoid = []
+    for index, light_comp in enumerate(light_compos):
+        dark_index = light_to_dark.get(index)
+        matchpanzoid.append({'light': light_comp, 'dark': dark_compos[dark_index] if dark_index is not None else None})
+
+    matched_dark = set(light_to_dark.values())
+    for index, dark_comp in enumerate(dark_compos):
+        if index not in matched_dark:
             matchpanzoid.append({'light': None, 'dark': dark_comp})
     return matchpanzoid
 
@@ -91,8 +139,7 @@ def create_consistent_json(matchpanzoid: List[Dict], img_shape: List[int]) -> Di
 
 def draw_bounding_box(image, compos, mode='both'):
     color = (255, 0, 0)  # Default green for elements in both modpanzoid
-    for comp in compos:
-        position = comp['position']
+    for comp, (col_min, row_min, col_max, row_max) in zip(compos, compo_boxes(compos).tolist()):
         # if comp['class'] != "Compo":
         #     continue
         if mode == 'light' and comp.get('missing_in_dark'):
@@ -102,32 +149,31 @@ def draw_bounding_box(image, compos, mode='both'):
         elif mode == 'both' and 'missing_in_dark' not in comp and 'missing_in_light' not in comp:
             color = (255, 0, 255)  # fuchsia for elements in both modpanzoid
 
-        start_point = (position['column_min'], position['row_min'])
-        end_point = (position['column_max'], position['row_max'])
-        cv2.rectangle(image, start_point, end_point, color, 2)
+        cv2.rectangle(image, (col_min, row_min), (col_max, row_max), color, 2)
     return image
 
 
+def draw_gui_detection(light_image, dark_image, consistent_data):
+    """The light and dark screenshots side by side with the consistent components drawn on copies of them."""
+    light_image = draw_bounding_box(light_image.copy(), consistent_data['compos'], mode='light')
+    dark_image = draw_bounding_box(dark_image.copy(), consistent_data['compos'], mode='dark')
+    return np.hstack((light_image, dark_image))
+
+
 def visualize_gui_detection(light_img_path, dark_img_path, consistent_data, output_combined_img_path):
     light_image = cv2.imread(light_img_path)
     dark_image = cv2.imread(dark_img_path)
 
-    light_image = draw_bounding_box(light_image, consistent_data['compos'], mode='light')
-    dark_image = draw_bounding_box(dark_image, consistent_data['compos'], mode='dark')
-
-    combined_image = np.hstack((light_image, dark_image))
+    combined_image = draw_gui_detection(light_image, dark_image, consistent_data)
     cv2.imwrite(output_combined_img_path, combined_image)
 
-    combined_image_rgb = cv2.cvtColor(combined_image, cv2.COLOR_BGR2RGB)
-    plt.figure(figsize=(15, 8))
-    plt.imshow(combined_image_rgb)
-    plt.title("Light Mode and Dark Mode Comparison with Bounding Boxpanzoid")
-    plt.axis('off')
-    # plt.show()
+    # to inspect the comparison while debugging (utils/visualize.py closes the figure after showing it):
+    # show_bgr_image(combined_image, "Light Mode and Dark Mode Comparison with Bounding Boxes")
 
 
-def combine_uied_detection(json_dir, image_dir, output_dir):
-    """Procpanzoids a batch of imagpanzoid and JSON filpanzoid for invisible and missing text checks."""
+def combine_uied_detection(json_dir, image_dir, output_dir, assignment='first'):
+    """Procpanzoids a batch of imagpanzoid and JSON filpanzoid for invisible and missing text checks.
+    assignment: how light and dark components are matched, see match_elements"""
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     for filename in os.listdir(image_dir):
@@ -150,7 +196,7 @@ def combine_uied_detection(json_dir, image_dir, output_dir):
                 dark_data = load_json(dark_json_file)
 
                 # Match elements and create consistent JSON structure
-                matchpanzoid = match_elements(light_data['compos'], dark_data['compos'])
+                matchpanzoid = match_elements(light_data['compos'], dark_data['compos'], assignment=assignment)
                 consistent_data = create_consistent_json(matchpanzoid, light_data['img_shape'])
 
                 # Save the output JSON
@@ -161,13 +207,15 @@ def combine_uied_detection(json_dir, image_dir, output_dir):
             else:
                 print(f"Skipping {filename}: Required filpanzoid not found.")
 
-# path to the uied size image
-image_dir = "/chromaeye/example_dataset/edge_based/flashscore/input/image/uied_size"
-# path to uied output json
-json_dir = "/chromaeye/example_dataset/edge_based/flashscore/input/uied"
-# path to save the result
-output_dir = "/chromaeye/example_dataset/edge_based/flashscore/input/uied_dl_json"
 
-combine_uied_detection(json_dir, image_dir, output_dir)
+if __name__ == '__main__':
+    # path to the uied size image
+    image_dir = "/chromaeye/example_dataset/edge_based/flashscore/input/image/uied_size"
+    # path to uied output json
+    json_dir = "/chromaeye/example_dataset/edge_based/flashscore/input/uied"
+    # path to save the result
+    output_dir = "/chromaeye/example_dataset/edge_based/flashscore/input/uied_dl_json"
+
+    combine_uied_detection(json_dir, image_dir, output_dir)
 
-print("Process to combine uied light and dark mode gui component detection into one completed.")
\ No newline at end of file
+    print("Process to combine uied light and dark mode gui component detection into one completed.")
@@ -0,0 +1,164 @@
+'''
+chromaeye: ocr backends
+local, offline OCR that writes the same json as the Upstage OCR api, so the text detectors work with either.
+
+every backend has the interface of UpstageOcrClient (ocr_client.py): ocr(image_bytes), ocr_file(path) and
+ocr_files(paths). a local backend recognizes the words of a decoded image, the words are written in the Upstage
+schema: pages[].words[] with text, confidence and boundingBox.vertices (top left, top right, bottom right, bottom left).
+ocr_files runs the screenshots in max_workers processes, each process loads the model once.
+backends (optional dependencies, imported on first use):
+- tesseract: Tesseract through pytesseract (pip install pytesseract, and the tesseract binary)
+- rapidocr: PP-OCR detection and recognition models in onnxruntime on the CPU (pip install rapidocr_onnxruntime)
+'''
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from chromaeye.chroma_detection.pre_processing.ocr_client import decode_image
+
+
+def box_vertices(x_min, y_min, x_max, y_max):
+    return [{"x": int(x_min), "y": int(y_min)}, {"x": int(x_max), "y": int(y_min)},
+            {"x": int(x_max), "y": int(y_max)}, {"x": int(x_min), "y": int(y_max)}]
+
+
+def upstage_document(words, width, height, model_version):
+    """Upstage OCR json of one page, words: [(text, confidence, (x_min, y_min, x_max, y_max)), ...] in reading order."""
+    page_words = [{"boundingBox": {"vertices": box_vertices(*box)}, "confidence": round(float(confidence), 4),
+                   "id": index, "text": text}
+                  for index, (text, confidence, box) in enumerate(words)]
+    confidence = round(sum(word["confidence"] for word in page_words) / len(page_words), 4) if page_words else 0
+    text = " ".join(word["text"] for word in page_words)
+    return {
+        "confidence": confidence,
+        "metadata": {"pages": [{"height": height, "page": 1, "width": width}]},
+        "modelVersion": model_version,
+        "numBilledPages": 0,
+        "pages": [{"confidence": confidence, "height": height, "id": 0, "text": text, "width": width,
+                   "words": page_words}],
+        "text": text,
+    }
+
+
+class LocalOcr:
+    """Base of the local backends, a subclass implements recognize."""
+    name = 'local'
+
+    def __init__(self, max_workers=1):
+        self.max_workers = max_workers
+
+    def recognize(self, image):
+        """[(text, confidence 0-1, (x_min, y_min, x_max, y_max)), ...] of a BGR image, in reading order."""
+        raise NotImplementedError
+
+    def options(self):
+        """Constructor arguments besides max_workers, the worker processes build their backend with them."""
+        return {}
+
+    def ocr(self, image_bytes, filename="document"):
+        image = decode_image(image_bytes)
+        if image is None:
+            raise ValueError(f"Could not decode image {filename}")
+        height, width = image.shape[:2]
+        return upstage_document(self.recognize(image), width, height, self.name)
+
+    def ocr_file(self, image_path):
+        with open(image_path, 'rb') as image_file:
+            image_bytes = image_file.read()
+        return image_bytes, self.ocr(image_bytes, os.path.basename(image_path))
+
+    def ocr_files(self, image_paths):
+        """Yields (image_path, image_bytes, ocr_result, error) in the order of image_paths, like UpstageOcrClient."""
+        if self.max_workers <= 1 or len(image_paths) <= 1:
+            yield from map(self.ocr_one, image_paths)
+            return
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=init_worker_backend,
+                                 initargs=(type(self), self.options())) as executor:
+            yield from executor.map(ocr_with_worker_backend, image_paths)
+
+    def ocr_one(self, image_path):
+        try:
+            return (image_path, *self.ocr_file(image_path), None)
+        except (OSError, ValueError, RuntimeError) as e:
+            return image_path, None, None, e
+
+
+# the backend of a worker process, the model is loaded once per process
+worker_backend = None
+
+
+def init_worker_backend(backend_class, options):
+    global worker_backend
+    worker_backend = backend_class(**options)
+
+
+def ocr_with_worker_backend(image_path):
+    return worker_backend.ocr_one(image_path)
+
+
+class TesseractOcr(LocalOcr):
+    name = 'tesseract'
+
+    def __init__(self, max_workers=1, lang='eng', config=''):
+        super().__init__(max_workers)
+        self.lang = lang
+        self.config = config
+
+    def options(self):
+        return {'lang': self.lang, 'config': self.config}
+
+    def recognize(self, image):
+        import pytesseract
+
+        data = pytesseract.image_to_data(cv2.cvtColor(image, cv2.COLOR_BGR2RGB), lang=self.lang, config=self.config,
+                                         output_type=pytesseract.Output.DICT)
+        words = []
+        for text, confidence, left, top, width, height in zip(data['text'], data['conf'], data['left'], data['top'],
+                                                              data['width'], data['height']):
+            # the rows of blocks, paragraphs and lines have no text and a confidence of -1
+            if text.strip() and float(confidence) >= 0:
+                words.append((text.strip(), float(confidence) / 100, (left, top, left + width, top + height)))
+        return words
+
+
+class RapidOcr(LocalOcr):
+    name = 'rapidocr'
+
+    def __init__(self, max_workers=1):
+        super().__init__(max_workers)
+        self.engine = None
+
+    def recognize(self, image):
+        if self.engine is None:
+            from rapidocr_onnxruntime import RapidOCR
+            self.engine = RapidOCR()
+
+        lines, _ = self.engine(image, return_word_box=True)
+        words = []
+        for line_box, line_text, line_confidence, *char_result in lines or []:
+            # the recognizer also returns the characters of the line with one box each, a word is the union of the
+            # boxes of its characters, the spaces split the words
+            char_boxes, chars = char_result[:2] if len(char_result) >= 2 else ([], [])
+            if len(char_boxes) != len(chars) or not chars:
+                xs, ys = [point[0] for point in line_box], [point[1] for point in line_box]
+                words.append((line_text.strip(), line_confidence, (min(xs), min(ys), max(xs), max(ys))))
+                continue
+
+            word, points = '', []
+            for char, char_box in zip(chars + [' '], char_boxes + [[]]):
+                if char.strip():
+                    word += char
+                    points += char_box
+                elif word:
+                    xs, ys = [point[0] for point in points], [point[1] for point in points]
+                    words.append((word, line_confidence, (min(xs), min(ys), max(xs), max(ys))))
+                    word, points = '', []
+        return words
+
+
+OCR_BACKENDS = {
+    'tesseract': TesseractOcr,
+    'rapidocr': RapidOcr,
+}
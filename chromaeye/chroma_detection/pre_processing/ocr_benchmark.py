@@ -0,0 +1,109 @@
+'''
+chromaeye: ocr benchmark
+compare a local OCR backend (ocr_backends.py) with the Upstage OCR results of the same screenshots:
+- throughput: screenshots per second
+- word box agreement: share of the Upstage words matched by a local word with box IoU >= iou_threshold (recall),
+  share of the local words matched (precision), and share of the matched words with the same text
+
+prerequisite
+please pass the folder of the screenshots and the folder of their Upstage OCR json (same base file name)
+'''
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from chromaeye.chroma_detection.pre_processing.ocr_backends import OCR_BACKENDS
+from chromaeye.chroma_detection.utils.json_io import load_json
+
+
+def word_boxes(ocr_result):
+    """(n, 4) array of the (x_min, y_min, x_max, y_max) word boxes and the list of word texts."""
+    boxes, texts = [], []
+    for page in ocr_result['pages']:
+        for word in page['words']:
+            xs = [vertex['x'] for vertex in word['boundingBox']['vertices']]
+            ys = [vertex['y'] for vertex in word['boundingBox']['vertices']]
+            boxes.append((min(xs), min(ys), max(xs), max(ys)))
+            texts.append(word['text'])
+    return np.array(boxes, dtype=np.float64).reshape(-1, 4), texts
+
+
+def box_iou(boxes1, boxes2):
+    """(n, m) IoU of every pair of boxes."""
+    x_min = np.maximum(boxes1[:, None, 0], boxes2[None, :, 0])
+    y_min = np.maximum(boxes1[:, None, 1], boxes2[None, :, 1])
+    x_max = np.minimum(boxes1[:, None, 2], boxes2[None, :, 2])
+    y_max = np.minimum(boxes1[:, None, 3], boxes2[None, :, 3])
+    intersection = np.clip(x_max - x_min, 0, None) * np.clip(y_max - y_min, 0, None)
+    area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+    area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+    union = area1[:, None] + area2[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def word_agreement(reference, result, iou_threshold=0.5):
+    """(matched, reference words, result words, same text) of one screenshot, one to one, best IoU first."""
+    reference_boxes, reference_texts = word_boxes(reference)
+    result_boxes, result_texts = word_boxes(result)
+    iou = box_iou(reference_boxes, result_boxes)
+
+    matched, same_text = 0, 0
+    used_reference, used_result = set(), set()
+    for flat_index in np.argsort(-iou, axis=None):
+        i, j = np.unravel_index(flat_index, iou.shape)
+        if iou[i, j] < iou_threshold:
+            break
+        if i in used_reference or j in used_result:
+            continue
+        used_reference.add(i)
+        used_result.add(j)
+        matched += 1
+        same_text += reference_texts[i].casefold() == result_texts[j].casefold()
+    return matched, len(reference_texts), len(result_texts), same_text
+
+
+def ocr_benchmark(image_dir, reference_dir, backend='rapidocr', workers=1, iou_threshold=0.5):
+    image_paths = [os.path.join(image_dir, filename) for filename in sorted(os.listdir(image_dir))
+                   if filename.endswith(('.png', '.jpg', '.jpeg')) and
+                   os.path.exists(os.path.join(reference_dir, f"{os.path.splitext(filename)[0]}.json"))]
+    ocr = OCR_BACKENDS[backend](max_workers=workers)
+
+    start = time.perf_counter()
+    totals = np.zeros(4, dtype=np.int64)
+    for image_path, _, ocr_result, error in ocr.ocr_files(image_paths):
+        if error is not None:
+            print(f"Error processing {image_path}: {error}")
+            continue
+        base_filename = os.path.splitext(os.path.basename(image_path))[0]
+        reference = load_json(os.path.join(reference_dir, f"{base_filename}.json"))
+        agreement = word_agreement(reference, ocr_result, iou_threshold)
+        totals += agreement
+        print(f"{base_filename}: {agreement[0]}/{agreement[1]} Upstage words matched, {agreement[2]} local words")
+    seconds = time.perf_counter() - start
+
+    matched, reference_words, result_words, same_text = totals
+    print(f"{backend}, {workers} workers: {len(image_paths)} screenshots in {seconds:.1f}s "
+          f"({len(image_paths) / seconds:.2f} screenshots/s)")
+    print(f"recall {matched / max(reference_words, 1):.3f}, precision {matched / max(result_words, 1):.3f}, "
+          f"same text {same_text / max(matched, 1):.3f} (box IoU >= {iou_threshold})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a local OCR backend with the Upstage OCR results.")
+    parser.add_argument('--backend', choices=sorted(OCR_BACKENDS), default='rapidocr')
+    parser.add_argument('--workers', type=int, default=1, help="number of processes (default: 1)")
+    parser.add_argument('--iou', type=float, default=0.5, help="box IoU of a matched word (default: 0.5)")
+    args = parser.parse_args()
+
+    # screenshots and their upstage ocr json
+    image_dir = '/chromaeye/example_dataset/edge_based/flashscore/input/image/org_size'
+    reference_dir = '/chromaeye/example_dataset/edge_based/flashscore/input/ocr'
+
+    ocr_benchmark(image_dir, reference_dir, args.backend, args.workers, args.iou)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+'''
+chromaeye: ocr client
+send screenshots to the Upstage OCR endpoint concurrently, without exceeding the rate limit of the api key.
+
+- one requests.Session, its connection pool is sized to the number of concurrent requests
+- a token bucket allows at most rate requests per second on average, with bursts of up to burst requests
+- a failed request (connection error, timeout, 429 or 5xx) is retried with exponential backoff, Retry-After is honored
+- the result of every screenshot is cached on disk under the sha256 of the endpoint and the image bytes, so an
+  identical screenshot is never sent twice, even under another file name or in another run
+
+the endpoint is a parameter, the client can be pointed at a local stub server to test it.
+'''
+
+import hashlib
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import requests
+
+from chromaeye.chroma_detection.utils.json_io import dumps, loads, read_json
+
+UPSTAGE_OCR_URL = "https://api.upstage.ai/v1/document-ai/ocr"
+
+# responses worth retrying, the other errors (e.g. 401 invalid api key) are raised at once
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread safe token bucket: rate tokens per second, at most capacity tokens saved up."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, wait until one is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class UpstageOcrClient:
+    """
+    Upstage OCR client.
+    max_workers: concurrent requests
+    rate, burst: requests per second and the largest burst, None for no rate limit
+    max_retries, backoff, max_backoff: a request is tried max_retries + 1 times, waiting backoff * 2 ** attempt
+    seconds (at most max_backoff) between the tries
+    cache_dir: directory of the cached results, None to disable the cache
+    """
+
+    def __init__(self, api_key, url=UPSTAGE_OCR_URL, max_workers=4, rate=None, burst=1, max_retries=5, backoff=1.0,
+                 max_backoff=30.0, timeout=60, cache_dir=None):
+        self.url = url
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        # one lock per cached result, the same screenshot sent twice at once is only posted once
+        self.cache_locks = defaultdict(threading.Lock)
+        self.cache_locks_lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {api_key}"
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def cache_path(self, image_bytes):
+        digest = hashlib.sha256(self.url.encode() + b'\0' + image_bytes).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json")
+
+    def retry_delay(self, attempt, response=None):
+        """Seconds to wait before the next try, the server's Retry-After (in seconds) when it sent one."""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        return min(self.backoff * 2 ** attempt, self.max_backoff)
+
+    def post(self, image_bytes, filename):
+        """Send one image, retrying the transient failures. Raises requests.RequestException when all tries fail."""
+        for attempt in range(self.max_retries + 1):
+            if self.bucket:
+                self.bucket.acquire()
+            last_try = attempt == self.max_retries
+            try:
+                response = self.session.post(self.url, files={"document": (filename, image_bytes)},
+                                             timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if last_try:
+                    raise
+                time.sleep(self.retry_delay(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUS and not last_try:
+                time.sleep(self.retry_delay(attempt, response))
+                continue
+            response.raise_for_status()
+            return loads(response.content)
+
+    def ocr(self, image_bytes, filename="document"):
+        """OCR result of an encoded image (the Upstage json), from the cache when the same image was sent before."""
+        if not self.cache_dir:
+            return self.post(image_bytes, filename)
+
+        cache_path = self.cache_path(image_bytes)
+        with self.cache_locks_lock:
+            cache_lock = self.cache_locks[cache_path]
+        with cache_lock:
+            if os.path.exists(cache_path):
+                return read_json(cache_path)
+
+            ocr_result = self.post(image_bytes, filename)
+
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(dumps(ocr_result))
+            os.replace(temp_path, cache_path)
+        return ocr_result
+
+    def ocr_file(self, image_path):
+        """Returns (image_bytes, ocr_result), the bytes are read once and can be decoded without reading the file again."""
+        with open(image_path, 'rb') as image_file:
+            image_bytes = image_file.read()
+        return image_bytes, self.ocr(image_bytes, os.path.basename(image_path))
+
+    def ocr_files(self, image_paths):
+        """
+        OCR every image with max_workers concurrent requests.
+        Yields (image_path, image_bytes, ocr_result, error) in the order of image_paths, error is None on success.
+        """
+        def ocr_one(image_path):
+            try:
+                return (image_path, *self.ocr_file(image_path), None)
+            except (OSError, ValueError, requests.RequestException) as e:
+                return image_path, None, None, e
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            yield from executor.map(ocr_one, image_paths)
+
+
+def draw_word_boxes(image, ocr_result, color=(0, 255, 0), thickness=2):
+    """Draw the bounding polygon of every OCR word on the image (in place)."""
+    polygons = [np.array([(v['x'], v['y']) for v in word['boundingBox']['vertices']], np.int32).reshape((-1, 1, 2))
+                for page in ocr_result['pages'] for word in page['words']]
+    if polygons:
+        cv2.polylines(image, polygons, isClosed=True, color=color, thickness=thickness)
+    return image
+
+
+def decode_image(image_bytes):
+    """Decode an encoded image (png, jpg) that is already in memory."""
+    return cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
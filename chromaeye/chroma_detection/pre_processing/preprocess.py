@@ -0,0 +1,192 @@
+'''
+chromaeye: preprocess
+run the preprocessing of the screenshot pairs as one pipeline:
+1. resize the screenshots to the UIED size (resize_image.py)
+2. combine the light and dark mode UIED detection into one json (combine_uied_ld_detection.py)
+3. optional: light and dark screenshot side by side for easy visualization (visualize_sc_pairs.py)
+
+each pair is decoded once and handled by one worker. like make, an output is only written when it is missing or older
+than one of its inputs, so run it once to get the UIED size screenshots, run the UIED detection on them, then run it
+again to combine the UIED detection (the resized screenshots are not written again).
+
+prerequisite
+please pass the absolute path
+'''
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import cv2
+import numpy as np
+from tqdm import tqdm
+
+from chromaeye.chroma_detection.pre_processing.combine_uied_ld_detection import (create_consistent_json,
+                                                                                 draw_gui_detection, load_json,
+                                                                                 match_elements, save_json)
+from chromaeye.chroma_detection.pre_processing.resize_image import resize_to_uied
+
+
+def is_stale(output_path, input_paths, force=False):
+    """True when the output has to be written: it is missing or older than one of its inputs."""
+    if force or not os.path.exists(output_path):
+        return True
+    return os.path.getmtime(output_path) < max(os.path.getmtime(path) for path in input_paths)
+
+
+class PairImages:
+    """Decode the screenshots of a pair on first use, at most once."""
+
+    def __init__(self, light_image_file, dark_image_file):
+        self.paths = {'light': light_image_file, 'dark': dark_image_file}
+        self.images = {}
+        self.uied_images = {}
+
+    def image(self, mode):
+        if mode not in self.images:
+            image = cv2.imread(self.paths[mode])
+            if image is None:
+                raise FileNotFoundError(f"Image not found at path:{self.paths[mode]}")
+            self.images[mode] = image
+        return self.images[mode]
+
+    def uied_image(self, mode):
+        if mode not in self.uied_images:
+            self.uied_images[mode] = resize_to_uied(self.image(mode))
+        return self.uied_images[mode]
+
+
+def preprocess_pair(filename, image_dir, uied_json_dir, uied_image_dir, uied_dl_json_dir, lightdark_dir=None,
+                    assignment='first', force=False, pretty_json=False):
+    """Preprocess one light/dark pair, returns the paths written and the steps that were skipped."""
+    base_filename = filename.replace('light.png', '')
+    images = PairImages(os.path.join(image_dir, filename), os.path.join(image_dir, f"{base_filename}dark.png"))
+    written, skipped = [], []
+
+    # 1. UIED size screenshots
+    uied_image_files = {mode: os.path.join(uied_image_dir, f"{base_filename}{mode}.png") for mode in images.paths}
+    for mode, uied_image_file in uied_image_files.items():
+        if is_stale(uied_image_file, [images.paths[mode]], force):
+            cv2.imwrite(uied_image_file, images.uied_image(mode))
+            written.append(uied_image_file)
+
+    # 2. combined UIED detection, the UIED detection runs on the UIED size screenshots
+    uied_json_files = [os.path.join(uied_json_dir, f"{base_filename}{mode}.json") for mode in images.paths]
+    output_json_file = os.path.join(uied_dl_json_dir, f"{base_filename}light.json")
+    output_combined_image = os.path.join(uied_dl_json_dir, f"{base_filename}combined.png")
+    if not all(os.path.exists(path) for path in uied_json_files):
+        skipped.append('uied detection not found')
+    else:
+        inputs = uied_json_files + list(uied_image_files.values())
+        if is_stale(output_json_file, inputs, force) or is_stale(output_combined_image, inputs, force):
+            light_data, dark_data = (load_json(path) for path in uied_json_files)
+            matchpanzoid = match_elements(light_data['compos'], dark_data['compos'], assignment=assignment)
+            consistent_data = create_consistent_json(matchpanzoid, light_data['img_shape'])
+            save_json(consistent_data, output_json_file, pretty_json)
+
+            if uied_image_files['light'] in written or uied_image_files['dark'] in written:
+                light_image, dark_image = images.uied_image('light'), images.uied_image('dark')
+            else:
+                light_image, dark_image = (cv2.imread(path) for path in uied_image_files.values())
+            cv2.imwrite(output_combined_image, draw_gui_detection(light_image, dark_image, consistent_data))
+            written += [output_json_file, output_combined_image]
+
+    # 3. light and dark screenshot side by side
+    if lightdark_dir:
+        output_image_path = os.path.join(lightdark_dir, f"{base_filename}lightdark.png")
+        if is_stale(output_image_path, list(images.paths.values()), force):
+            cv2.imwrite(output_image_path, np.hstack((images.image('light'), images.image('dark'))))
+            written.append(output_image_path)
+
+    return {'file': base_filename, 'written': written, 'skipped': skipped}
+
+
+def try_preprocess_pair(filename, **kwargs):
+    """preprocess_pair that records the error of a pair (corrupt screenshot or json) instead of stopping the run."""
+    try:
+        return preprocess_pair(filename, **kwargs)
+    except Exception as e:
+        print(f"Error processing file {filename}: {e}")
+        return {'file': filename.replace('light.png', ''), 'written': [], 'skipped': [], 'error': str(e)}
+
+
+def preprocess(image_dir, uied_json_dir, uied_image_dir, uied_dl_json_dir, lightdark_dir=None, workers=1,
+               assignment='first', force=False, pretty_json=False):
+    """Preprocess every light/dark pair of image_dir, in a process pool when workers > 1."""
+    for folder in (uied_image_dir, uied_dl_json_dir, lightdark_dir):
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    files = []
+    for filename in sorted(os.listdir(image_dir)):
+        if filename.endswith('light.png'):
+            if os.path.exists(os.path.join(image_dir, filename.replace('light.png', 'dark.png'))):
+                files.append(filename)
+            else:
+                print(f"Dark mode image missing for: {filename}")
+
+    preprocess_one = partial(try_preprocess_pair, image_dir=image_dir, uied_json_dir=uied_json_dir,
+                             uied_image_dir=uied_image_dir, uied_dl_json_dir=uied_dl_json_dir,
+                             lightdark_dir=lightdark_dir, assignment=assignment, force=force,
+                             pretty_json=pretty_json)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(files) > 1 else None
+    pair_results = executor.map(preprocess_one, files) if executor else map(preprocess_one, files)
+
+    written, waiting_for_uied, failed = 0, [], []
+    try:
+        for pair_result in tqdm(pair_results, total=len(files)):
+            written += len(pair_result['written'])
+            if 'error' in pair_result:
+                failed.append(pair_result['file'])
+            if pair_result['skipped']:
+                waiting_for_uied.append(pair_result['file'])
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    print(f"Preprocessed {len(files)} pairs, {written} files written, the others were up to date.")
+    if waiting_for_uied:
+        print(f"{len(waiting_for_uied)} pairs have no UIED detection yet: run the UIED detection on {uied_image_dir}, "
+              f"save it in {uied_json_dir} and run the preprocessing again.")
+    if failed:
+        print(f"{len(failed)} pairs failed, fix their screenshots or json and run the preprocessing again: "
+              f"{', '.join(failed)}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resize the screenshot pairs and combine their UIED detection.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of processes used to preprocess the screenshot pairs (default: 1)")
+    parser.add_argument('--lightdark', action='store_true',
+                        help="also write the light and dark screenshots side by side for easy visualization")
+    parser.add_argument('--assignment', choices=('first', 'optimal'), default='first',
+                        help="how the light and dark UIED components are matched (default: first)")
+    parser.add_argument('--force', action='store_true',
+                        help="write every output again, even when it is newer than its inputs")
+    parser.add_argument('--pretty-json', action='store_true',
+                        help="write the combined UIED json indented for reading, it is compact by default")
+    args = parser.parse_args()
+
+    # image with normal size
+    image_dir = '/chromaeye/example_dataset/edge_based/flashscore/input/image/org_size'
+
+    # uied detection of the uied size images (https://github.com/MulongXie/UIED)
+    uied_json_dir = '/chromaeye/example_dataset/edge_based/flashscore/input/uied'
+
+    # resized images, the size of the uied detection
+    uied_image_dir = '/chromaeye/example_dataset/edge_based/flashscore/input/image/uied_size'
+
+    # combined light and dark mode uied detection
+    uied_dl_json_dir = '/chromaeye/example_dataset/edge_based/flashscore/input/uied_dl_json'
+
+    # light and dark screenshots side by side
+    lightdark_dir = '/chromaeye/example_dataset/edge_based/flashscore/input/image/lightdark'
+
+    preprocess(image_dir, uied_json_dir, uied_image_dir, uied_dl_json_dir, lightdark_dir if args.lightdark else None,
+               args.workers, args.assignment, args.force, args.pretty_json)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,32 +10,44 @@ prerequisites
 import cv2
 import os
 
-# please pass the absolute path
-input_folder = "/chromaeye/example_dataset/edge_based/flashscore/input/image/org_size"
-output_folder = "/chromaeye/example_dataset/edge_based/flashscore/input/image/uied_size"  # Folder to save results
+# (width, height) of the screenshots given to the UIED detection
+UIED_SIZE = (369, 800)
 
-# Create output folder if it doesn't exist
-if not os.path.exists(output_folder):
-    os.makedirs(output_folder)
 
-# Loop through all files in the folder
-for filename in os.listdir(input_folder):
-    if filename.endswith('.jpg') or filename.endswith('.png'):  # Add more extensions if needed
-        # Read the image
-        image_path = os.path.join(input_folder, filename)
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image not found at path:{image_path}")
-        image = cv2.imread(image_path)
+def resize_to_uied(image):
+    return cv2.resize(image, UIED_SIZE)
 
-        resized_image = cv2.resize(image, (369, 800))
 
-        # Save the resized image in the output folder
-        output_path = os.path.join(output_folder, filename)
-        cv2.imwrite(output_path, resized_image)
+def resize_images(input_folder, output_folder):
+    # Create output folder if it doesn't exist
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
 
-        print(f'Resized and saved: {output_path}')
+    # Loop through all files in the folder
+    for filename in os.listdir(input_folder):
+        if filename.endswith('.jpg') or filename.endswith('.png'):  # Add more extensions if needed
+            # Read the image
+            image_path = os.path.join(input_folder, filename)
+            if not os.path.exists(image_path):
+                raise FileNotFoundError(f"Image not found at path:{image_path}")
+            image = cv2.imread(image_path)
 
-print("Resizing complete.")
+            resized_image = resize_to_uied(image)
+
+            # Save the resized image in the output folder
+            output_path = os.path.join(output_folder, filename)
+            cv2.imwrite(output_path, resized_image)
+
+            print(f'Resized and saved: {output_path}')
+
+
+if __name__ == '__main__':
+    # please pass the absolute path
+    input_folder = "/chromaeye/example_dataset/edge_based/flashscore/input/image/org_size"
+    output_folder = "/chromaeye/example_dataset/edge_based/flashscore/input/image/uied_size"  # Folder to save results
+
+    resize_images(input_folder, output_folder)
+    print("Resizing complete.")
 
 '''
 note: 
@@ -1,85 +1,89 @@
 '''
 upstage ocr detection, to detect the text and bounding box area in the application screenshots
 prerequisite
-1. please enter your upstage api key
+1. please enter your upstage api key (or set UPSTAGE_API_KEY)
 2. please pass the pairs of screenshots and output folder
+
+the screenshots are sent concurrently (--workers), within the rate limit of the api key (--rate requests per second),
+failed requests are retried. the results are cached in output_folder/.ocr_cache, a screenshot that was already
+detected is not sent again (ocr_client.py).
+--backend tesseract or rapidocr detects the text offline on this machine instead, same json (ocr_backends.py).
 '''
 
-import requests
-import json
+import argparse
 import cv2
-import numpy as np
 import os
 
-# Set your Upstage API key
-api_key = "please enter your apli key"
-
-# please pass the screenshot to detect the text using upstage ocr
-image_folder = "/chromaeye/example_dataset/edge_based/flashscore/input/image/org_size"
-output_folder = "/chromaeye/example_dataset/edge_based/flashscore/input/ocr"
-
-# Make sure the output folder exists
-if not os.path.exists(output_folder):
-    os.makedirs(output_folder)
-
-# Upstage OCR API endpoint
-url = "https://api.upstage.ai/v1/document-ai/ocr"
-headers = {"Authorization": f"Bearer {api_key}"}
-
-# Get the list of image files in the folder
-image_files = [f for f in os.listdir(image_folder) if f.endswith(('.png', '.jpg', '.jpeg'))]
-
-# Loop through each image file
-for filename in image_files:
-    image_path = os.path.join(image_folder, filename)
-
-    base_filename = os.path.splitext(filename)[0]
-    # Send each image to the OCR API
-    with open(image_path, "rb") as image_file:
-        files = {"document": image_file}
-        response = requests.post(url, headers=headers, files=files)
-
-        # Check if the response was successful
-        if response.status_code == 200:
-            # Parse the JSON response
-            ocr_result = response.json()
-
-            # Save the OCR result to a JSON file
-            json_output_path = os.path.join(output_folder, f"{base_filename}.json")
-            with open(json_output_path, "w") as json_file:
-                json.dump(ocr_result, json_file, indent=4)
-
-            print(f"OCR results for {base_filename} saved to {json_output_path}")
-
-            # Load the original image
-            image = cv2.imread(image_path)
-
-            # Loop through each page and word to get bounding box information
-            for page in ocr_result['pages']:
-                for word in page['words']:
-                    # Get the vertices of the bounding box
-                    vertices = word['boundingBox']['vertices']
-
-                    # Extract the coordinates (x, y) from each vertex
-                    pts = [(v['x'], v['y']) for v in vertices]
-
-                    # Convert list of points to NumPy array
-                    pts = np.array(pts, np.int32)
-                    pts = pts.reshape((-1, 1, 2))
-
-                    # Draw the bounding box (polygon) on the image
-                    cv2.polylines(image, [pts], isClosed=True, color=(0, 255, 0), thickness=2)
-
-            # Save the image with bounding boxes
-            output_image_path = os.path.join(output_folder, f"{base_filename}_with_boxes.png")
-            cv2.imwrite(output_image_path, image)
-
-            print(f"Image with bounding boxes saved as {output_image_path}")
-        else:
-            print(f"Error processing {filename}: {response.status_code} - {response.text}")
-
-
-
-
-
+from chromaeye.chroma_detection.pre_processing.ocr_backends import OCR_BACKENDS
+from chromaeye.chroma_detection.pre_processing.ocr_client import (UPSTAGE_OCR_URL, UpstageOcrClient, decode_image,
+                                                                  draw_word_boxes)
+from chromaeye.chroma_detection.utils.json_io import save_json
 
+# Set your Upstage API key
+api_key = os.environ.get("UPSTAGE_API_KEY", "please enter your apli key")
+
+
+def upstage_ocr(image_folder, output_folder, client, pretty_json=False):
+    # Make sure the output folder exists
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    # Get the list of image files in the folder
+    image_files = [f for f in sorted(os.listdir(image_folder)) if f.endswith(('.png', '.jpg', '.jpeg'))]
+    image_paths = [os.path.join(image_folder, filename) for filename in image_files]
+
+    for image_path, image_bytes, ocr_result, error in client.ocr_files(image_paths):
+        filename = os.path.basename(image_path)
+        base_filename = os.path.splitext(filename)[0]
+        if error is not None:
+            print(f"Error processing {filename}: {error}")
+            continue
+
+        # Save the OCR result to a JSON file
+        json_output_path = os.path.join(output_folder, f"{base_filename}.json")
+        save_json(ocr_result, json_output_path, pretty_json)
+
+        print(f"OCR results for {base_filename} saved to {json_output_path}")
+
+        # Draw the bounding box (polygon) of every word on the image that was sent, without reading it again
+        image = draw_word_boxes(decode_image(image_bytes), ocr_result)
+
+        # Save the image with bounding boxes
+        output_image_path = os.path.join(output_folder, f"{base_filename}_with_boxes.png")
+        cv2.imwrite(output_image_path, image)
+
+        print(f"Image with bounding boxes saved as {output_image_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect the text of the screenshots with the Upstage OCR api.")
+    parser.add_argument('--backend', choices=['upstage'] + sorted(OCR_BACKENDS), default='upstage',
+                        help="upstage api, or a local offline OCR that writes the same json (default: upstage)")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="concurrent requests, or processes of a local backend (default: 4)")
+    parser.add_argument('--rate', type=float, default=None,
+                        help="at most this many requests per second, e.g. the rate limit of your api key "
+                             "(default: no limit)")
+    parser.add_argument('--retries', type=int, default=5,
+                        help="retries of a request that failed with a connection error, 429 or 5xx (default: 5)")
+    parser.add_argument('--no-cache', action='store_true', help="always send the screenshots, do not use the cache")
+    parser.add_argument('--url', default=UPSTAGE_OCR_URL, help="Upstage OCR API endpoint")
+    parser.add_argument('--pretty-json', action='store_true',
+                        help="write the OCR json indented for reading, it is compact by default")
+    args = parser.parse_args()
+
+    # please pass the screenshot to detect the text using upstage ocr
+    image_folder = "/chromaeye/example_dataset/edge_based/flashscore/input/image/org_size"
+    output_folder = "/chromaeye/example_dataset/edge_based/flashscore/input/ocr"
+
+    if args.backend == 'upstage':
+        client = UpstageOcrClient(api_key, args.url, max_workers=args.workers, rate=args.rate,
+                                  max_retries=args.retries,
+                                  cache_dir=None if args.no_cache else os.path.join(output_folder, '.ocr_cache'))
+    else:
+        client = OCR_BACKENDS[args.backend](max_workers=args.workers)
+    upstage_ocr(image_folder, output_folder, client, args.pretty_json)
+
+
+if __name__ == '__main__':
+    main()
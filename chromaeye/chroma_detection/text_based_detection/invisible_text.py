@@ -4,31 +4,24 @@ chromaeye check for the text that are invisible to the dark mode (based on the W
 4.5:1 for normal text and 3:1 for bold and large text)
 '''
 
-import os
 import cv2
 import math
 import numpy as np
-import json
 from typing import List, Dict, Any
-from collections import Counter
 
-
-# Load the JSON file
-def load_json(json_path: str) -> Dict[str, Any]:
-    """Load JSON file."""
-    # code update, november 18
-    # Ticket: I-TI3,
-    if not os.path.exists(json_path):
-        raise FileNotFoundError(f"JSON file not found at path: {json_path}")
-    with open(json_path, 'r') as f:
-        return json.load(f)
+from chromaeye.chroma_detection.utils.artifacts import should_write
+from chromaeye.chroma_detection.utils.color_histogram import box_top_colors, region_top_colors
+from chromaeye.chroma_detection.utils.color_math import contrast_ratio
+from chromaeye.chroma_detection.utils.json_io import save_json
+from chromaeye.chroma_detection.utils.ocr_words import as_ocr_words, load_ocr_words
+from chromaeye.chroma_detection.utils.pair_context import PairContext
+from chromaeye.chroma_detection.utils.region_stats import gray_difference_stats
 
 
 # Function to save information to JSON
-def save_failed_contrast_info_to_json(failed_texts: List[Dict[str, Any]], output_json_path: str):
+def save_failed_contrast_info_to_json(failed_texts: List[Dict[str, Any]], output_json_path: str, pretty=False):
     """Save text elements that fail the contrast ratio check to a JSON file."""
-    with open(output_json_path, 'w') as file:
-        json.dump(failed_texts, file, indent=4)
+    save_json(failed_texts, output_json_path, pretty)
 
 
 # Extract bounding box  from vertices
@@ -46,76 +39,22 @@ def bgr_to_rgb(image):
     image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
     return image_rgb
 
-def get_color_pixel_value(image, text_info):
-    # Get bounding box
-    x_min, y_min, x_max, y_max = extract_bounding_box(text_info)
-
-    # Clamp coordinates within image bounds
-    height, width = image.shape[:2]
-    x_min, y_min = max(0, x_min), max(0, y_min)
-    x_max, y_max = min(width, x_max), min(height, y_max)
-
-    points = np.array([[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]])
+def word_bounding_box(text_info):
+    """(x_min, y_min, x_max, y_max) of an OCR word of the json, a bounding box is returned unchanged."""
+    return extract_bounding_box(text_info) if isinstance(text_info, dict) else tuple(text_info)
 
-    color_pixel_values = []
-    for y in range(y_min, y_max):
-        for x in range(x_min, x_max):
-            if cv2.pointPolygonTest(points, (x, y), False) >= 0:
-                color_pixel_values.append(tuple(image[y, x]))
 
-    # Count the occurrence of each unique color
-    color_counts = Counter(color_pixel_values)
+def get_color_pixel_value(image, text_info):
+    """Most common colors of an OCR word (json word or bounding box)."""
     # Get the most common colors
-    most_common_colors = color_counts.most_common(min(len(color_counts), 20))
+    most_common_colors = region_top_colors(image, word_bounding_box(text_info), num_colors=20)
 
     return most_common_colors
 
 
-def calculate_std_deviation(image, text_info):
-    image_rgb = bgr_to_rgb(image)
-    # Get bounding box coordinates
-    x_min, y_min, x_max, y_max = extract_bounding_box(text_info)
-
-    # Define the bounding box points as a quadrilateral
-    points = np.array([[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]], dtype=np.int32)
-
-    # create a mask for the bounding box region
-    mask = np.zeros(image_rgb.shape[:2], dtype=np.uint8)
-    polygon = np.array(points, dtype=np.int32)
-    cv2.fillPoly(mask, [points.reshape((-1, 1, 2))], 255)
-
-    roi = cv2.bitwise_and(image_rgb, image, mask=mask)
-    roi_pixels = roi[mask == 255].reshape(-1, 3)
-    all_pixels_array = np.array(roi_pixels)
-    std_dev = np.std(all_pixels_array)
-    return std_dev
-
-
-def is_large_text(text_info) -> bool:
-    """Check if the text is large based on the height of the bounding box."""
-    x_min, y_min, x_max, y_max = extract_bounding_box(text_info)
-    text_height = y_max - y_min
-    large_text_threshold = 24  # Threshold for large text (e.g., 18-point or larger)
-    return text_height >= large_text_threshold
-
-
 def get_contrast_ratio(foreground_color, background_color):
     """Calculate contrast ratio between text and background."""
-
-    def relative_luminance(color):
-        color = np.array(color) / 255.0
-        R, G, B = color
-        R = R / 12.92 if R <= 0.04045 else ((R + 0.055) / 1.055) ** 2.4
-        G = G / 12.92 if G <= 0.04045 else ((G + 0.055) / 1.055) ** 2.4
-        B = B / 12.92 if B <= 0.04045 else ((B + 0.055) / 1.055) ** 2.4
-        return 0.2126 * R + 0.7152 * G + 0.0722 * B
-
-    L1 = relative_luminance(foreground_color)
-    L2 = relative_luminance(background_color)
-    if L1 > L2:
-        return (L1 + 0.05) / (L2 + 0.05)
-    else:
-        return (L2 + 0.05) / (L1 + 0.05)
+    return contrast_ratio(foreground_color, background_color)
 
 
 # Convert RGB to HSV and identify color family
@@ -176,11 +115,17 @@ def convert_color_format(bgr_color):
     return color_rgb
 
 
-def compare_light_dark_mode_pixels(light_image, dark_image, text, threshold=15):
+def compare_light_dark_mode_pixels(light_image, dark_image, text, threshold=15, gray_difference=None):
     """
     Compares pixel values of text bounding boxes between light and dark mode images.
+    text: OCR word of the json or its bounding box
+    gray_difference: optional RegionStats of the gray light/dark difference, answers the mean difference in O(1)
     """
-    x1, y1, x2, y2 = extract_bounding_box(text)
+    x1, y1, x2, y2 = word_bounding_box(text)
+
+    if gray_difference is not None:
+        mean_diff = gray_difference.mean((x1, y1, x2, y2))
+        return "text_in_image" if mean_diff < threshold else "normal_text"
 
     # Extract text regions from both images
     light_text_region = light_image[y1:y2, x1:x2]
@@ -209,183 +154,210 @@ def rgb_to_hex(rgb):
 
 
 
-def check_contrast_and_draw_bounding_boxes(light_image, dark_image, light_texts, dark_texts, output_image_path,
-                                           output_json_path):
-    """Check the contrast ratio for both light and dark mode images, draw bounding boxes, and save failing cases."""
+def touches_drawn_box(bbox, drawn_boxes, margin=2):
+    """True when bbox overlaps one of the rectangles already drawn on the screenshot (line width included)."""
+    x_min, y_min, x_max, y_max = bbox
+    return any(x_min <= dx_max + margin and dx_min - margin <= x_max and y_min <= dy_max + margin and dy_min - margin <= y_max
+               for dx_min, dy_min, dx_max, dy_max in drawn_boxes)
+
+
+# failure categories of analyze_text_background_colors_hsl, in the order they are checked
+FAILURE_CATEGORIES = np.array(["Light text on light background", "Dark text on dark background",
+                               "Low saturation - muted colors", "Color contrast issue"])
+
+
+def hsl_failure_categories(text_colors, background_colors):
+    """analyze_text_background_colors_hsl of (n, 3) arrays of RGB colors, with one color conversion per array."""
+    if len(text_colors) == 0:
+        return np.empty(0, dtype=FAILURE_CATEGORIES.dtype)
+
+    def lightness(rgb_colors):
+        # the same 8-bit conversion as rgb_to_hsl
+        pixels = (np.asarray(rgb_colors, dtype=np.float64) / 255.0 * 255).astype(np.uint8).reshape(-1, 1, 3)
+        return cv2.cvtColor(pixels, cv2.COLOR_RGB2HLS)[:, 0, 1]
+
+    text_lightness, background_lightness = lightness(text_colors), lightness(background_colors)
+    light = (text_lightness / 255.0 >= 0.8) & (background_lightness / 255.0 >= 0.8)
+    dark = (text_lightness / 255.0 <= 0.2) & (background_lightness / 255.0 <= 0.2)
+    # the saturation that analyze_text_background_colors_hsl compares is the lightness channel of HLS
+    muted = (text_lightness < 50) & (background_lightness < 50)
+    return np.select([light, dark, muted], FAILURE_CATEGORIES[:3], FAILURE_CATEGORIES[3])
+
+
+def score_words(image, boxes, large_text, num_colors=20):
+    """
+    Contrast of the text of every word box of a screenshot at once, see score_colors.
+    boxes: (n, 4) word boxes clamped to the image (OcrWords.clamped), large_text: (n,) bool (OcrWords.large_text)
+    """
+    return score_colors(*box_top_colors(image, boxes, num_colors), large_text)
+
+
+def score_colors(colors, found, large_text):
+    """
+    Contrast of the text of every word box from the most common colors of the boxes (box_top_colors).
+    Returns a dict of arrays, row i belongs to word i:
+    - background, text: BGR, the most and the second most common color of the box
+    - contrast: ratio of the text on the background, threshold: the WCAG ratio the word needs
+    - candidate: the remaining color farthest from the background, candidate_contrast: its ratio, nan without one
+    - passed: contrast reaches the threshold
+    - failed: contrast below the threshold and candidate_contrast below the chroma threshold
+    - category: failure category of the candidate on the background
+    """
     minimum_contrast_ratio_normal = 4.5  # WCAG minimum contrast ratio for regular text
     minimum_contrast_ratio_large = 3.0  # WCAG minimum contrast ratio for large text
-
     chroma_threshold = 2.9
-    failed_texts = []  # List to store texts that fail the contrast check
-    std_threshold = 20  # Standard deviation threshold
 
-    # Dictionary to store text that passes the contrast in light mode
-    light_mode_pass = {}
+    rows = np.arange(len(colors))
+
+    # a word with fewer than two colors keeps the colors of the word before it, as the per word loop did,
+    # the words before the first one with two colors are not scored, the light loop raised on them and the dark loop
+    # took the colors of the last light word
+    source = np.maximum.accumulate(np.where(found[:, 1], rows, -1)) if len(rows) else rows
+    scored = source >= 0
+    background = colors[np.maximum(source, 0), 0]
+    text = colors[np.maximum(source, 0), 1]
+
+    # the colors are compared in rgb, like convert_color_format
+    contrast = np.where(scored, contrast_ratio(text[:, ::-1], background[:, ::-1]), np.nan)
+    threshold = np.where(large_text, minimum_contrast_ratio_large, minimum_contrast_ratio_normal)
+
+    # squared euclidean distance of the remaining colors to the background, the first farthest color wins
+    remaining = found.copy()
+    remaining[:, :2] = False
+    distance = np.square(colors.astype(np.int32) - background.astype(np.int32)[:, None]).sum(axis=2)
+    candidate = colors[rows, np.where(remaining, distance, -1).argmax(axis=1)]
+    has_candidate = remaining.any(axis=1)
+    candidate_contrast = np.where(has_candidate, contrast_ratio(candidate[:, ::-1], background[:, ::-1]), np.nan)
+
+    return {
+        "background": background,
+        "text": text,
+        "contrast": contrast,
+        "threshold": threshold,
+        "candidate": candidate,
+        "candidate_contrast": candidate_contrast,
+        "passed": scored & (contrast >= threshold),
+        "failed": scored & (contrast < threshold) & has_candidate & (candidate_contrast < chroma_threshold),
+        "category": hsl_failure_categories(candidate[:, ::-1], background[:, ::-1]),
+    }
+
+
+def failed_text_info(mode, text, scores, index, bbox, failure_reason=None):
+    """Json entry of a word that failed the contrast check, scores: score_words of its screenshot."""
+    background_color = convert_color_format(scores["background"][index])
+    new_text_color = convert_color_format(scores["candidate"][index])
+    text_info = {
+        "mode": mode,
+        "text": text,
+        "rgb_text_color": convert_color_format(scores["text"][index]),
+        "rgb_background_color": background_color,
+        "text_color": rgb_to_hex(new_text_color),
+        "background_color": rgb_to_hex(background_color),
+        "contrast_ratio": scores["candidate_contrast"][index],
+    }
+    if failure_reason is not None:
+        text_info["failure_reason"] = failure_reason
+    text_info["failure_category"] = str(scores["category"][index])
+    text_info["bounding_box"] = bbox
+    return text_info
+
+
+def check_contrast_and_draw_bounding_boxes(light_image, dark_image, light_texts, dark_texts, output_image_path,
+                                           output_json_path, gray_difference=None, artifacts='all', pretty_json=False):
+    """
+    Check the contrast ratio for both light and dark mode images, draw bounding boxes, and save failing cases.
+    light_texts, dark_texts: OcrWords (utils/ocr_words.py) or the parsed OCR json
+    """
+    light_words = as_ocr_words(light_texts)
+    dark_words = as_ocr_words(dark_texts)
+
     summary_data = []
     light_failed_text = []
     dark_failed_text = []
 
-    # Light mode contrast check
-    for page in light_texts['pages']:
-        for text in page['words']:
-
-            wcag_threshold = minimum_contrast_ratio_large if is_large_text(text) else minimum_contrast_ratio_normal
-            std = calculate_std_deviation(light_image, text)
-
-            most_common_colors = get_color_pixel_value(light_image, text)
-
-            if len(most_common_colors) >= 2:
-                background_color_bgr = most_common_colors[0][0]
-                text_color_bgr = most_common_colors[1][0]
-
-            remaining_colors = most_common_colors[2:]
-
-            # Ticket: I-TI1 end
-            background_color = convert_color_format(background_color_bgr)
-            text_color = convert_color_format(text_color_bgr)
-            contrast = get_contrast_ratio(text_color, background_color)
-
-            # If contrast fails in light mode
-            if contrast < wcag_threshold:
-
-                # Attempt to adjust text color if needed
-                text_color_candidates = [color[0] for color in remaining_colors]
-                if text_color_candidates:
-                    #  ticket: I- TI-5
-                    background_color_bgr = np.array(background_color_bgr, dtype=np.int32)
-                    text_color_candidates = [np.array(color, dtype=np.int32) for color in text_color_candidates]
-
-                    new_text_color_bgr = max(text_color_candidates,
-                                             key=lambda color: euclidean_distance(background_color_bgr, color))
-                    new_text_color = convert_color_format(new_text_color_bgr)
-                    new_ratio = get_contrast_ratio(new_text_color, background_color)
-
-                    if new_ratio < chroma_threshold:
-                        failure_category = analyze_text_background_colors_hsl(new_text_color, background_color)
-                        compare_pixel = compare_light_dark_mode_pixels(light_image, dark_image, text, threshold=15)
-                        bg_hexcolor = rgb_to_hex(background_color)
-                        text_hexcolor = rgb_to_hex(text_color)
-                        newtext_hexcolor = rgb_to_hex(new_text_color)
-
-                        if compare_pixel == "normal_text":
-                            light_failed_text.append({
-                                "mode": "light",
-                                "text": text['text'],
-                                "rgb_text_color": text_color,
-                                "rgb_background_color": background_color,
-                                "text_color": newtext_hexcolor,
-                                "background_color": bg_hexcolor,
-                                "contrast_ratio": new_ratio,
-                                "failure_category": failure_category,
-                                "bounding_box": extract_bounding_box(text)
-                            })
-                        # Draw bounding box on light image
-                        # x_min, y_min, x_max, y_max = extract_bounding_box(text)
-                        # cv2.rectangle(light_image, (x_min, y_min), (x_max, y_max), (0, 0, 255), 2)
-                        else:
-                            # Save as passed with adjusted color
-                            light_mode_pass[text['text']] = {
-                                "bounding_box": extract_bounding_box(text),
-                                "text_color": new_text_color,
-                                "background_color": background_color,
-                                "contrast_ratio": new_ratio
-                            }
-            else:
-                # If contrast passes in light mode, save the info for later comparison with dark mode
-                light_mode_pass[text['text']] = {
-                    "bounding_box": extract_bounding_box(text),
-                    "text_color": text_color,
-                    "background_color": background_color,
-                    "contrast_ratio": contrast
-                }
+    # mean light/dark difference of every text box from one summed-area table, not from two gray crops per word
+    if gray_difference is None:
+        gray_difference = gray_difference_stats(cv2.cvtColor(light_image, cv2.COLOR_BGR2GRAY),
+                                                cv2.cvtColor(dark_image, cv2.COLOR_BGR2GRAY))
+    drawn_boxes = []
+
+    # Light mode contrast check, all the words of the screenshot at once
+    light_scores = score_words(light_image, light_words.clamped(light_image.shape[1], light_image.shape[0]),
+                               light_words.large_text())
+
+    # the words that pass in light mode, with the contrast they pass with
+    light_pass_contrast = np.where(light_scores["passed"], light_scores["contrast"], light_scores["candidate_contrast"])
+    light_passed = light_scores["passed"].copy()
+    for index in np.flatnonzero(light_scores["failed"]):
+        text_content = light_words.texts[index]
+        bbox = tuple(light_words.box(index))
+        compare_pixel = compare_light_dark_mode_pixels(light_image, dark_image, bbox, threshold=15,
+                                                       gray_difference=gray_difference)
+        if compare_pixel == "normal_text":
+            light_failed_text.append(failed_text_info("light", text_content, light_scores, index, bbox))
+        else:
+            # Save as passed with adjusted color
+            light_passed[index] = True
+
+    # Dictionary of the light mode contrast ratio of the texts that pass, the last word with the same text wins
+    light_mode_pass = {light_words.texts[index]: light_pass_contrast[index] for index in np.flatnonzero(light_passed)}
 
     # Dark mode contrast check
-    for page in dark_texts['pages']:
-        for text in page['words']:
-
-            contrast_threshold = minimum_contrast_ratio_large if is_large_text(text) else minimum_contrast_ratio_normal
-            std = calculate_std_deviation(dark_image, text)
-
-            most_common_colors = get_color_pixel_value(dark_image, text)
-
-            if len(most_common_colors) >= 2:
-                background_color_bgr = most_common_colors[0][0]
-                text_color_bgr = most_common_colors[1][0]
-
-            remaining_colors_bgr = most_common_colors[2:]
-
-            background_color = convert_color_format(background_color_bgr)
-            text_color = convert_color_format(text_color_bgr)
-            contrast = get_contrast_ratio(text_color, background_color)
-
-            # If contrast fails in dark mode
-            if contrast < contrast_threshold:
-
-                # Attempt to adjust text color if needed
-                text_color_candidates = [color[0] for color in remaining_colors_bgr]
-                if text_color_candidates:
-                    #  ticket: I- TI-5
-                    background_color_bgr = np.array(background_color_bgr, dtype=np.int32)
-                    text_color_candidates = [np.array(color, dtype=np.int32) for color in text_color_candidates]
-
-                    new_text_color_bgr = max(text_color_candidates,
-                                             key=lambda color: euclidean_distance(background_color_bgr, color))
-                    new_text_color = convert_color_format(new_text_color_bgr)
-                    new_ratio = get_contrast_ratio(new_text_color, background_color)
-                    text_content = text['text']
-
-                    if new_ratio < chroma_threshold:
-                        failure_category = analyze_text_background_colors_hsl(new_text_color, background_color)
-                        if text_content in light_mode_pass:
-
-                            light_contrast = light_mode_pass[text_content]["contrast_ratio"]
-
-                            if light_contrast >= contrast_threshold:
-                                failure_reason = "text inconsistency"
-                            else:
-                                failure_reason = "contrast ratio issue"
-                        else:
-                            # If the text also fails in light mode, label as "contrast ratio issue"
-                            failure_reason = "contrast ratio issue"
-
-                        compare_pixel = compare_light_dark_mode_pixels(light_image, dark_image, text, threshold=15)
-
-                        bg_hexcolor = rgb_to_hex(background_color)
-                        text_hexcolor = rgb_to_hex(text_color)
-                        newtext_hexcolor = rgb_to_hex(new_text_color)
-
-                        if compare_pixel == "normal_text":
-                            dark_failed_text.append({
-                                "mode": "dark",
-                                "text": text_content,
-                                "rgb_text_color": text_color,
-                                "rgb_background_color": background_color,
-                                "text_color": newtext_hexcolor,
-                                "background_color": bg_hexcolor,
-                                "contrast_ratio": new_ratio,
-                                "failure_reason": failure_reason,
-                                "failure_category": failure_category,
-                                "bounding_box": extract_bounding_box(text)
-                            })
-                            x_min, y_min, x_max, y_max = extract_bounding_box(text)
-                            cv2.rectangle(dark_image, (x_min, y_min), (x_max, y_max), (0, 0, 255), 2)
+    dark_boxes = dark_words.clamped(dark_image.shape[1], dark_image.shape[0])
+    dark_large_text = dark_words.large_text()
+    dark_colors, dark_found = box_top_colors(dark_image, dark_boxes)
+    dark_scores = score_colors(dark_colors, dark_found, dark_large_text)
+    index = -1
+    while True:
+        # the next failing word, the scores of the following words change when a box is drawn
+        following = np.flatnonzero(dark_scores["failed"][index + 1:])
+        if not len(following):
+            break
+        index += 1 + following[0]
+
+        text_content = dark_words.texts[index]
+        if text_content in light_mode_pass and light_mode_pass[text_content] >= dark_scores["threshold"][index]:
+            failure_reason = "text inconsistency"
+        else:
+            # If the text also fails in light mode, label as "contrast ratio issue"
+            failure_reason = "contrast ratio issue"
+
+        # the table is built before any box is drawn, measure on the drawn screenshot near a drawn box
+        bbox = tuple(dark_words.box(index))
+        compare_pixel = compare_light_dark_mode_pixels(
+            light_image, dark_image, bbox, threshold=15,
+            gray_difference=None if touches_drawn_box(bbox, drawn_boxes) else gray_difference)
+
+        if compare_pixel == "normal_text":
+            dark_failed_text.append(failed_text_info("dark", text_content, dark_scores, index, bbox, failure_reason))
+            x_min, y_min, x_max, y_max = bbox
+            cv2.rectangle(dark_image, (x_min, y_min), (x_max, y_max), (0, 0, 255), 2)
+            drawn_boxes.append((x_min, y_min, x_max, y_max))
+
+            # the following words are measured on the screenshot with the box drawn, count the colors of the ones
+            # under the rectangle again
+            margin = 2
+            later = dark_boxes[index + 1:]
+            touched = index + 1 + np.flatnonzero((later[:, 0] <= x_max + margin) & (later[:, 2] >= x_min - margin) &
+                                                 (later[:, 1] <= y_max + margin) & (later[:, 3] >= y_min - margin))
+            if len(touched):
+                dark_colors[touched], dark_found[touched] = box_top_colors(dark_image, dark_boxes[touched])
+                dark_scores = score_colors(dark_colors, dark_found, dark_large_text)
 
     failed_texts = {
         "failed_texts_light": light_failed_text,
         "failed_texts_dark": dark_failed_text
     }
 
-    combined_image = np.hstack((light_image, dark_image))
-    cv2.imwrite(output_image_path, combined_image)
+    # Combine images for visualization and save, once, as the artifacts policy says
+    if should_write(artifacts, dark_failed_text):
+        combined_image = np.hstack((light_image, dark_image))
+        cv2.imwrite(output_image_path, combined_image)
 
     # added if condition to save the information when there exist the invisible text in dark mode otherwise don't save the result
     if dark_failed_text:
         # Save all failed contrast information to JSON
-        save_failed_contrast_info_to_json(failed_texts, output_json_path)
-
-        # Combine images for visualization and save
-        combined_image = np.hstack((light_image, dark_image))
-        cv2.imwrite(output_image_path, combined_image)
+        save_failed_contrast_info_to_json(failed_texts, output_json_path, pretty_json)
 
         if light_failed_text or dark_failed_text:
             summary_data.append({
@@ -423,34 +395,29 @@ def check_contrast_and_draw_bounding_boxes(light_image, dark_image, light_texts,
     return summary_data
 
 
-def load_image(image_path):
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image not found at path: {image_path}")
-    image = cv2.imread(image_path)
-    if image is None:
-        raise FileNotFoundError(f"Failed to load image at path: {image_path}")
-    return image
-
-
 def invisible_text_inconsistency(light_image_path: str, dark_image_path: str, light_json_path: str, dark_json_path: str,
-                                 output_image_path: str, output_json_path: str):
-    """Check contrast for both light and dark mode, draw bounding boxes, and save failing cases."""
-
-    light_img = load_image(light_image_path)
-    dark_img = load_image(dark_image_path)
+                                 output_image_path: str, output_json_path: str, context=None, artifacts='all',
+                                 light_words=None, dark_words=None, pretty_json=False):
+    """
+    Check contrast for both light and dark mode, draw bounding boxes, and save failing cases.
+    light_words, dark_words: OcrWords of the json files when the caller already loaded them
+    """
 
-    if light_img is None or dark_img is None:
-        print(f"Error: Image not found or cannot be read at specified paths.")
-        return
+    if context is None:
+        context = PairContext(light_image_path, dark_image_path)
 
-    if light_img.shape[:2] != dark_img.shape[:2]:
-        # Resize dark image to match the light image dimensions
-        dark_img = cv2.resize(dark_img, (light_img.shape[1], light_img.shape[0]))
+    # the bounding boxes are drawn on the dark screenshot, keep the shared one untouched
+    light_img = context.light
+    dark_img = context.dark.copy()
 
-    # Load JSON data
-    light_json_data = load_json(light_json_path)
-    dark_json_data = load_json(dark_json_path)
+    # Load the OCR words
+    if light_words is None:
+        light_words = load_ocr_words(light_json_path)
+    if dark_words is None:
+        dark_words = load_ocr_words(dark_json_path)
 
-    summary_data = check_contrast_and_draw_bounding_boxes(light_img, dark_img, light_json_data, dark_json_data,
-                                                          output_image_path, output_json_path)
-    return summary_data
\ No newline at end of file
+    summary_data = check_contrast_and_draw_bounding_boxes(light_img, dark_img, light_words, dark_words,
+                                                          output_image_path, output_json_path,
+                                                          gray_difference=context.gray_difference,
+                                                          artifacts=artifacts, pretty_json=pretty_json)
+    return summary_data
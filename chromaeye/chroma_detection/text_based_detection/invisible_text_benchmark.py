@@ -0,0 +1,102 @@
+'''
+chromaeye: invisible text benchmark
+time the contrast scoring of the invisible text detection on the OCR words of a dataset, in words per second:
+- per word: the colors, contrast ratio, candidate text color and failure category of one word after the other,
+  as check_contrast_and_draw_bounding_boxes did before score_words
+- batch: score_words, all the words of a screenshot at once
+
+prerequisite
+please pass the dataset folder, every input/ocr json below it with its screenshot in input/image/org_size is used
+'''
+
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from chromaeye.chroma_detection.text_based_detection.invisible_text import (analyze_text_background_colors_hsl,
+                                                                            convert_color_format,
+                                                                            euclidean_distance,
+                                                                            get_color_pixel_value,
+                                                                            get_contrast_ratio, score_words)
+from chromaeye.chroma_detection.utils.ocr_words import load_ocr_words
+
+
+def ocr_pages(dataset_dir):
+    """[(screenshot, OcrWords), ...] of every OCR json of the dataset with a screenshot."""
+    pages = []
+    for json_path in sorted(glob.glob(os.path.join(dataset_dir, '**', 'input', 'ocr', '*.json'), recursive=True)):
+        base_name = os.path.splitext(os.path.basename(json_path))[0]
+        image_path = os.path.join(os.path.dirname(os.path.dirname(json_path)), 'image', 'org_size',
+                                  base_name + '.png')
+        if os.path.exists(image_path):
+            pages.append((cv2.imread(image_path), load_ocr_words(json_path)))
+    return pages
+
+
+def score_words_one_by_one(image, words):
+    """Contrast ratio and candidate of every word with the per word helpers."""
+    large_text = words.large_text()
+    scores = []
+    for index in range(len(words)):
+        most_common_colors = get_color_pixel_value(image, tuple(words.box(index)))
+        if len(most_common_colors) < 2:
+            scores.append(None)
+            continue
+        background_color_bgr = np.array(most_common_colors[0][0], dtype=np.int32)
+        background_color = convert_color_format(background_color_bgr)
+        contrast = get_contrast_ratio(convert_color_format(most_common_colors[1][0]), background_color)
+        threshold = 3.0 if large_text[index] else 4.5
+        candidates = [np.array(color, dtype=np.int32) for color, _ in most_common_colors[2:]]
+        if contrast >= threshold or not candidates:
+            scores.append((contrast, None, None))
+            continue
+        new_text_color = convert_color_format(
+            max(candidates, key=lambda color: euclidean_distance(background_color_bgr, color)))
+        scores.append((contrast, get_contrast_ratio(new_text_color, background_color),
+                       analyze_text_background_colors_hsl(new_text_color, background_color)))
+    return scores
+
+
+def best_time(function, repeat):
+    """Fastest of repeat runs in seconds, the others are slowed down by the rest of the machine."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def invisible_text_benchmark(dataset_dir, repeat=3):
+    pages = ocr_pages(dataset_dir)
+    word_count = sum(len(words) for _, words in pages)
+    print(f"{len(pages)} screenshots, {word_count} words")
+
+    def report(name, seconds):
+        print(f"  {name:<12} {seconds * 1000:8.1f} ms  {word_count / seconds:9.0f} words/s")
+
+    per_word = best_time(lambda: [score_words_one_by_one(image, words) for image, words in pages], repeat)
+    report('per word', per_word)
+    batch = best_time(lambda: [score_words(image, words.clamped(image.shape[1], image.shape[0]), words.large_text())
+                               for image, words in pages], repeat)
+    report('batch', batch)
+    print(f"  speedup {per_word / batch:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the contrast scoring of the invisible text detection.")
+    parser.add_argument('--repeat', type=int, default=3, help="runs of each measurement, the fastest counts")
+    args = parser.parse_args()
+
+    # dataset with the screenshots and their OCR json files
+    dataset_dir = '/chromaeye/example_dataset'
+
+    invisible_text_benchmark(dataset_dir, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,19 +5,20 @@ that the text are actually missing in the dark mode.
 '''
 
 import cv2
-import json
 import re
 import numpy as np
 
 from typing import List, Dict, Any
-from fuzzywuzzy import fuzz
-from collections import Counter
-
-def load_json(json_path: str) -> Dict[str, Any]:
-    """Load JSON file."""
-    with open(json_path, 'r') as f:
-        return json.load(f)
 
+from chromaeye.chroma_detection.utils.artifacts import save_side_by_side, should_write
+from chromaeye.chroma_detection.utils.box_index import BoxGrid
+from chromaeye.chroma_detection.utils.color_histogram import region_top_colors
+from chromaeye.chroma_detection.utils.color_math import contrast_ratio
+from chromaeye.chroma_detection.utils.json_io import save_json
+from chromaeye.chroma_detection.utils.ocr_words import as_ocr_words, load_ocr_words
+from chromaeye.chroma_detection.utils.pair_context import PairContext
+from chromaeye.chroma_detection.utils.region_stats import gray_difference_stats
+from chromaeye.chroma_detection.utils.text_similarity import DEFAULT_SIMILARITY_BACKEND, similarity_scores
 
 def normalize_text(text: str) -> str:
     """Normalize text by converting to lowercase and removing extra spaces."""
@@ -39,39 +40,43 @@ def calculate_center_distance(box1, box2):
     return np.sqrt((center_x1 - center_x2) ** 2 + (center_y1 - center_y2) ** 2)
 
 
-def get_bounding_box_vertices(bbox):
-    """Convert bounding box vertices into (x1, y1, x2, y2)."""
-    x_coords = [v['x'] for v in bbox]
-    y_coords = [v['y'] for v in bbox]
-    return [min(x_coords), min(y_coords), max(x_coords), max(y_coords)]
+def search_region(box, center_distance):
+    """Region holding every box that overlaps box or whose center lies within center_distance of its center."""
+    center_x, center_y = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+    return (min(box[0], center_x - center_distance), min(box[1], center_y - center_distance),
+            max(box[2], center_x + center_distance), max(box[3], center_y + center_distance))
 
 
-def is_similar(text1: str, text2: str, threshold: int = 85) -> bool:
+def is_similar(text1: str, text2: str, threshold: int = 85, backend: str = DEFAULT_SIMILARITY_BACKEND) -> bool:
     """Check similarity using fuzzy matching."""
-    return fuzz.ratio(text1, text2) >= threshold
+    return similarity_scores(text1, [text2], backend)[0] >= threshold
+
+
+def word_element(words, index) -> Dict[str, Any]:
+    """Text and bounding box of one word, as written to the missing text json."""
+    return {
+        "tex_info": words.texts[index],
+        "bounding_box": words.box(index),
+    }
 
 
-def extract_text_structure(data: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Extracts the text and bounding box information for each word from the JSON data."""
-    words_info = []
-    for page in data["pages"]:
-        for word in page["words"]:
-            text_content =(word['text'])
-            bounding_box = get_bounding_box_vertices(word['boundingBox']['vertices'])
-            words_info.append({
-                "tex_info": text_content,
-                "bounding_box": bounding_box,
-            })
-    return words_info
+def is_checked_word(text: str) -> bool:
+    """Single letters, spaces, commas or symbols are not checked."""
+    return not (len(text.strip()) <= 2 or text in {',', '.', '!', '?', '-', '_', ':', ' '})
 
 
 
-def compare_light_dark_mode_pixels(light_image, dark_image, bbox, threshold=15):
+def compare_light_dark_mode_pixels(light_image, dark_image, bbox, threshold=15, gray_difference=None):
     """
     Compares pixel values of text bounding boxes between light and dark mode images.
+    gray_difference: optional RegionStats of the gray light/dark difference, answers the mean difference in O(1)
     """
     x1, y1, x2, y2 = bbox
 
+    if gray_difference is not None:
+        mean_diff = gray_difference.mean(bbox)
+        return "text_in_image" if mean_diff < threshold else "normal_text"
+
     # Extract text regions from both images
     light_text_region = light_image[y1:y2, x1:x2]
     dark_text_region = dark_image[y1:y2, x1:x2]
@@ -92,45 +97,17 @@ def compare_light_dark_mode_pixels(light_image, dark_image, bbox, threshold=15):
 
 
 def get_color_pixel_value(image, text_info):
-    x_min, y_min, x_max, y_max = text_info['bounding_box']
-
-    # Clamp coordinates within image bounds
-    height, width = image.shape[:2]
-    x_min, y_min = max(0, x_min), max(0, y_min)
-    x_max, y_max = min(width, x_max), min(height, y_max)
-
-    points = np.array([[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]])
-
-    color_pixel_values = []
-    for y in range(y_min, y_max):
-        for x in range(x_min, x_max):
-            if cv2.pointPolygonTest(points, (x, y), False) >= 0:
-                color_pixel_values.append(tuple(image[y, x]))
-
-    # Count the occurrence of each unique color
-    color_counts = Counter(color_pixel_values)
-    # Get the most common colors
-    most_common_colors = color_counts.most_common(min(len(color_counts), 20))
+    """Most common colors of a text element ({"bounding_box": ...}) or of a bounding box."""
+    bbox = text_info['bounding_box'] if isinstance(text_info, dict) else text_info
+    # Get the most common colors inside the bounding box
+    most_common_colors = region_top_colors(image, bbox, num_colors=20)
 
     return most_common_colors
 
 
 def get_contrast_ratio(foreground_color, background_color):
     """Calculate contrast ratio between text and background."""
-    def relative_luminance(color):
-        color = np.array(color) / 255.0
-        R, G, B = color
-        R = R / 12.92 if R <= 0.04045 else ((R + 0.055) / 1.055) ** 2.4
-        G = G / 12.92 if G <= 0.04045 else ((G + 0.055) / 1.055) ** 2.4
-        B = B / 12.92 if B <= 0.04045 else ((B + 0.055) / 1.055) ** 2.4
-        return 0.2126 * R + 0.7152 * G + 0.0722 * B
-
-    L1 = relative_luminance(foreground_color)
-    L2 = relative_luminance(background_color)
-    if L1 > L2:
-        return (L1 + 0.05) / (L2 + 0.05)
-    else:
-        return (L2 + 0.05) / (L1 + 0.05)
+    return contrast_ratio(foreground_color, background_color)
 
 
 def extract_edges(image, bbox, low=10, high=55):
@@ -174,14 +151,33 @@ def edge_similarity(light_edges, dark_edges):
 
 
 
-def find_missing_texts(light_texts: List[Dict[str, Any]], dark_texts: List[Dict[str, Any]], light_image, dark_image) -> List[Dict[str, Any]]:
+def find_missing_texts(light_texts, dark_texts, light_image, dark_image,
+                       gray_difference=None, similarity_backend=DEFAULT_SIMILARITY_BACKEND,
+                       use_grid=True) -> List[Dict[str, Any]]:
     """
     Find texts in light mode that are missing or mismatched in dark mode based on IoU and occurrences.
+    light_texts, dark_texts: OcrWords (utils/ocr_words.py) or the parsed OCR json
+    similarity_backend: name of the text similarity backend, see utils/text_similarity.py
+    use_grid: False compares every light word with every dark word, the scan the grid replaced, same result
+    (missing_text_benchmark.py compares them)
     """
+    light_words = as_ocr_words(light_texts)
+    dark_words = as_ocr_words(dark_texts)
+
+    # mean light/dark difference of every text box from one summed-area table, not from two gray crops per word
+    if gray_difference is None:
+        gray_difference = gray_difference_stats(cv2.cvtColor(light_image, cv2.COLOR_BGR2GRAY),
+                                                cv2.cvtColor(dark_image, cv2.COLOR_BGR2GRAY))
+
     fuzz_threshold = 75  # Fixed: was incorrectly defined as a tuple
     spatial_threshold = 0.5  # Fractional overlap threshold
     max_distance_ratio = 0.3
     minimum_threshold = 1.5
+    center_distance_threshold = 30
+
+    # only the dark words near a light word can match it, look them up in a grid instead of scanning the page
+    dark_grid = BoxGrid(dark_words.boxes.tolist())
+    dark_word_texts = dark_words.texts
 
     missing_texts = []
     unmatched_dark_texts = []
@@ -189,30 +185,36 @@ def find_missing_texts(light_texts: List[Dict[str, Any]], dark_texts: List[Dict[
     match_dark_indices = set()
     match_light_indices = set()
 
-    for i,light_element in enumerate(light_texts):
+    # Skip single letters, spaces, commas, or symbols
+    checked_words = [i for i, text in enumerate(light_words.texts) if is_checked_word(text)]
+    light_boxes = light_words.boxes[checked_words].tolist()
+    light_areas = ((light_words.boxes[checked_words, 2] - light_words.boxes[checked_words, 0]) *
+                   (light_words.boxes[checked_words, 3] - light_words.boxes[checked_words, 1])).tolist()
+
+    for i, bbox, light_area in zip(checked_words, light_boxes, light_areas):
 
         EDGE_SIMILARITY_THRESHOLD = 0.3
 
-        # print('all',light_element['content'])
-        bbox = light_element['bounding_box']
-        # Skip single letters, spaces, commas, or symbols
-        if len(light_element['tex_info'].strip()) <= 2 or light_element['tex_info'] in {',', '.', '!', '?', '-', '_', ':' ,' '}:
-            continue
+        light_text = light_words.texts[i]
         text_found = False
-        compare_pixel = compare_light_dark_mode_pixels(light_image, dark_image, bbox, threshold=15)
+        compare_pixel = compare_light_dark_mode_pixels(light_image, dark_image, bbox, threshold=15,
+                                                       gray_difference=gray_difference)
 
         if compare_pixel == "normal_text":
-            for j,dark_element in enumerate(dark_texts):
-                # Check text similarity
-                if is_similar(light_element['tex_info'], dark_element['tex_info'], fuzz_threshold):
+            if use_grid:
+                candidates = dark_grid.query(search_region(bbox, center_distance_threshold))
+            else:
+                candidates = range(len(dark_words))
+            # Check text similarity, the light word against all its candidates in one call
+            scores = similarity_scores(light_text, [dark_word_texts[j] for j in candidates], similarity_backend)
+            for j, score in zip(candidates, scores):
+                if score >= fuzz_threshold:
                     # Check spatial overlap
-                    light_bbox = light_element['bounding_box']
-                    dark_bbox = dark_element['bounding_box']
-                    overlap_area = calculate_overlap(light_bbox, dark_bbox)
-                    light_area = (light_bbox[2] - light_bbox[0]) * (light_bbox[3] - light_bbox[1])
-                    center_distance = calculate_center_distance(light_bbox, dark_bbox)
+                    dark_bbox = dark_words.box(j)
+                    overlap_area = calculate_overlap(bbox, dark_bbox)
+                    center_distance = calculate_center_distance(bbox, dark_bbox)
 
-                    if (overlap_area / light_area > spatial_threshold) or (center_distance < 30):
+                    if (overlap_area / light_area > spatial_threshold) or (center_distance < center_distance_threshold):
                         text_found = True
                         # print(dark_element)
                         match_light_indices.add(i)
@@ -226,10 +228,10 @@ def find_missing_texts(light_texts: List[Dict[str, Any]], dark_texts: List[Dict[
             if not text_found:
                 # print(light_element)
                 # Extract color values from the dark mode image bounding box
-                color_values = get_color_pixel_value(dark_image, light_element)
+                color_values = get_color_pixel_value(dark_image, bbox)
 
                 if len(color_values) < 2:
-                    missing_texts.append(light_element)  # Add if we can't determine contrast properly
+                    missing_texts.append(word_element(light_words, i))  # Add if we can't determine contrast properly
                     continue
 
                 # Assign background & text colors (most frequent = background, second most = text)
@@ -246,7 +248,7 @@ def find_missing_texts(light_texts: List[Dict[str, Any]], dark_texts: List[Dict[
                     edge_sim = edge_similarity(light_edges, dark_edges)
 
                     if edge_sim < EDGE_SIMILARITY_THRESHOLD:
-                        missing_texts.append(light_element)
+                        missing_texts.append(word_element(light_words, i))
 
                 # print(contrast_ratio)
                 # Only add to missing texts if contrast is too low
@@ -256,46 +258,44 @@ def find_missing_texts(light_texts: List[Dict[str, Any]], dark_texts: List[Dict[
     return missing_texts
 
 
-def save_missing_info_to_json(missing_elements: List[Dict[str, Any]], output_json_path: str):
+def save_missing_info_to_json(missing_elements: List[Dict[str, Any]], output_json_path: str, pretty=False):
     """Save missing information to a JSON file."""
-    with open(output_json_path, 'w') as file:
-        json.dump(missing_elements, file, indent=4)
+    save_json(missing_elements, output_json_path, pretty)
 
 
 def missing_text(light_image_path: str, dark_image_path: str, light_json_path: str, dark_json_path: str,
-                 output_image_path: str, output_json_path: str):
-
-    """Visualize the side-by-side comparison and highlight missing areas."""
-    light_img = cv2.imread(light_image_path)
-    dark_img = cv2.imread(dark_image_path)
-    summary_data = []
-
-    if light_img is None or dark_img is None:
-        print("Error: Could not load images.")
-        return
+                 output_image_path: str, output_json_path: str, context=None,
+                 similarity_backend=DEFAULT_SIMILARITY_BACKEND, artifacts='all', light_words=None, dark_words=None,
+                 pretty_json=False):
 
-    if light_img.shape[:2] != dark_img.shape[:2]:
-        dark_img = cv2.resize(dark_img, (light_img.shape[1], light_img.shape[0]))
+    """
+    Visualize the side-by-side comparison and highlight missing areas.
+    light_words, dark_words: OcrWords of the json files when the caller already loaded them
+    """
+    if context is None:
+        context = PairContext(light_image_path, dark_image_path)
 
-    light_json = load_json(light_json_path)
-    dark_json = load_json(dark_json_path)
+    light_img = context.light
+    dark_img = context.dark
+    summary_data = []
 
-    light_texts = extract_text_structure(light_json)
-    dark_texts = extract_text_structure(dark_json)
+    if light_words is None:
+        light_words = load_ocr_words(light_json_path)
+    if dark_words is None:
+        dark_words = load_ocr_words(dark_json_path)
 
-    missing_texts = find_missing_texts(light_texts, dark_texts, light_img, dark_img)
+    missing_texts = find_missing_texts(light_words, dark_words, light_img, dark_img,
+                                       gray_difference=context.gray_difference,
+                                       similarity_backend=similarity_backend)
     len_missing_text = len(missing_texts)
 
     if len_missing_text > 0:
 
-        for elem in missing_texts:
-            bbox = elem['bounding_box']
-            cv2.rectangle(dark_img, (bbox[0], bbox[1]), (bbox[2], bbox[3]), (0, 0, 255), 2)
-
-        combined_image = np.hstack((light_img, dark_img))
+        # the missing texts are drawn on a copy of the dark screenshot
+        if should_write(artifacts, missing_texts):
+            save_side_by_side(light_img, dark_img, [elem['bounding_box'] for elem in missing_texts], output_image_path)
 
-        cv2.imwrite(output_image_path, combined_image)
-        save_missing_info_to_json(missing_texts, output_json_path)
+        save_missing_info_to_json(missing_texts, output_json_path, pretty_json)
         print('missing_texts', missing_texts)
 
         summary_data = {
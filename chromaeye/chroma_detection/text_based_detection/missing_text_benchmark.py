@@ -0,0 +1,87 @@
+'''
+chromaeye: missing text benchmark
+time find_missing_texts on the screenshot pairs of a dataset with the dark word candidates looked up in the grid
+(utils/box_index.py) and with the scan of every dark word it replaced, O(light words x dark words) similarity
+scores, and check that both find the same missing texts.
+--copies adds shifted copies of the dark words, a denser page with more candidates to scan.
+
+prerequisite
+please pass the dataset folder, every *_light.json / *_dark.json pair in an input/ocr folder below it with its
+screenshots in input/image/org_size is used
+'''
+
+import argparse
+import glob
+import os
+
+import numpy as np
+
+from chromaeye.chroma_detection.text_based_detection.invisible_text_benchmark import best_time
+from chromaeye.chroma_detection.text_based_detection.missing_text import find_missing_texts
+from chromaeye.chroma_detection.utils.ocr_words import OcrWords, load_ocr_words
+from chromaeye.chroma_detection.utils.pair_context import PairContext
+
+
+def missing_text_pairs(dataset_dir):
+    """[(PairContext, light OcrWords, dark OcrWords), ...] of every OCR json pair of the dataset."""
+    pairs = []
+    for light_json in sorted(glob.glob(os.path.join(dataset_dir, '**', 'input', 'ocr', '*_light.json'),
+                                       recursive=True)):
+        dark_json = light_json[:-len('_light.json')] + '_dark.json'
+        image_dir = os.path.join(os.path.dirname(os.path.dirname(light_json)), 'image', 'org_size')
+        base_name = os.path.basename(light_json)[:-len('.json')]
+        light_image = os.path.join(image_dir, base_name + '.png')
+        dark_image = os.path.join(image_dir, base_name[:-len('_light')] + '_dark.png')
+        if os.path.exists(dark_json) and os.path.exists(light_image) and os.path.exists(dark_image):
+            pairs.append((PairContext(light_image, dark_image), load_ocr_words(light_json), load_ocr_words(dark_json)))
+    return pairs
+
+
+def with_copies(words, copies):
+    """The words and copies - 1 copies of them shifted right and down by a few pixels."""
+    offsets = [(0, 0)] + [(3 * copy, 2 * copy) for copy in range(1, copies)]
+    boxes = np.concatenate([words.boxes + np.array([dx, dy, dx, dy], dtype=np.int32) for dx, dy in offsets])
+    texts = [text.encode('utf-8') for text in words.texts] * copies
+    text_offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum([len(text) for text in texts], out=text_offsets[1:])
+    return OcrWords(boxes, np.frombuffer(b''.join(texts), dtype=np.uint8), text_offsets,
+                    np.tile(words.confidence, copies), np.array([0, len(texts)], dtype=np.int64))
+
+
+def missing_text_benchmark(dataset_dir, repeat=3, copies=1):
+    pairs = [(context, light_words, with_copies(dark_words, copies))
+             for context, light_words, dark_words in missing_text_pairs(dataset_dir)]
+    light_count = sum(len(light_words) for _, light_words, _ in pairs)
+    dark_count = sum(len(dark_words) for _, _, dark_words in pairs)
+    print(f"{len(pairs)} screenshot pairs, {light_count} light words, {dark_count} dark words")
+
+    def run(use_grid):
+        return [find_missing_texts(light_words, dark_words, context.light, context.dark,
+                                   gray_difference=context.gray_difference, use_grid=use_grid)
+                for context, light_words, dark_words in pairs]
+
+    missing = {use_grid: run(use_grid) for use_grid in (False, True)}
+    assert missing[True] == missing[False], "the grid and the scan found different missing texts"
+    print(f"  same missing texts: {sum(len(texts) for texts in missing[True])}")
+
+    scan = best_time(lambda: run(False), repeat)
+    grid = best_time(lambda: run(True), repeat)
+    print(f"  scan {scan * 1000:8.1f} ms")
+    print(f"  grid {grid * 1000:8.1f} ms")
+    print(f"  speedup {scan / grid:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the dark word lookup of the missing text detection.")
+    parser.add_argument('--repeat', type=int, default=3, help="runs of each measurement, the fastest counts")
+    parser.add_argument('--copies', type=int, default=1, help="shifted copies of the dark words, a denser page")
+    args = parser.parse_args()
+
+    # missing text dataset with the screenshots and their OCR json files
+    dataset_dir = '/chromaeye/example_dataset/text_based/missing_text'
+
+    missing_text_benchmark(dataset_dir, args.repeat, args.copies)
+
+
+if __name__ == '__main__':
+    main()
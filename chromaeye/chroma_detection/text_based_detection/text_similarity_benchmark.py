@@ -0,0 +1,82 @@
+'''
+chromaeye: text similarity benchmark
+time the fuzzy matching of the light words against the dark words of every OCR json pair of a dataset:
+- pair by pair: fuzz.ratio of one light word and one dark word at a time, as missing_text.is_similar did before
+  utils/text_similarity.py
+- batched: similarity_scores of one light word against all the dark words, with every backend
+and count the light/dark word pairs on which a backend disagrees with fuzz.ratio at the threshold of the missing text
+detection.
+
+prerequisite
+please pass the dataset folder, every *_light.json / *_dark.json pair in an input/ocr folder below it is used
+'''
+
+import argparse
+import glob
+import os
+
+from chromaeye.chroma_detection.text_based_detection.invisible_text_benchmark import best_time
+from chromaeye.chroma_detection.text_based_detection.missing_text import is_checked_word
+from chromaeye.chroma_detection.utils.ocr_words import load_ocr_words
+from chromaeye.chroma_detection.utils.text_similarity import SIMILARITY_BACKENDS, similarity_scores
+
+# fuzz_threshold of find_missing_texts
+FUZZ_THRESHOLD = 75
+
+
+def ocr_text_pairs(dataset_dir):
+    """[(checked light word texts, dark word texts), ...] of every OCR json pair of the dataset."""
+    pairs = []
+    for light_json in sorted(glob.glob(os.path.join(dataset_dir, '**', 'input', 'ocr', '*_light.json'),
+                                       recursive=True)):
+        dark_json = light_json[:-len('_light.json')] + '_dark.json'
+        if os.path.exists(dark_json):
+            light_texts = [text for text in load_ocr_words(light_json).texts if is_checked_word(text)]
+            pairs.append((light_texts, load_ocr_words(dark_json).texts))
+    return pairs
+
+
+def pair_by_pair(pairs):
+    from fuzzywuzzy import fuzz
+    return [[[fuzz.ratio(light_text, dark_text) for dark_text in dark_texts] for light_text in light_texts]
+            for light_texts, dark_texts in pairs]
+
+
+def batched(pairs, backend):
+    return [[similarity_scores(light_text, dark_texts, backend).tolist() for light_text in light_texts]
+            for light_texts, dark_texts in pairs]
+
+
+def text_similarity_benchmark(dataset_dir, repeat=3):
+    pairs = ocr_text_pairs(dataset_dir)
+    comparisons = sum(len(light_texts) * len(dark_texts) for light_texts, dark_texts in pairs)
+    print(f"{len(pairs)} OCR json pairs, {comparisons} light/dark word comparisons")
+
+    def report(name, seconds):
+        print(f"  {name:<20} {seconds * 1000:8.1f} ms  {comparisons / seconds:10.0f} comparisons/s")
+
+    expected = pair_by_pair(pairs)
+    report('pair by pair', best_time(lambda: pair_by_pair(pairs), repeat))
+    for backend in sorted(SIMILARITY_BACKENDS):
+        scores = batched(pairs, backend)
+        disagreements = sum((score >= FUZZ_THRESHOLD) != (expected_score >= FUZZ_THRESHOLD)
+                            for page, expected_page in zip(scores, expected)
+                            for row, expected_row in zip(page, expected_page)
+                            for score, expected_score in zip(row, expected_row))
+        report(f'batched {backend}', best_time(lambda: batched(pairs, backend), repeat))
+        print(f"    {disagreements} comparisons decided differently from fuzz.ratio at {FUZZ_THRESHOLD}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the fuzzy matching of the OCR words of the light and dark mode.")
+    parser.add_argument('--repeat', type=int, default=3, help="runs of each measurement, the fastest counts")
+    args = parser.parse_args()
+
+    # dataset with the OCR json files
+    dataset_dir = '/chromaeye/example_dataset'
+
+    text_similarity_benchmark(dataset_dir, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+'''
+chromaeye: artifacts
+decide which visualization images the detectors write, and draw them again later from the detection result.
+
+encoding full-resolution PNGs is a large part of the detection time. artifacts policy:
+- all: every visualization, as before (default)
+- failures-only: only the visualizations of a pair with a detected inconsistency
+- none: no visualization, the json results keep the boxes, chroma_eye.py --render draws them on demand
+'''
+
+import cv2
+import numpy as np
+
+ARTIFACT_POLICIES = ('all', 'failures-only', 'none')
+
+
+def should_write(artifacts, failed):
+    """True when the artifacts policy keeps the visualization of a result, failed: an inconsistency was detected."""
+    if artifacts not in ARTIFACT_POLICIES:
+        raise ValueError(f"Unknown artifacts policy {artifacts}, expected one of {ARTIFACT_POLICIES}")
+    return artifacts == 'all' or (artifacts == 'failures-only' and bool(failed))
+
+
+def draw_boxes(image, boxes, color=(0, 0, 255), thickness=2):
+    """Return a copy of the image with a rectangle around every (x_min, y_min, x_max, y_max) box."""
+    image = image.copy()
+    for x_min, y_min, x_max, y_max in boxes:
+        cv2.rectangle(image, (x_min, y_min), (x_max, y_max), color, thickness)
+    return image
+
+
+def save_side_by_side(light_image, dark_image, dark_boxes, output_image_path):
+    """Write the light screenshot next to the dark screenshot with the failed boxes drawn on the dark one."""
+    cv2.imwrite(output_image_path, np.hstack((light_image, draw_boxes(dark_image, dark_boxes))))
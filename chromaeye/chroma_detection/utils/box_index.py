@@ -0,0 +1,39 @@
+'''
+chromaeye: box index
+find the boxes that lie near a region without comparing the region against every box of the page.
+
+each box is put into every cell of a uniform grid that it covers. a query only looks at the cells that the query
+region covers, then keeps the boxes that really intersect the region.
+'''
+
+from collections import defaultdict
+
+
+class BoxGrid:
+    """Uniform grid over (x1, y1, x2, y2) boxes, the query returns the indices of the boxes touching a region."""
+
+    def __init__(self, boxes, cell_size=64):
+        # corners in any order, a box always covers its center
+        self.boxes = [(min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)) for x1, y1, x2, y2 in boxes]
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+        for index, box in enumerate(self.boxes):
+            for cell in self.covered_cells(box):
+                self.cells[cell].append(index)
+
+    def covered_cells(self, box):
+        x1, y1, x2, y2 = box
+        for cell_x in range(int(x1 // self.cell_size), int(x2 // self.cell_size) + 1):
+            for cell_y in range(int(y1 // self.cell_size), int(y2 // self.cell_size) + 1):
+                yield cell_x, cell_y
+
+    def query(self, region):
+        """Sorted indices of the boxes that intersect the region, borders included."""
+        x1, y1, x2, y2 = region
+        found = set()
+        for cell in self.covered_cells(region):
+            for index in self.cells.get(cell, ()):
+                box_x1, box_y1, box_x2, box_y2 = self.boxes[index]
+                if box_x1 <= x2 and x1 <= box_x2 and box_y1 <= y2 and y1 <= box_y2:
+                    found.add(index)
+        return sorted(found)
@@ -0,0 +1,114 @@
+'''
+chromaeye: color histogram
+count the colors of an image region without walking every pixel in python.
+
+each BGR pixel is packed into one uint32 key (b << 16 | g << 8 | r), so a region
+becomes a flat key array that numpy can count in one call.
+'''
+
+import numpy as np
+
+
+def pack_bgr(pixels):
+    """Pack an (..., 3) uint8 BGR array into uint32 keys."""
+    pixels = pixels.reshape(-1, 3).astype(np.uint32)
+    return (pixels[:, 0] << 16) | (pixels[:, 1] << 8) | pixels[:, 2]
+
+
+def unpack_bgr(keys):
+    """Unpack uint32 keys back into an (n, 3) uint8 BGR array."""
+    keys = np.asarray(keys, dtype=np.uint32)
+    return np.stack(((keys >> 16) & 0xFF, (keys >> 8) & 0xFF, keys & 0xFF), axis=-1).astype(np.uint8)
+
+
+def color_runs(keys, breaks=()):
+    """
+    (run_start, run_length) of the runs of equal keys of a flat key array, a run also starts at every index of breaks.
+    a screenshot region is mostly runs of one color, counting each run once leaves far fewer keys to sort.
+    """
+    starts = np.concatenate(([True], keys[1:] != keys[:-1]))
+    breaks = np.asarray(breaks, dtype=np.intp)
+    starts[breaks[breaks < keys.size]] = True
+    run_start = np.flatnonzero(starts)
+    return run_start, np.diff(np.append(run_start, keys.size))
+
+
+def count_runs(run_keys, run_length):
+    """Unique keys of the runs with their pixel counts and the index of the first run of each key."""
+    unique_keys, first_run, inverse = np.unique(run_keys, return_index=True, return_inverse=True)
+    counts = np.bincount(inverse.ravel(), weights=run_length, minlength=len(unique_keys)).astype(np.int64)
+    return unique_keys, first_run, counts
+
+
+def count_colors(pixels):
+    """
+    Count the unique colors of a region.
+    Returns (colors, counts) ordered like Counter.most_common: highest count first,
+    ties broken by the first appearance of the color in row-major order.
+    """
+    keys = pack_bgr(pixels)
+    if keys.size == 0:
+        return np.empty((0, 3), dtype=np.uint8), np.empty(0, dtype=np.int64)
+
+    run_start, run_length = color_runs(keys)
+    unique_keys, first_index, counts = count_runs(keys[run_start], run_length)
+    order = np.lexsort((first_index, -counts))
+    return unpack_bgr(unique_keys[order]), counts[order]
+
+
+def top_colors(pixels, num_colors=20):
+    """Return the most common colors as [((b, g, r), count), ...], same shape as Counter.most_common."""
+    colors, counts = count_colors(pixels)
+    return [(tuple(color), int(count)) for color, count in zip(colors[:num_colors], counts[:num_colors])]
+
+
+def region_top_colors(image, bbox, num_colors=20):
+    """Return the most common colors inside (x_min, y_min, x_max, y_max), clamped to the image bounds."""
+    x_min, y_min, x_max, y_max = bbox
+
+    # Clamp coordinates within image bounds
+    height, width = image.shape[:2]
+    x_min, y_min = max(0, x_min), max(0, y_min)
+    x_max, y_max = min(width, x_max), min(height, y_max)
+
+    if x_max <= x_min or y_max <= y_min:
+        return []
+
+    return top_colors(image[y_min:y_max, x_min:x_max], num_colors)
+
+
+def box_top_colors(image, boxes, num_colors=20):
+    """
+    Most common colors of many boxes of one image, counted in one call.
+    boxes: (n, 4) int array of (x_min, y_min, x_max, y_max), cropped like image[y_min:y_max, x_min:x_max]
+    Returns (colors, found): an (n, num_colors, 3) uint8 BGR array, row i ordered like Counter.most_common of box i,
+    and an (n, num_colors) bool array, False where box i has fewer colors.
+    """
+    colors = np.zeros((len(boxes), num_colors, 3), dtype=np.uint8)
+    found = np.zeros((len(boxes), num_colors), dtype=bool)
+    crops = [image[y_min:y_max, x_min:x_max].reshape(-1, 3) for x_min, y_min, x_max, y_max in np.asarray(boxes).tolist()]
+    if not crops:
+        return colors, found
+
+    box_offsets = np.cumsum([0] + [len(crop) for crop in crops])
+    pixel_keys = pack_bgr(np.concatenate(crops))
+    if pixel_keys.size == 0:
+        return colors, found
+
+    # a run never crosses two boxes, the box index goes above the 24 color bits of the run,
+    # so the same color in two boxes is two keys
+    run_start, run_length = color_runs(pixel_keys, box_offsets[1:-1])
+    run_box = np.searchsorted(box_offsets, run_start, side='right').astype(np.uint64) - np.uint64(1)
+    keys = (run_box << np.uint64(24)) | pixel_keys[run_start].astype(np.uint64)
+
+    unique_keys, first_index, counts = count_runs(keys, run_length)
+    key_box = (unique_keys >> np.uint64(24)).astype(np.intp)
+    order = np.lexsort((first_index, -counts, key_box))
+    unique_keys, key_box = unique_keys[order], key_box[order]
+
+    # rank of each color inside its box
+    rank = np.arange(len(key_box)) - np.searchsorted(key_box, key_box)
+    top = rank < num_colors
+    colors[key_box[top], rank[top]] = unpack_bgr(unique_keys[top] & np.uint64(0xFFFFFF))
+    found[key_box[top], rank[top]] = True
+    return colors, found
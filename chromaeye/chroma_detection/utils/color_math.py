@@ -0,0 +1,59 @@
+'''
+chromaeye: color math
+WCAG relative luminance and contrast ratio for one color or for whole arrays of colors in one numpy call.
+
+8-bit channels go through a 256 entry lookup table of the linearized sRGB value, instead of computing ** 2.4 per channel.
+the detectors use the sRGB threshold 0.04045 and the repair uses the older WCAG 2.0 threshold 0.03928. both thresholds
+fall between 10/255 and 11/255, so for 8-bit channels they give the same table. colors with fractional channels
+are computed with the formula and the threshold that the caller passes.
+'''
+
+import numpy as np
+
+SRGB_THRESHOLD = 0.04045
+WCAG20_THRESHOLD = 0.03928
+
+
+def linearize_channel(value, threshold=SRGB_THRESHOLD):
+    """Linear value of one sRGB channel in [0, 1]."""
+    return value / 12.92 if value <= threshold else ((value + 0.055) / 1.055) ** 2.4
+
+
+# built with python floats, the same operations as the scalar formula
+SRGB_TO_LINEAR = np.array([linearize_channel(np.float64(value) / 255.0) for value in range(256)])
+
+
+def linearize(colors, threshold=SRGB_THRESHOLD):
+    """Linear values of an (..., 3) array of 0-255 RGB colors."""
+    colors = np.asarray(colors)
+    if colors.dtype == np.uint8:
+        return SRGB_TO_LINEAR[colors]
+
+    colors = colors.astype(np.float64)
+    if np.all(colors == np.rint(colors)) and np.all((colors >= 0) & (colors <= 255)):
+        return SRGB_TO_LINEAR[colors.astype(np.intp)]
+
+    colors = colors / 255.0
+    return np.where(colors <= threshold, colors / 12.92, ((colors + 0.055) / 1.055) ** 2.4)
+
+
+def relative_luminance(colors, threshold=SRGB_THRESHOLD):
+    """Relative luminance of an (..., 3) array of 0-255 RGB colors, returns an (...) array or a numpy float."""
+    linear = linearize(colors, threshold)
+    luminance = 0.2126 * linear[..., 0] + 0.7152 * linear[..., 1] + 0.0722 * linear[..., 2]
+    return luminance[()]
+
+
+def luminance_contrast_ratio(luminance1, luminance2):
+    """Contrast ratio between two (broadcastable) arrays of relative luminance."""
+    return (np.maximum(luminance1, luminance2) + 0.05) / (np.minimum(luminance1, luminance2) + 0.05)
+
+
+def contrast_ratio(foreground_colors, background_colors, threshold=SRGB_THRESHOLD):
+    """
+    Contrast ratio between (broadcastable) arrays of 0-255 RGB colors, e.g. all candidate foreground
+    colors of a region against its background. One color pair gives a numpy float.
+    """
+    ratio = luminance_contrast_ratio(relative_luminance(foreground_colors, threshold),
+                                     relative_luminance(background_colors, threshold))
+    return ratio[()]
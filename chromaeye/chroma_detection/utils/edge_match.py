@@ -0,0 +1,76 @@
+'''
+chromaeye: edge match
+find the edge pixels of one edge map that have no edge of the other map within the distance threshold.
+
+full-page screenshots can be tens of thousands of pixels tall, so the maps are compared in horizontal bands.
+each band sees distance_threshold extra rows of the other map above and below it, an edge pixel can only be matched
+by an edge that close, so the result does not depend on the band height. matchers:
+- kdtree: nearest neighbor query of the edge coordinates in a cKDTree of the other map
+- dilate: dilate the other map with a disk of radius distance_threshold, an edge pixel outside it is unmatched
+- dt: exact euclidean distance transform of the inverted other map, an edge pixel farther than the threshold is unmatched
+'''
+
+import cv2
+import numpy as np
+from scipy.spatial import cKDTree  # Efficient to find nearest-neighbor edges
+
+EDGE_TILE_HEIGHT = 1024
+
+
+def kdtree_unmatched(edges, other_edges, distance_threshold):
+    coords = np.column_stack(np.where(edges > 0))
+    other_coords = np.column_stack(np.where(other_edges > 0))
+
+    distances, _ = cKDTree(other_coords).query(coords)
+    unmatched_coords = coords[distances > distance_threshold]
+
+    unmatched = np.zeros_like(edges, dtype=np.uint8)
+    unmatched[unmatched_coords[:, 0], unmatched_coords[:, 1]] = 255
+    return unmatched
+
+
+def disk_kernel(radius):
+    """Structuring element of the pixels within radius (euclidean) of the center."""
+    offsets = np.arange(-int(radius), int(radius) + 1)
+    return (offsets[:, None] ** 2 + offsets[None, :] ** 2 <= radius ** 2).astype(np.uint8)
+
+
+def dilate_unmatched(edges, other_edges, distance_threshold):
+    near_other = cv2.dilate((other_edges > 0).astype(np.uint8), disk_kernel(distance_threshold))
+    return np.where((edges > 0) & (near_other == 0), 255, 0).astype(np.uint8)
+
+
+def distance_transform_unmatched(edges, other_edges, distance_threshold):
+    if not np.any(other_edges):
+        # no edge to measure the distance to, every edge is unmatched
+        return np.where(edges > 0, 255, 0).astype(np.uint8)
+    distance = cv2.distanceTransform(np.where(other_edges > 0, 0, 255).astype(np.uint8), cv2.DIST_L2,
+                                     cv2.DIST_MASK_PRECISE)
+    return np.where((edges > 0) & (distance > distance_threshold), 255, 0).astype(np.uint8)
+
+
+EDGE_MATCHERS = {
+    'kdtree': kdtree_unmatched,
+    'dilate': dilate_unmatched,
+    'dt': distance_transform_unmatched,
+}
+
+
+def unmatched_edges(edges, other_edges, distance_threshold=3, matcher='kdtree', tile_height=EDGE_TILE_HEIGHT):
+    """
+    Return a uint8 mask (255) of the edge pixels of edges with no edge pixel of other_edges within distance_threshold.
+    tile_height: rows per band, None compares the whole maps at once
+    """
+    match_band = EDGE_MATCHERS[matcher]
+    height = edges.shape[0]
+    tile_height = tile_height or max(height, 1)
+    margin = int(np.ceil(distance_threshold))
+
+    unmatched = np.zeros_like(edges, dtype=np.uint8)
+    for top in range(0, height, tile_height):
+        bottom = min(top + tile_height, height)
+        band_top, band_bottom = max(0, top - margin), min(height, bottom + margin)
+
+        band = match_band(edges[band_top:band_bottom], other_edges[band_top:band_bottom], distance_threshold)
+        unmatched[top:bottom] = band[top - band_top:bottom - band_top]
+    return unmatched
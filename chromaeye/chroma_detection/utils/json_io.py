@@ -0,0 +1,114 @@
+'''
+chromaeye: json io
+read and write the json files of the pipeline in one place.
+
+- the fastest installed backend parses and writes the json: orjson, msgspec or the stdlib json module
+  (optional, pip install orjson). a file the fast backend rejects, e.g. one with NaN, is parsed by the stdlib.
+  orjson and msgspec write NaN as null
+- compact json by default, pretty=True writes the layout of json.dump(..., indent=4)
+- load_json(json_path, memoize=True) parses a file once per process, reused while its size and modification time
+  are unchanged. the memoized data is shared between the callers, they must not modify it
+'''
+
+import json
+import os
+from collections import OrderedDict
+from functools import lru_cache
+
+JSON_BACKENDS = ('orjson', 'msgspec', 'json')
+
+# parsed files kept by load_json(..., memoize=True), the UIED json of a pair is read by two detectors
+MEMO_SIZE = 32
+memoized_json = OrderedDict()
+
+
+def orjson_codec():
+    import orjson
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    return orjson.loads, lambda data: orjson.dumps(data, option=option), orjson.JSONDecodeError
+
+
+def msgspec_codec():
+    import msgspec
+    # msgspec.DecodeError is not a ValueError in every msgspec release
+    return msgspec.json.decode, msgspec.json.Encoder().encode, msgspec.DecodeError
+
+
+def stdlib_codec():
+    return json.loads, lambda data: json.dumps(data, separators=(',', ':')).encode('utf-8'), json.JSONDecodeError
+
+
+JSON_CODECS = {
+    'orjson': orjson_codec,
+    'msgspec': msgspec_codec,
+    'json': stdlib_codec,
+}
+
+
+@lru_cache(maxsize=None)
+def json_codec(backend=None):
+    """
+    (loads, dumps, decode_error) of the backend, dumps returns utf-8 bytes, loads raises decode_error on invalid json.
+    None: the first installed of JSON_BACKENDS.
+    """
+    if backend is not None:
+        return JSON_CODECS[backend]()
+    for name in JSON_BACKENDS:
+        try:
+            return JSON_CODECS[name]()
+        except ImportError:
+            continue
+
+
+def loads(data, backend=None):
+    """Parse json bytes or str, invalid json raises ValueError (json.JSONDecodeError) whatever the backend."""
+    backend_loads, _, decode_error = json_codec(backend)
+    try:
+        return backend_loads(data)
+    except (ValueError, decode_error):
+        # NaN, Infinity and other extensions of the stdlib json module
+        return json.loads(data)
+
+
+def dumps(data, pretty=False, backend=None):
+    """Json text of data, compact or in the indent=4 layout."""
+    if pretty:
+        return json.dumps(data, indent=4)
+    try:
+        return json_codec(backend)[1](data).decode('utf-8')
+    except TypeError:
+        # a type the fast backend does not know, the stdlib raises the usual error when it does not know it either
+        return json.dumps(data, separators=(',', ':'))
+
+
+def read_json(json_path, backend=None):
+    with open(json_path, 'rb') as f:
+        return loads(f.read(), backend)
+
+
+def load_json(json_path, memoize=False):
+    """Load JSON file. memoize: reuse the data parsed by an earlier call while the file is unchanged."""
+    if not os.path.exists(json_path):
+        raise FileNotFoundError(f"JSON file not found at path: {json_path}")
+    if not memoize:
+        return read_json(json_path)
+
+    stat = os.stat(json_path)
+    key = os.path.abspath(json_path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    cached = memoized_json.get(key)
+    if cached is not None and cached[0] == signature:
+        memoized_json.move_to_end(key)
+        return cached[1]
+
+    data = read_json(json_path)
+    memoized_json[key] = (signature, data)
+    if len(memoized_json) > MEMO_SIZE:
+        memoized_json.popitem(last=False)
+    return data
+
+
+def save_json(data, json_path, pretty=False):
+    """Save data to JSON file, compact unless pretty."""
+    with open(json_path, 'w', encoding='utf-8') as f:
+        f.write(dumps(data, pretty))
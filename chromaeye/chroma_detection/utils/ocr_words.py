@@ -0,0 +1,141 @@
+'''
+chromaeye: ocr words
+the words of an Upstage OCR json in columns, parsed once per json instead of walking the nested dicts in every detector.
+
+- boxes: (n, 4) int32 (x_min, y_min, x_max, y_max) of the vertices of every word
+- text_bytes / text_offsets: the utf-8 text of all words in one buffer,
+  word i is text_bytes[text_offsets[i]:text_offsets[i + 1]]
+- confidence: (n,) float32, nan when the json has none
+- page_offsets: the words of page p are words page_offsets[p]:page_offsets[p + 1]
+
+the columns can be saved as .npz in a cache folder of the caller (chroma_eye.py uses output_dir/.ocr_words, the input
+dataset is never written), load_ocr_words reuses the file while the size and modification time of the json are
+unchanged, so a re-run does not parse the json again.
+'''
+
+import os
+from functools import cached_property
+
+import numpy as np
+
+from chromaeye.chroma_detection.utils.json_io import load_json
+
+# folder of the .npz files, inside the output folder of a detection run
+OCR_WORDS_DIR = '.ocr_words'
+
+COLUMNS = ('boxes', 'text_bytes', 'text_offsets', 'confidence', 'page_offsets', 'source')
+
+# height of the bounding box of a large text (e.g. 18-point or larger), WCAG asks a lower contrast ratio of it
+LARGE_TEXT_HEIGHT = 24
+
+
+class OcrWords:
+    """Columnar OCR words of one json, see the module docstring for the columns."""
+
+    def __init__(self, boxes, text_bytes, text_offsets, confidence, page_offsets, source=None):
+        self.boxes = boxes
+        self.text_bytes = text_bytes
+        self.text_offsets = text_offsets
+        self.confidence = confidence
+        self.page_offsets = page_offsets
+        # (size, mtime_ns) of the json the words were parsed from
+        self.source = np.zeros(2, dtype=np.int64) if source is None else source
+
+    @classmethod
+    def from_json(cls, data):
+        boxes, texts, confidence, page_offsets = [], [], [], [0]
+        for page in data['pages']:
+            for word in page['words']:
+                vertices = word['boundingBox']['vertices']
+                xs = [v['x'] for v in vertices]
+                ys = [v['y'] for v in vertices]
+                boxes.append((min(xs), min(ys), max(xs), max(ys)))
+                texts.append(word['text'].encode('utf-8'))
+                confidence.append(word.get('confidence', np.nan))
+            page_offsets.append(len(boxes))
+
+        text_offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in texts], out=text_offsets[1:])
+        return cls(np.array(boxes, dtype=np.int32).reshape(-1, 4),
+                   np.frombuffer(b''.join(texts), dtype=np.uint8),
+                   text_offsets,
+                   np.array(confidence, dtype=np.float32),
+                   np.array(page_offsets, dtype=np.int64))
+
+    @classmethod
+    def load(cls, npz_path):
+        with np.load(npz_path) as columns:
+            return cls(*(columns[name] for name in COLUMNS))
+
+    def save(self, npz_path):
+        """Write the columns atomically, an interrupted run never leaves a half written file behind."""
+        temp_path = npz_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            np.savez(f, **{name: getattr(self, name) for name in COLUMNS})
+        os.replace(temp_path, npz_path)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    @cached_property
+    def texts(self):
+        """Text of every word, decoded once."""
+        buffer = self.text_bytes.tobytes()
+        offsets = self.text_offsets.tolist()
+        return [buffer[start:stop].decode('utf-8') for start, stop in zip(offsets[:-1], offsets[1:])]
+
+    def box(self, index):
+        """[x_min, y_min, x_max, y_max] of a word as python ints, ready for json."""
+        return self.boxes[index].tolist()
+
+    def page(self, page_index):
+        """Indices of the words of a page."""
+        return range(self.page_offsets[page_index], self.page_offsets[page_index + 1])
+
+    def large_text(self, threshold=LARGE_TEXT_HEIGHT):
+        """(n,) bool, the box of the word is at least threshold pixels high."""
+        return self.boxes[:, 3] - self.boxes[:, 1] >= threshold
+
+    def clamped(self, width, height):
+        """(n, 4) boxes clamped to an image of width x height, an empty box has x_max <= x_min or y_max <= y_min."""
+        return np.clip(self.boxes, 0, [width, height, width, height]).astype(np.int32)
+
+
+def as_ocr_words(data):
+    """OcrWords of a parsed OCR json, OcrWords are returned unchanged."""
+    return data if isinstance(data, OcrWords) else OcrWords.from_json(data)
+
+
+def load_ocr_words(json_path, cache_dir=None):
+    """
+    OcrWords of an OCR json file.
+    cache_dir: folder of the .npz columns, reused while the json is unchanged, None parses the json every time
+    """
+    if not os.path.exists(json_path):
+        raise FileNotFoundError(f"JSON file not found at path: {json_path}")
+
+    def parse():
+        return OcrWords.from_json(load_json(json_path))
+
+    if cache_dir is None:
+        return parse()
+
+    stat = os.stat(json_path)
+    source = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+    npz_path = os.path.join(cache_dir, os.path.splitext(os.path.basename(json_path))[0] + '.npz')
+    if os.path.exists(npz_path):
+        try:
+            words = OcrWords.load(npz_path)
+            if np.array_equal(words.source, source):
+                return words
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable OCR word cache {npz_path}: {e}")
+
+    words = parse()
+    words.source = source
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        words.save(npz_path)
+    except OSError as e:
+        print(f"Could not write the OCR word cache {npz_path}: {e}")
+    return words
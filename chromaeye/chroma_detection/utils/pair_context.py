@@ -0,0 +1,74 @@
+'''
+chromaeye: pair context
+decode a light/dark screenshot pair once and share it between the detectors.
+
+every detector used to read both PNGs, resize the dark screenshot and convert the color space on its own.
+PairContext does each of these steps at most once per pair, and only when a detector asks for it.
+detectors that draw on a screenshot must draw on a copy, the arrays here are shared.
+'''
+
+import os
+import cv2
+from functools import cached_property
+
+from chromaeye.chroma_detection.utils.region_stats import gray_difference_stats
+
+
+# load the input image
+def load_image(image_path):
+    if not os.path.exists(image_path):
+        raise FileNotFoundError(f"Image not found at path: {image_path}")
+    image = cv2.imread(image_path)
+    if image is None:
+        raise FileNotFoundError(f"Failed to load image at path: {image_path}")
+    return image
+
+
+class PairContext:
+    """Lazily decoded light and dark screenshots of one pair, the dark one resized to the light one."""
+
+    def __init__(self, light_image_path: str, dark_image_path: str):
+        self.light_image_path = light_image_path
+        self.dark_image_path = dark_image_path
+
+    @cached_property
+    def light(self):
+        return load_image(self.light_image_path)
+
+    @cached_property
+    def dark(self):
+        dark_image = load_image(self.dark_image_path)
+        if self.light.shape[:2] != dark_image.shape[:2]:
+            # Resize dark image to match the light image dimensions
+            dark_image = cv2.resize(dark_image, (self.light.shape[1], self.light.shape[0]))
+        return dark_image
+
+    @cached_property
+    def light_gray(self):
+        return cv2.cvtColor(self.light, cv2.COLOR_BGR2GRAY)
+
+    @cached_property
+    def dark_gray(self):
+        return cv2.cvtColor(self.dark, cv2.COLOR_BGR2GRAY)
+
+    @cached_property
+    def light_hsv(self):
+        return cv2.cvtColor(self.light, cv2.COLOR_BGR2HSV)
+
+    @cached_property
+    def dark_hsv(self):
+        return cv2.cvtColor(self.dark, cv2.COLOR_BGR2HSV)
+
+    # Canny edge detection with the thresholds of the edge based detection
+    @cached_property
+    def light_edges(self):
+        return cv2.Canny(self.light_gray, 10, 55)
+
+    @cached_property
+    def dark_edges(self):
+        return cv2.Canny(self.dark_gray, 10, 55)
+
+    # summed-area table of the gray light/dark difference, mean difference of any text box in O(1)
+    @cached_property
+    def gray_difference(self):
+        return gray_difference_stats(self.light_gray, self.dark_gray)
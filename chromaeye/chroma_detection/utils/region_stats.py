@@ -0,0 +1,57 @@
+'''
+chromaeye: region stats
+mean, standard deviation and mean difference of any bounding box in constant time.
+
+a summed-area table (integral image) holds at (y, x) the sum of all pixels above and left of it, so the sum of
+a box is four lookups. the table is built once per screenshot, instead of cropping, converting or masking the
+screenshot again for every OCR word. the tables are float64, sums of 8-bit pixels stay exact.
+'''
+
+import cv2
+import numpy as np
+
+
+def box_bounds(bbox, height, width):
+    """Rows and columns of image[y_min:y_max, x_min:x_max], with the same clipping as numpy slicing."""
+    x_min, y_min, x_max, y_max = bbox
+    row_start, row_stop, _ = slice(y_min, y_max).indices(height)
+    col_start, col_stop, _ = slice(x_min, x_max).indices(width)
+    return row_start, max(row_start, row_stop), col_start, max(col_start, col_stop)
+
+
+class RegionStats:
+    """Summed-area tables of the values and squared values of a gray or multi-channel image."""
+
+    def __init__(self, image):
+        self.height, self.width = image.shape[:2]
+        self.sum, self.sqsum = cv2.integral2(image, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+
+    def box_sums(self, bbox):
+        """(pixel count, per-channel sum, per-channel sum of squares) of image[y_min:y_max, x_min:x_max]."""
+        row_start, row_stop, col_start, col_stop = box_bounds(bbox, self.height, self.width)
+        count = (row_stop - row_start) * (col_stop - col_start)
+
+        def box_sum(table):
+            return (table[row_stop, col_stop] - table[row_start, col_stop]
+                    - table[row_stop, col_start] + table[row_start, col_start])
+
+        return count, box_sum(self.sum), box_sum(self.sqsum)
+
+    def mean(self, bbox):
+        """Per-channel mean of the box, nan for an empty box."""
+        count, total, _ = self.box_sums(bbox)
+        return total / count if count else np.full_like(total, np.nan)
+
+    def std(self, bbox):
+        """Standard deviation of all values (every channel) of the box, like np.std of the crop, nan when empty."""
+        count, total, squares = self.box_sums(bbox)
+        count = count * np.size(total)
+        if not count:
+            return np.nan
+        mean = np.sum(total) / count
+        return np.sqrt(max(np.sum(squares) / count - mean * mean, 0.0))
+
+
+def gray_difference_stats(light_gray, dark_gray):
+    """RegionStats of the absolute difference of the gray light and dark screenshots, mean() is the mean difference."""
+    return RegionStats(cv2.absdiff(light_gray, dark_gray))
@@ -0,0 +1,76 @@
+'''
+chromaeye: result cache
+remember the detection result of each screenshot pair, so a re-run only detects the pairs whose input changed.
+
+the cache is a sidecar json file in the output directory:
+- files: sha256 of every input file, reused while the size and modification time of the file are unchanged
+- pairs: for every pair, the key (hash of all input files and the detector version) and the detection result
+'''
+
+import os
+import hashlib
+
+from chromaeye.chroma_detection.utils.json_io import dumps, read_json
+
+CACHE_FILE_NAME = 'detection_cache.json'
+
+
+def empty_cache(version):
+    return {"version": version, "files": {}, "pairs": {}}
+
+
+def load_cache(cache_path, version):
+    """Load the cache, start from an empty one when it is missing, unreadable or from another detector version."""
+    if not os.path.exists(cache_path):
+        return empty_cache(version)
+    try:
+        cache = read_json(cache_path)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable detection cache {cache_path}: {e}")
+        return empty_cache(version)
+    if cache.get("version") != version:
+        return empty_cache(version)
+    return cache
+
+
+def save_cache(cache, cache_path):
+    """Write the cache atomically, an interrupted run never leaves a half written file behind."""
+    temp_path = cache_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(dumps(cache))
+    os.replace(temp_path, cache_path)
+
+
+def file_digest(file_path, file_cache):
+    """sha256 of the file content, reusing the cached digest while size and mtime are unchanged."""
+    if not os.path.exists(file_path):
+        return 'missing'
+
+    stat = os.stat(file_path)
+    signature = [stat.st_size, stat.st_mtime_ns]
+    cached = file_cache.get(file_path)
+    if cached and cached["stat"] == signature:
+        return cached["sha256"]
+
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(chunk)
+    digest = sha256.hexdigest()
+
+    file_cache[file_path] = {"stat": signature, "sha256": digest}
+    return digest
+
+
+def prune_file_cache(file_cache, file_paths):
+    """Keep the digests of file_paths only, the files of renamed or removed screenshots are dropped."""
+    file_paths = set(file_paths)
+    return {file_path: entry for file_path, entry in file_cache.items() if file_path in file_paths}
+
+
+def pair_key(input_files, file_cache, version):
+    """Hash of the detector version and the content of every input file of a pair."""
+    sha256 = hashlib.sha256(version.encode())
+    for file_path in input_files:
+        sha256.update(file_digest(file_path, file_cache).encode())
+    return sha256.hexdigest()
@@ -0,0 +1,81 @@
+'''
+chromaeye: result stream
+write the detection result to jsonl files while the pairs are detected, and read them back in bounded memory.
+
+a jsonl file holds one json record per line. a record is appended and flushed as soon as its pair is detected,
+so a crash only loses the pairs that were still running. the merge reads the records through a small index
+(sort key and byte offset of every line) and loads one record at a time.
+'''
+
+from chromaeye.chroma_detection.utils.json_io import dumps, loads
+
+
+class JsonlSink:
+    """Append the records of each stream name to its own jsonl file."""
+
+    def __init__(self, stream_paths, append=False):
+        mode = 'a' if append else 'w'
+        self.files = {name: open(path, mode, encoding='utf-8') for name, path in stream_paths.items()}
+
+    def write(self, name, record):
+        stream_file = self.files[name]
+        stream_file.write(dumps(record) + '\n')
+        stream_file.flush()
+
+    def close(self):
+        for stream_file in self.files.values():
+            stream_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def index_stream(stream_path, index_fields):
+    """
+    Return [(sort key, byte offset, values of index_fields), ...] for every record, sorted by record['file'].
+    when a file appears more than once, the last record wins.
+    a line cut short by a crash is skipped.
+    """
+    index = {}
+    with open(stream_path, 'rb') as stream_file:
+        offset = 0
+        for line in stream_file:
+            try:
+                record = loads(line)
+            except ValueError:
+                print(f"Skipping incomplete record at byte {offset} of {stream_path}")
+            else:
+                index[record['file']] = (record['file'], offset, tuple(record.get(field) for field in index_fields))
+            offset += len(line)
+    return sorted(index.values(), key=lambda item: item[0])
+
+
+def read_record(stream_file, offset):
+    """Read the record that starts at offset of an open jsonl file."""
+    stream_file.seek(offset)
+    return loads(stream_file.readline())
+
+
+def write_json_array(output_file, items, depth=0, pretty=False):
+    """
+    Write the items of an iterator as a json array, one item in memory at a time.
+    the layout is the same as save_json of the array (utils/json_io.py), pretty: nested depth levels deep.
+    """
+    if not pretty:
+        output_file.write('[')
+        for index, item in enumerate(items):
+            output_file.write((',' if index else '') + dumps(item))
+        output_file.write(']')
+        return
+
+    indent = ' ' * 4 * depth
+    empty = True
+    for item in items:
+        output_file.write('[\n' if empty else ',\n')
+        item_json = dumps(item, pretty=True).replace('\n', '\n' + indent + ' ' * 4)
+        output_file.write(indent + ' ' * 4 + item_json)
+        empty = False
+    output_file.write('[]' if empty else '\n' + indent + ']')
@@ -0,0 +1,46 @@
+'''
+chromaeye: text similarity
+score one OCR word against a batch of candidate words in one call.
+
+the scores are fuzz.ratio scores (0-100). identical strings score 100 without running the scorer, two empty strings
+included, so the backends agree on them. a candidate that appears several times in the batch is scored once.
+backends:
+- fuzzywuzzy: fuzzywuzzy.fuzz.ratio, the scorer the detection was tuned with (default)
+- rapidfuzz: rapidfuzz.process.cdist, the whole batch in C. the ratio is the Levenshtein based one, which is what
+  fuzzywuzzy returns when python-Levenshtein is installed, it can differ from the pure python SequenceMatcher ratio
+'''
+
+import numpy as np
+
+DEFAULT_SIMILARITY_BACKEND = 'fuzzywuzzy'
+
+
+def fuzzywuzzy_ratios(query, choices):
+    from fuzzywuzzy import fuzz
+    return [fuzz.ratio(query, choice) for choice in choices]
+
+
+def rapidfuzz_ratios(query, choices):
+    from rapidfuzz import fuzz, process
+    scores = np.rint(process.cdist([query], choices, scorer=fuzz.ratio)[0]).astype(int)
+    # fuzzywuzzy scores 0 when only one of the strings is empty
+    return [0 if not query or not choice else score for choice, score in zip(choices, scores)]
+
+
+SIMILARITY_BACKENDS = {
+    'fuzzywuzzy': fuzzywuzzy_ratios,
+    'rapidfuzz': rapidfuzz_ratios,
+}
+
+
+def similarity_scores(query, choices, backend=DEFAULT_SIMILARITY_BACKEND):
+    """Return the fuzz.ratio score of query against every choice as an int array, in the order of choices."""
+    unique_choices = list(dict.fromkeys(choices))
+    # fuzzywuzzy scores two empty strings 100, rapidfuzz 0
+    scores = {choice: 100 for choice in unique_choices if choice == query}
+
+    pending = [choice for choice in unique_choices if choice not in scores]
+    if pending:
+        scores.update(zip(pending, SIMILARITY_BACKENDS[backend](query, pending)))
+
+    return np.array([scores[choice] for choice in choices], dtype=int)
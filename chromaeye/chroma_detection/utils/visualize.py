@@ -0,0 +1,30 @@
+'''
+chromaeye: visualize
+show intermediate images of the detection while debugging, opt-in.
+
+the detection itself never imports matplotlib, it only writes the result images with cv2 (see artifacts.py).
+matplotlib is imported on the first call, and every figure is closed after it is shown, so a long batch does not
+keep figures alive in pyplot's state.
+'''
+
+import cv2
+
+
+def show_image(image, title=None, cmap=None, figsize=(15, 8)):
+    """Show an RGB image or a mask (cmap='gray') in a window, then close the figure."""
+    import matplotlib.pyplot as plt
+
+    figure = plt.figure(figsize=figsize)
+    try:
+        plt.imshow(image, cmap=cmap)
+        if title:
+            plt.title(title)
+        plt.axis('off')
+        plt.show()
+    finally:
+        plt.close(figure)
+
+
+def show_bgr_image(image, title=None, figsize=(15, 8)):
+    """Show an image loaded with cv2 (BGR)."""
+    show_image(cv2.cvtColor(image, cv2.COLOR_BGR2RGB), title, figsize=figsize)
@@ -14,6 +14,9 @@ import hsluv
 from selenium.webdriver.common.by import By
 from coloraide import Color
 
+from chromaeye.chroma_detection.utils.color_math import WCAG20_THRESHOLD, relative_luminance, \
+    contrast_ratio as wcag_contrast_ratio
+
 
 
 #either
@@ -54,16 +57,10 @@ def parse_rgb(css_color):
 
 # WCAG contrast ratio calculation
 def luminance(rgb):
-    r, g, b = [x / 255.0 for x in rgb]
-    r = r / 12.92 if r <= 0.03928 else ((r + 0.055) / 1.055) ** 2.4
-    g = g / 12.92 if g <= 0.03928 else ((g + 0.055) / 1.055) ** 2.4
-    b = b / 12.92 if b <= 0.03928 else ((b + 0.055) / 1.055) ** 2.4
-    return 0.2126 * r + 0.7152 * g + 0.0722 * b
+    return relative_luminance(rgb, WCAG20_THRESHOLD)
 
 def contrast_ratio(fg, bg):
-    lum1 = luminance(fg)
-    lum2 = luminance(bg)
-    return (max(lum1, lum2) + 0.05) / (min(lum1, lum2) + 0.05)
+    return wcag_contrast_ratio(fg, bg, WCAG20_THRESHOLD)
 
 # Convert RGB to HSLuv
 def rgb_to_hsluv(rgb):
@@ -1,11 +1,13 @@
 
 import cv2
 import numpy as np
-from scipy.spatial import cKDTree
 import os
 
-def edge_difference(light_image_path, dark_image_np):
-    distance_threshold = 3,
+from chromaeye.chroma_detection.utils.edge_match import unmatched_edges
+
+# matcher: 'kdtree', 'dilate' or 'dt', see chroma_detection/utils/edge_match.py
+def edge_difference(light_image_path, dark_image_np, matcher='kdtree'):
+    distance_threshold = 3
     canny_thresh1 = 10,
     canny_thresh2 = 55,
     edge_count_threshold = 5000
@@ -25,28 +27,12 @@ def edge_difference(light_image_path, dark_image_np):
     light_edges = cv2.Canny(light_gray, 10, 50)
     dark_edges = cv2.Canny(dark_gray, 10, 50)
 
-    # Extract edge coordinates
-    light_coords = np.column_stack(np.where(light_edges > 0))
-    dark_coords = np.column_stack(np.where(dark_edges > 0))
-
-    if light_coords.size == 0 or dark_coords.size == 0:
+    if not np.any(light_edges) or not np.any(dark_edges):
         return {"skip_dark": True, "reason": "No edges detected"}
 
-    # Nearest-neighbor matching
-    light_tree = cKDTree(light_coords)
-    dark_tree = cKDTree(dark_coords)
-
-    distances_light, _ = dark_tree.query(light_coords)
-    distances_dark, _ = light_tree.query(dark_coords)
-
-    missing_light_coords = light_coords[distances_light > distance_threshold]
-    missing_dark_coords = dark_coords[distances_dark > distance_threshold]
-
-    # Create masks
-    missing_light_mask = np.zeros_like(light_edges, dtype=np.uint8)
-    missing_dark_mask = np.zeros_like(dark_edges, dtype=np.uint8)
-    missing_light_mask[missing_light_coords[:, 0], missing_light_coords[:, 1]] = 255
-    missing_dark_mask[missing_dark_coords[:, 0], missing_dark_coords[:, 1]] = 255
+    # Nearest-neighbor matching, masks of the edges without a counterpart in the other mode
+    missing_light_mask = unmatched_edges(light_edges, dark_edges, distance_threshold, matcher)
+    missing_dark_mask = unmatched_edges(dark_edges, light_edges, distance_threshold, matcher)
 
     count_light = np.count_nonzero(missing_light_mask)
     count_dark = np.count_nonzero(missing_dark_mask)
@@ -0,0 +1,4 @@
+'''
+chromaeye: tests
+the tests in tests/ import chromaeye from the repository root, run them from here with: python -m pytest tests
+'''
@@ -0,0 +1,142 @@
+'''
+chromaeye: color histogram tests
+the most common colors of a region against the per-pixel loop the text detectors used before
+utils/color_histogram.py: cv2.pointPolygonTest of every pixel of the clamped box and Counter.most_common.
+'''
+
+from collections import Counter
+
+import cv2
+import numpy as np
+import pytest
+
+from chromaeye.chroma_detection.utils.color_histogram import (box_top_colors, count_colors, pack_bgr,
+                                                              region_top_colors, top_colors, unpack_bgr)
+
+
+def reference_top_colors(image, bbox, num_colors=20):
+    """get_color_pixel_value of the text detectors before the color histogram."""
+    x_min, y_min, x_max, y_max = bbox
+
+    # Clamp coordinates within image bounds
+    height, width = image.shape[:2]
+    x_min, y_min = max(0, x_min), max(0, y_min)
+    x_max, y_max = min(width, x_max), min(height, y_max)
+
+    points = np.array([[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]])
+
+    color_pixel_values = []
+    for y in range(y_min, y_max):
+        for x in range(x_min, x_max):
+            if cv2.pointPolygonTest(points, (x, y), False) >= 0:
+                color_pixel_values.append(tuple(image[y, x]))
+
+    color_counts = Counter(color_pixel_values)
+    return color_counts.most_common(min(len(color_counts), num_colors))
+
+
+def as_python(top):
+    return [(tuple(int(channel) for channel in color), count) for color, count in top]
+
+
+def palette_image(rng, height, width, palette_size):
+    """Screenshot-like image: runs of few colors, so many colors share a count."""
+    palette = rng.integers(0, 256, (palette_size, 3)).astype(np.uint8)
+    labels = np.repeat(rng.integers(0, palette_size, (height, (width + 2) // 3)), 3, axis=1)[:, :width]
+    return palette[labels]
+
+
+def random_boxes(rng, height, width, count):
+    """Boxes inside, across the borders of and outside the image, and degenerate ones."""
+    x = rng.integers(-10, width + 10, (count, 2))
+    y = rng.integers(-10, height + 10, (count, 2))
+    return [(int(x_min), int(y_min), int(x_max), int(y_max)) for (x_min, x_max), (y_min, y_max) in
+            zip(np.sort(x, axis=1), np.sort(y, axis=1))]
+
+
+EDGE_BOXES = [
+    (0, 0, 5, 5),            # top left corner
+    (-4, -3, 6, 4),          # clipped at the top and left borders
+    (55, 35, 70, 50),        # clipped at the bottom and right borders
+    (-5, -5, 100, 100),      # larger than the image
+    (10, 10, 10, 20),        # zero width
+    (10, 10, 20, 10),        # zero height
+    (20, 20, 10, 30),        # x_max < x_min
+    (70, 5, 80, 10),         # right of the image
+    (5, -20, 10, -5),        # above the image
+    (59, 39, 60, 40),        # last pixel
+    (3, 4, 4, 5),            # one pixel
+]
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_region_top_colors_matches_the_pixel_loop(seed):
+    rng = np.random.default_rng(seed)
+    image = palette_image(rng, 40, 60, 6)
+    for bbox in EDGE_BOXES + random_boxes(rng, 40, 60, 60):
+        assert as_python(region_top_colors(image, bbox)) == as_python(reference_top_colors(image, bbox)), bbox
+
+
+@pytest.mark.parametrize('num_colors', [1, 3, 20])
+def test_box_top_colors_matches_the_pixel_loop(num_colors):
+    rng = np.random.default_rng(11)
+    image = palette_image(rng, 40, 60, 30)
+    boxes = EDGE_BOXES + random_boxes(rng, 40, 60, 60)
+    # box_top_colors takes the boxes clamped to the image, like OcrWords.clamped
+    clamped = np.clip(np.array(boxes), 0, [60, 40, 60, 40])
+    colors, found = box_top_colors(image, clamped, num_colors)
+    for index, bbox in enumerate(boxes):
+        expected = reference_top_colors(image, bbox, num_colors)
+        assert found[index].sum() == len(expected), bbox
+        assert [tuple(int(c) for c in color) for color in colors[index][found[index]]] == \
+            [tuple(int(c) for c in color) for color, _ in expected], bbox
+        assert not colors[index][~found[index]].any()
+
+
+def test_box_top_colors_without_boxes():
+    image = np.zeros((4, 4, 3), dtype=np.uint8)
+    colors, found = box_top_colors(image, np.empty((0, 4), dtype=np.int32), 5)
+    assert colors.shape == (0, 5, 3) and found.shape == (0, 5)
+    colors, found = box_top_colors(image, np.array([[2, 2, 2, 4], [1, 1, 1, 1]]), 5)
+    assert not found.any()
+
+
+def test_tie_order_is_first_appearance():
+    # four colors with two pixels each, the first pixel of each in row-major order: c, a, d, b
+    a, b, c, d = (1, 2, 3), (4, 5, 6), (7, 8, 9), (10, 11, 12)
+    image = np.array([[c, a, c, d],
+                      [b, d, a, b]], dtype=np.uint8)
+    expected = [(c, 2), (a, 2), (d, 2), (b, 2)]
+    assert as_python(reference_top_colors(image, (0, 0, 4, 2))) == expected
+    assert as_python(region_top_colors(image, (0, 0, 4, 2))) == expected
+    assert as_python(top_colors(image)) == expected
+    colors, counts = count_colors(image)
+    assert [tuple(color) for color in colors.tolist()] == [c, a, d, b] and counts.tolist() == [2, 2, 2, 2]
+    colors, found = box_top_colors(image, np.array([[0, 0, 4, 2], [1, 0, 4, 2], [0, 1, 4, 2]]), 4)
+    assert [tuple(color) for color in colors[0].tolist()] == [c, a, d, b]
+    # without the first column c is left once, the ties among a, d and b follow their first appearance
+    assert as_python(region_top_colors(image, (1, 0, 4, 2))) == as_python(reference_top_colors(image, (1, 0, 4, 2)))
+    assert [tuple(color) for color in colors[1][found[1]].tolist()] == \
+        [color for color, _ in reference_top_colors(image, (1, 0, 4, 2))]
+    assert [tuple(color) for color in colors[2][found[2]].tolist()] == \
+        [color for color, _ in reference_top_colors(image, (0, 1, 4, 2))]
+
+
+def test_counter_order_on_random_pixels():
+    rng = np.random.default_rng(5)
+    for _ in range(50):
+        pixels = rng.integers(0, 3, (int(rng.integers(1, 300)), 3)).astype(np.uint8)
+        pixels = np.repeat(pixels, rng.integers(1, 5, len(pixels)), axis=0)
+        expected = Counter(tuple(int(channel) for channel in pixel) for pixel in pixels).most_common(20)
+        assert as_python(top_colors(pixels)) == expected
+
+
+def test_pack_round_trip():
+    pixels = np.array([[0, 0, 0], [255, 255, 255], [1, 2, 3], [255, 0, 128]], dtype=np.uint8)
+    assert np.array_equal(unpack_bgr(pack_bgr(pixels)), pixels)
+
+
+def test_empty_region():
+    colors, counts = count_colors(np.empty((0, 3), dtype=np.uint8))
+    assert colors.shape == (0, 3) and counts.shape == (0,)
+    assert top_colors(np.empty((0, 0, 3), dtype=np.uint8)) == []
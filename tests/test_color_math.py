@@ -0,0 +1,113 @@
+'''
+chromaeye: color math tests
+relative_luminance and contrast_ratio against the scalar formulas the detectors (sRGB threshold 0.04045) and the
+repair (WCAG 2.0 threshold 0.03928) computed before utils/color_math.py, bit for bit.
+'''
+
+import random
+
+import numpy as np
+import pytest
+
+from chromaeye.chroma_detection.utils.color_math import (SRGB_THRESHOLD, WCAG20_THRESHOLD, contrast_ratio,
+                                                         relative_luminance)
+
+THRESHOLDS = [SRGB_THRESHOLD, WCAG20_THRESHOLD]
+
+# the channel values where the two thresholds fall, 0.03928 * 255 = 10.016 and 0.04045 * 255 = 10.315
+FRACTIONAL_CHANNELS = [0.5, 9.99, 10.0, 10.01, WCAG20_THRESHOLD * 255, np.nextafter(WCAG20_THRESHOLD * 255, 0),
+                       np.nextafter(WCAG20_THRESHOLD * 255, 255), 10.1, 10.2, 10.3, SRGB_THRESHOLD * 255,
+                       np.nextafter(SRGB_THRESHOLD * 255, 0), np.nextafter(SRGB_THRESHOLD * 255, 255), 10.32, 10.5,
+                       10.99, 11.0, 127.5, 254.5]
+
+
+def reference_relative_luminance(color, threshold):
+    """The scalar formula of the detectors and the repair modules."""
+    r, g, b = [x / 255.0 for x in color]
+    r = r / 12.92 if r <= threshold else ((r + 0.055) / 1.055) ** 2.4
+    g = g / 12.92 if g <= threshold else ((g + 0.055) / 1.055) ** 2.4
+    b = b / 12.92 if b <= threshold else ((b + 0.055) / 1.055) ** 2.4
+    return 0.2126 * r + 0.7152 * g + 0.0722 * b
+
+
+def reference_contrast_ratio(foreground_color, background_color, threshold):
+    l1 = reference_relative_luminance(foreground_color, threshold)
+    l2 = reference_relative_luminance(background_color, threshold)
+    return (l1 + 0.05) / (l2 + 0.05) if l1 > l2 else (l2 + 0.05) / (l1 + 0.05)
+
+
+def as_int(color):
+    return tuple(int(x) for x in color)
+
+
+def as_float(color):
+    return tuple(float(x) for x in color)
+
+
+def as_uint8(color):
+    return tuple(np.uint8(x) for x in color)
+
+
+CONVERSIONS = [as_int, as_float, as_uint8]
+
+
+def every_channel_value():
+    """Every 8-bit value in every channel, the grays, and random colors."""
+    rng = random.Random(0)
+    colors = [(value, value, value) for value in range(256)]
+    colors += [(value, 0, 0) for value in range(256)] + [(0, value, 0) for value in range(256)]
+    colors += [(0, 0, value) for value in range(256)]
+    colors += [tuple(rng.randrange(256) for _ in range(3)) for _ in range(500)]
+    return colors
+
+
+@pytest.mark.parametrize('threshold', THRESHOLDS)
+@pytest.mark.parametrize('convert', CONVERSIONS)
+def test_relative_luminance_of_every_channel_value(threshold, convert):
+    for color in every_channel_value():
+        assert relative_luminance(convert(color), threshold) == reference_relative_luminance(color, threshold), color
+
+
+@pytest.mark.parametrize('threshold', THRESHOLDS)
+@pytest.mark.parametrize('convert', CONVERSIONS)
+def test_contrast_ratio_of_every_channel_value(threshold, convert):
+    colors = every_channel_value()
+    for foreground_color, background_color in zip(colors, colors[1:] + colors[:1]):
+        assert contrast_ratio(convert(foreground_color), convert(background_color), threshold) == \
+            reference_contrast_ratio(foreground_color, background_color, threshold), (foreground_color, background_color)
+
+
+@pytest.mark.parametrize('threshold', THRESHOLDS)
+def test_arrays_of_colors(threshold):
+    colors = every_channel_value()
+    foreground = np.array(colors, dtype=np.uint8)
+    background = np.roll(foreground, 1, axis=0)
+    expected = [reference_contrast_ratio(f, b, threshold) for f, b in zip(colors, colors[-1:] + colors[:-1])]
+    for dtype in (np.uint8, np.int64, np.float64):
+        assert contrast_ratio(foreground.astype(dtype), background.astype(dtype), threshold).tolist() == expected
+    assert relative_luminance(foreground, threshold).tolist() == \
+        [reference_relative_luminance(color, threshold) for color in colors]
+
+
+@pytest.mark.parametrize('threshold', THRESHOLDS)
+def test_fractional_channels_near_the_thresholds(threshold):
+    for value in FRACTIONAL_CHANNELS:
+        for color in [(value, value, value), (value, 0.0, 255.0), (128.0, value, 3.0)]:
+            assert relative_luminance(color, threshold) == reference_relative_luminance(color, threshold), color
+            assert contrast_ratio(color, (255.0, 255.0, 255.0), threshold) == \
+                reference_contrast_ratio(color, (255, 255, 255), threshold), color
+    fractional = np.array([(value, value, value) for value in FRACTIONAL_CHANNELS])
+    assert relative_luminance(fractional, threshold).tolist() == \
+        [reference_relative_luminance(color, threshold) for color in fractional.tolist()]
+
+
+def test_threshold_discrepancy():
+    # a channel between the two thresholds is linear for one and a power for the other
+    color = (10.2, 10.2, 10.2)
+    assert relative_luminance(color, SRGB_THRESHOLD) == reference_relative_luminance(color, SRGB_THRESHOLD)
+    assert relative_luminance(color, WCAG20_THRESHOLD) == reference_relative_luminance(color, WCAG20_THRESHOLD)
+    assert relative_luminance(color, SRGB_THRESHOLD) != relative_luminance(color, WCAG20_THRESHOLD)
+    # both thresholds fall between 10 and 11, the 8-bit channels do not see the difference
+    for value in range(256):
+        assert relative_luminance((value, value, value), SRGB_THRESHOLD) == \
+            relative_luminance((value, value, value), WCAG20_THRESHOLD)
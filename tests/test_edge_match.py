@@ -0,0 +1,91 @@
+'''
+chromaeye: edge match tests
+the kdtree, dilate and dt matchers give the same unmatched edge mask, whatever the band height.
+'''
+
+import numpy as np
+import pytest
+
+from chromaeye.chroma_detection.utils.edge_match import EDGE_MATCHERS, unmatched_edges
+
+MATCHERS = sorted(EDGE_MATCHERS)
+
+
+def random_edges(rng, shape, density):
+    return np.where(rng.random(shape) < density, 255, 0).astype(np.uint8)
+
+
+def assert_matchers_agree(edges, other_edges, distance_threshold=3, tile_heights=(None, 1024)):
+    expected = unmatched_edges(edges, other_edges, distance_threshold, 'kdtree', None)
+    for matcher in MATCHERS:
+        for tile_height in tile_heights:
+            mask = unmatched_edges(edges, other_edges, distance_threshold, matcher, tile_height)
+            assert mask.dtype == np.uint8 and mask.shape == edges.shape
+            assert np.array_equal(mask, expected), (matcher, tile_height)
+    return expected
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_synthetic_edge_maps(seed):
+    rng = np.random.default_rng(seed)
+    edges, other_edges = random_edges(rng, (97, 61), 0.05), random_edges(rng, (97, 61), 0.03)
+    expected = assert_matchers_agree(edges, other_edges, tile_heights=(None, 1, 7, 16, 1024))
+    # both outcomes occur, the comparison is not trivially all or nothing
+    assert 0 < np.count_nonzero(expected) < np.count_nonzero(edges)
+
+
+@pytest.mark.parametrize('distance_threshold', [1, 2, 2.5, 3, 5])
+def test_distance_thresholds(distance_threshold):
+    rng = np.random.default_rng(7)
+    edges, other_edges = random_edges(rng, (64, 64), 0.04), random_edges(rng, (64, 64), 0.02)
+    assert_matchers_agree(edges, other_edges, distance_threshold, tile_heights=(None, 5, 13))
+
+
+def test_edges_on_band_borders():
+    # horizontal lines on the last row of a band and the first row of the next, matched only across the border
+    edges = np.zeros((64, 40), dtype=np.uint8)
+    other_edges = np.zeros((64, 40), dtype=np.uint8)
+    edges[15, 5:35] = 255
+    other_edges[17, 5:20] = 255
+    edges[32, 5:35] = 255
+    other_edges[29, 20:35] = 255
+    # an edge exactly distance_threshold away is matched, one pixel farther is not
+    edges[47, 10] = 255
+    other_edges[50, 10] = 255
+    edges[47, 30] = 255
+    other_edges[51, 30] = 255
+    expected = assert_matchers_agree(edges, other_edges, tile_heights=(None, 16, 32, 48))
+    # (15, 21) is sqrt(8) from (17, 19), (15, 22) is sqrt(13) away
+    assert not expected[15, 5:22].any() and expected[15, 22:35].all()
+    assert expected[32, 5:20].all() and not expected[32, 20:35].any()
+    assert expected[47, 10] == 0 and expected[47, 30] == 255
+
+
+def test_edges_on_tile_borders_of_the_default_height():
+    edges = np.zeros((2100, 8), dtype=np.uint8)
+    other_edges = np.zeros((2100, 8), dtype=np.uint8)
+    edges[[1022, 1023, 1024, 2047, 2048], 3] = 255
+    other_edges[[1026, 1021, 2050], 3] = 255
+    assert_matchers_agree(edges, other_edges, tile_heights=(None, 1024))
+
+
+@pytest.mark.parametrize('empty', ['edges', 'other_edges', 'both'])
+def test_empty_edge_maps(empty):
+    rng = np.random.default_rng(3)
+    edges, other_edges = random_edges(rng, (40, 30), 0.05), random_edges(rng, (40, 30), 0.05)
+    if empty in ('edges', 'both'):
+        edges[:] = 0
+    if empty in ('other_edges', 'both'):
+        other_edges[:] = 0
+    expected = assert_matchers_agree(edges, other_edges, tile_heights=(None, 8))
+    # without an edge to match, every edge is unmatched
+    assert np.array_equal(expected > 0, edges > 0)
+
+
+def test_empty_band():
+    # the edges of one map only in the first band, the other bands compare empty maps
+    edges = np.zeros((50, 20), dtype=np.uint8)
+    other_edges = np.zeros((50, 20), dtype=np.uint8)
+    edges[2, 2:10] = 255
+    other_edges[4, 2:5] = 255
+    assert_matchers_agree(edges, other_edges, tile_heights=(None, 10))
@@ -0,0 +1,84 @@
+'''
+chromaeye: invisible text tests
+a word with fewer than two colors keeps the colors of the word before it, the words before the first word with two
+colors are left unscored, in light and in dark mode.
+'''
+
+import json
+
+import numpy as np
+import pytest
+
+from chromaeye.chroma_detection.text_based_detection.invisible_text import (check_contrast_and_draw_bounding_boxes,
+                                                                            score_colors, score_words)
+from chromaeye.chroma_detection.utils.ocr_words import OcrWords
+
+WHITE, BLACK, DARK_GRAY = (255, 255, 255), (0, 0, 0), (40, 40, 40)
+
+# (x_min, y_min, x_max, y_max) of the words
+MENU_BOX = (10, 5, 60, 20)
+SALE_BOX = (10, 40, 60, 56)
+LOGO_BOX = (70, 5, 95, 20)
+
+
+def ocr_json(words):
+    return {'pages': [{'words': [{'text': text, 'boundingBox': {'vertices': [
+        {'x': x_min, 'y': y_min}, {'x': x_max, 'y': y_min}, {'x': x_max, 'y': y_max}, {'x': x_min, 'y': y_max}]}}
+        for text, (x_min, y_min, x_max, y_max) in words]}]}
+
+
+def test_score_colors_leaves_leading_single_color_words_unscored():
+    colors = np.zeros((4, 3, 3), dtype=np.uint8)
+    found = np.zeros((4, 3), dtype=bool)
+    colors[:, 0], found[:, 0] = WHITE, True
+    # only the third word has a second color, black text on white
+    colors[2, 1], found[2, 1] = BLACK, True
+
+    scores = score_colors(colors, found, np.zeros(4, dtype=bool))
+
+    assert np.isnan(scores["contrast"][:2]).all()
+    assert not scores["passed"][:2].any() and not scores["failed"][:2].any()
+    # the last word keeps the colors of the word before it
+    assert scores["contrast"][2] == scores["contrast"][3] == pytest.approx(21.0)
+    assert scores["passed"][2:].all()
+    assert (scores["text"][3] == BLACK).all()
+
+
+def screenshots():
+    light = np.full((60, 100, 3), WHITE, dtype=np.uint8)
+    light[10:14, 15:55] = BLACK  # the text of Menu, Sale and Logo are blank in light mode
+
+    dark = np.full((60, 100, 3), DARK_GRAY, dtype=np.uint8)
+    dark[44:46, 15:55] = (60, 60, 60)  # the low contrast text of Sale
+    dark[50:51, 15:20] = (75, 75, 75)  # its candidate color, not readable either
+    return light, dark
+
+
+@pytest.mark.parametrize('light_order, failure_reason', [
+    # Sale is the first light word and has one color: unscored, so it did not pass in light mode
+    (['Sale', 'Menu'], "contrast ratio issue"),
+    # after Menu, Sale keeps the black on white of Menu and passes in light mode
+    (['Menu', 'Sale'], "text inconsistency"),
+])
+def test_leading_single_color_words_in_both_modes(tmp_path, light_order, failure_reason):
+    light_image, dark_image = screenshots()
+    boxes = {'Menu': MENU_BOX, 'Sale': SALE_BOX, 'Logo': LOGO_BOX}
+    light_texts = ocr_json([(text, boxes[text]) for text in light_order])
+    # Logo has one color and comes before the first dark word with two colors
+    dark_texts = ocr_json([('Logo', LOGO_BOX), ('Sale', SALE_BOX)])
+
+    dark_words = OcrWords.from_json(dark_texts)
+    dark_scores = score_words(dark_image, dark_words.clamped(100, 60), dark_words.large_text())
+    assert np.isnan(dark_scores["contrast"][0])
+    assert not dark_scores["passed"][0] and not dark_scores["failed"][0]
+
+    output_json = tmp_path / 'invisible.json'
+    summary = check_contrast_and_draw_bounding_boxes(light_image, dark_image, light_texts, dark_texts,
+                                                     str(tmp_path / 'invisible.png'), str(output_json))
+
+    assert len(summary) == 1
+    assert summary[0]["Light mode failed text count"] == 0
+    assert [text_info["text"] for text_info in summary[0]["Dark mode failed text"]] == ['Sale']
+    failed_texts = json.loads(output_json.read_text())
+    assert failed_texts["failed_texts_light"] == []
+    assert [text_info["failure_reason"] for text_info in failed_texts["failed_texts_dark"]] == [failure_reason]
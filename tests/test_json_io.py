@@ -0,0 +1,62 @@
+'''
+chromaeye: json io tests
+every installed backend parses NaN like the stdlib json module and raises ValueError on a truncated line.
+'''
+
+import math
+
+import pytest
+
+from chromaeye.chroma_detection.utils import json_io
+from chromaeye.chroma_detection.utils.json_io import JSON_BACKENDS, dumps, json_codec, loads
+from chromaeye.chroma_detection.utils.result_cache import empty_cache, load_cache
+from chromaeye.chroma_detection.utils.result_stream import index_stream
+
+
+def installed(backend):
+    try:
+        json_codec(backend)
+    except ImportError:
+        return False
+    return True
+
+
+backends = pytest.mark.parametrize('backend', [
+    pytest.param(backend, marks=pytest.mark.skipif(not installed(backend), reason=f"{backend} is not installed"))
+    for backend in JSON_BACKENDS])
+
+
+@backends
+def test_nan_document(backend):
+    data = loads(b'{"contrast_ratio": NaN, "words": [Infinity, 1]}', backend)
+    assert math.isnan(data["contrast_ratio"])
+    assert data["words"] == [math.inf, 1]
+
+
+@backends
+def test_truncated_line_raises_value_error(backend):
+    with pytest.raises(ValueError):
+        loads(b'{"file": "1-Home_scroll_0", "resu', backend)
+
+
+@backends
+def test_round_trip(backend):
+    data = {"file": "1-Home_scroll_0", "boxes": [[1, 2, 3, 4]], "ratio": 1.5, "text": "café"}
+    assert loads(dumps(data, backend=backend), backend) == data
+
+
+@backends
+def test_stream_skips_truncated_line(backend, tmp_path, monkeypatch):
+    monkeypatch.setattr(json_io, 'json_codec', lambda _=None: json_codec(backend))
+    stream_path = tmp_path / 'results.jsonl'
+    stream_path.write_bytes(b'{"file": "b", "count": 2}\n{"file": "a", "count": 1}\n{"file": "c", "cou')
+    assert [(key, values) for key, _, values in index_stream(str(stream_path), ('count',))] == \
+        [("a", (1,)), ("b", (2,))]
+
+
+@backends
+def test_corrupt_cache_starts_empty(backend, tmp_path, monkeypatch):
+    monkeypatch.setattr(json_io, 'json_codec', lambda _=None: json_codec(backend))
+    cache_path = tmp_path / 'cache.json'
+    cache_path.write_bytes(b'{"version": "3", "pairs": {')
+    assert load_cache(str(cache_path), "3") == empty_cache("3")
@@ -0,0 +1,48 @@
+'''
+chromaeye: pair detection loop tests
+map_pairs finishes its progress bar and shuts its process pool down as soon as the last pair has been consumed.
+'''
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from tqdm import tqdm
+
+from chromaeye.chroma_detection import chroma_eye
+
+FILES = ['1-Home_scroll_0_light.png', '2-Home_scroll_0_light.png', '3-Home_scroll_0_light.png']
+
+
+def detect_pair(filename):
+    return {'file': filename.replace('light.png', ''), 'seconds': 0.0}
+
+
+class RecordingProgress(tqdm):
+    closed_at = []
+
+    def close(self):
+        if not self.disable:
+            RecordingProgress.closed_at.append((self.n, self.total))
+        super().close()
+
+
+class RecordingExecutor(ProcessPoolExecutor):
+    shutdowns = 0
+
+    def shutdown(self, *args, **kwargs):
+        RecordingExecutor.shutdowns += 1
+        super().shutdown(*args, **kwargs)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_map_pairs_finishes_with_the_last_pair(monkeypatch, workers):
+    monkeypatch.setattr(chroma_eye, 'tqdm', RecordingProgress)
+    monkeypatch.setattr(chroma_eye, 'ProcessPoolExecutor', RecordingExecutor)
+    RecordingProgress.closed_at, RecordingExecutor.shutdowns = [], 0
+
+    # the generator is still referenced, it is finished by the loop and not by the garbage collector
+    pair_results = chroma_eye.map_pairs(detect_pair, FILES, workers)
+    seen = [(filename, pair_result['file']) for filename, pair_result in pair_results]
+    assert seen == [(filename, filename.replace('light.png', '')) for filename in FILES]
+    assert RecordingProgress.closed_at == [(len(FILES), len(FILES))]
+    assert RecordingExecutor.shutdowns == (1 if workers > 1 else 0)
@@ -0,0 +1,55 @@
+'''
+chromaeye: ocr backends tests
+a local backend writes the Upstage schema, and its worker processes use the settings of the caller.
+'''
+
+import cv2
+import numpy as np
+
+from chromaeye.chroma_detection.pre_processing.ocr_backends import LocalOcr, TesseractOcr
+
+
+class SettingsOcr(LocalOcr):
+    """Recognizes one word, the lang it was built with."""
+    name = 'settings'
+
+    def __init__(self, max_workers=1, lang='eng'):
+        super().__init__(max_workers)
+        self.lang = lang
+
+    def recognize(self, image):
+        return [(self.lang, 0.9, (1, 2, 5, 6))]
+
+    def options(self):
+        return {'lang': self.lang}
+
+
+def screenshots(tmp_path, count):
+    paths = []
+    for index in range(count):
+        path = str(tmp_path / f"{index}.png")
+        cv2.imwrite(path, np.full((10, 10, 3), 255, dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def test_upstage_schema(tmp_path):
+    (path,) = screenshots(tmp_path, 1)
+    _, result = SettingsOcr(lang='deu').ocr_file(path)
+    word = result['pages'][0]['words'][0]
+    assert word['text'] == 'deu' and word['confidence'] == 0.9
+    assert word['boundingBox']['vertices'] == [{"x": 1, "y": 2}, {"x": 5, "y": 2}, {"x": 5, "y": 6}, {"x": 1, "y": 6}]
+    assert result['metadata']['pages'] == [{"height": 10, "page": 1, "width": 10}]
+
+
+def test_workers_use_the_settings_of_the_caller(tmp_path):
+    paths = screenshots(tmp_path, 3)
+    results = list(SettingsOcr(max_workers=2, lang='deu').ocr_files(paths))
+    assert [path for path, _, _, _ in results] == paths
+    assert all(error is None for _, _, _, error in results)
+    assert [result['text'] for _, _, result, _ in results] == ['deu'] * 3
+
+
+def test_tesseract_options():
+    backend = TesseractOcr(max_workers=4, lang='spa', config='--psm 6')
+    assert TesseractOcr(**backend.options()).options() == {'lang': 'spa', 'config': '--psm 6'}
@@ -0,0 +1,180 @@
+'''
+chromaeye: ocr client tests
+UpstageOcrClient against a local stub of the OCR endpoint (http.server): the transient failures are retried with
+Retry-After honored, the others are raised at once, the rate is limited, and the cache never sends an image twice.
+'''
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from chromaeye.chroma_detection.pre_processing.ocr_client import UpstageOcrClient
+
+
+class StubOcr:
+    """
+    What the stub endpoint answers, and the requests it got.
+    An image is any bytes containing b'image-<name>', the OCR result names it back.
+    responses: (status, headers) of the next requests, then 200
+    status, delay: per image name, the status of all its requests and the seconds to wait before answering
+    """
+
+    def __init__(self):
+        self.responses = []
+        self.status = {}
+        self.delay = {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+
+class StubOcrHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        stub = self.server.stub
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        name = re.search(rb'image-(\w+)', body).group(1).decode()
+        with stub.lock:
+            stub.requests.append((time.monotonic(), name, self.headers['Authorization']))
+            status, headers = stub.responses.pop(0) if stub.responses else (stub.status.get(name, 200), {})
+        time.sleep(stub.delay.get(name, 0))
+
+        content = json.dumps({"pages": [{"words": []}], "text": name}).encode()
+        self.send_response(status)
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """(url, StubOcr) of a stub OCR endpoint on a free local port."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubOcrHandler)
+    server.daemon_threads = True
+    server.stub = StubOcr()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/v1/document-ai/ocr", server.stub
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def make_client(url, **kwargs):
+    return UpstageOcrClient('test-key', url=url, **dict({'backoff': 0.01, 'max_backoff': 5.0}, **kwargs))
+
+
+def write_images(directory, names):
+    paths = []
+    for name in names:
+        path = directory / f"{name}.png"
+        path.write_bytes(b'png bytes of image-' + name.split('_')[0].encode())
+        paths.append(str(path))
+    return paths
+
+
+def test_transient_failures_are_retried(stub_server):
+    url, stub = stub_server
+    stub.responses = [(503, {}), (429, {})]
+
+    ocr_result = make_client(url, max_retries=3).ocr(b'image-home', 'home.png')
+
+    assert ocr_result["text"] == 'home'
+    assert [name for _, name, _ in stub.requests] == ['home'] * 3
+    assert {authorization for _, _, authorization in stub.requests} == {'Bearer test-key'}
+
+
+def test_the_last_try_raises(stub_server):
+    url, stub = stub_server
+    stub.status['home'] = 503
+
+    with pytest.raises(requests.HTTPError) as error:
+        make_client(url, max_retries=2).ocr(b'image-home', 'home.png')
+    assert error.value.response.status_code == 503
+    assert len(stub.requests) == 3
+
+
+def test_retry_after_is_honored(stub_server):
+    url, stub = stub_server
+    stub.responses = [(429, {'Retry-After': '1'})]
+
+    make_client(url).ocr(b'image-home', 'home.png')
+
+    (first, _, _), (second, _, _) = stub.requests
+    # the backoff alone would have waited 0.01 seconds
+    assert second - first >= 0.9
+
+
+def test_401_is_raised_without_retry(stub_server):
+    url, stub = stub_server
+    stub.responses = [(401, {})]
+
+    with pytest.raises(requests.HTTPError) as error:
+        make_client(url).ocr(b'image-home', 'home.png')
+    assert error.value.response.status_code == 401
+    assert len(stub.requests) == 1
+
+
+def test_rate_limit(stub_server, tmp_path):
+    url, stub = stub_server
+    paths = write_images(tmp_path, ['a', 'b', 'c', 'd', 'e', 'f'])
+
+    list(make_client(url, max_workers=4, rate=10, burst=1).ocr_files(paths))
+
+    times = sorted(request_time for request_time, _, _ in stub.requests)
+    assert len(times) == 6
+    # one request at once, then one every 0.1 seconds
+    assert times[-1] - times[0] >= 0.45
+
+
+def test_cached_rerun_sends_no_request(stub_server, tmp_path):
+    url, stub = stub_server
+    paths = write_images(tmp_path, ['a', 'b', 'c'])
+    cache_dir = str(tmp_path / 'cache')
+
+    first_run = list(make_client(url, cache_dir=cache_dir).ocr_files(paths))
+    assert len(stub.requests) == 3
+
+    # another client, as in a later run, with the same cache
+    second_run = list(make_client(url, cache_dir=cache_dir).ocr_files(paths))
+    assert len(stub.requests) == 3
+    assert second_run == first_run
+
+
+def test_identical_images_in_flight_are_posted_once(stub_server, tmp_path):
+    url, stub = stub_server
+    # the same screenshot under two names, sent at the same time
+    paths = write_images(tmp_path, ['home_light', 'home_copy'])
+    stub.delay['home'] = 0.3
+
+    results = list(make_client(url, max_workers=2, cache_dir=str(tmp_path / 'cache')).ocr_files(paths))
+
+    assert [name for _, name, _ in stub.requests] == ['home']
+    assert [ocr_result["text"] for _, _, ocr_result, _ in results] == ['home', 'home']
+
+
+def test_ocr_files_order_and_errors(stub_server, tmp_path):
+    url, stub = stub_server
+    paths = write_images(tmp_path, ['slow', 'broken', 'fast'])
+    paths.insert(2, str(tmp_path / 'missing.png'))
+    # the first image is answered last
+    stub.delay['slow'] = 0.3
+    stub.status['broken'] = 400
+
+    results = list(make_client(url, max_workers=4).ocr_files(paths))
+
+    assert [image_path for image_path, _, _, _ in results] == paths
+    (_, slow_bytes, slow_result, slow_error), broken, missing, (_, _, fast_result, fast_error) = results
+    assert slow_bytes == b'png bytes of image-slow' and slow_result["text"] == 'slow' and slow_error is None
+    assert fast_result["text"] == 'fast' and fast_error is None
+    assert broken[1:3] == (None, None) and isinstance(broken[3], requests.HTTPError)
+    assert missing[1:3] == (None, None) and isinstance(missing[3], FileNotFoundError)
@@ -0,0 +1,36 @@
+'''
+chromaeye: preprocess tests
+a corrupt screenshot or json fails its own pair, the other pairs are still preprocessed.
+'''
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from chromaeye.chroma_detection.pre_processing.preprocess import preprocess
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_corrupt_pairs_do_not_stop_the_run(tmp_path, workers):
+    image_dir, uied_json_dir = tmp_path / 'org_size', tmp_path / 'uied'
+    uied_image_dir, uied_dl_json_dir = tmp_path / 'uied_size', tmp_path / 'uied_dl_json'
+    image_dir.mkdir()
+    uied_json_dir.mkdir()
+    screenshot = np.full((40, 20, 3), 200, dtype=np.uint8)
+    for pair in ('1-Home_scroll_0_', '2-Corrupt_scroll_0_', '3-Json_scroll_0_'):
+        for mode in ('light', 'dark'):
+            cv2.imwrite(str(image_dir / f"{pair}{mode}.png"), screenshot)
+    # a screenshot that does not decode, and a UIED json cut short
+    (image_dir / '2-Corrupt_scroll_0_light.png').write_bytes(b'not a png')
+    for mode in ('light', 'dark'):
+        (uied_json_dir / f"3-Json_scroll_0_{mode}.json").write_text('{"compos": [')
+
+    failed = preprocess(str(image_dir), str(uied_json_dir), str(uied_image_dir), str(uied_dl_json_dir),
+                        workers=workers)
+
+    assert failed == ['2-Corrupt_scroll_0_', '3-Json_scroll_0_']
+    assert sorted(os.listdir(uied_image_dir)) == ['1-Home_scroll_0_dark.png', '1-Home_scroll_0_light.png',
+                                                  '3-Json_scroll_0_dark.png', '3-Json_scroll_0_light.png']
+    assert os.listdir(uied_dl_json_dir) == []
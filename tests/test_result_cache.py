@@ -0,0 +1,47 @@
+'''
+chromaeye: result cache tests
+file digests are reused while a file is unchanged and dropped with the files that are no longer inputs.
+'''
+
+import os
+
+from chromaeye.chroma_detection.utils.result_cache import (empty_cache, file_digest, load_cache, pair_key,
+                                                           prune_file_cache, save_cache)
+
+
+def test_pair_key_follows_the_content(tmp_path):
+    light, dark = tmp_path / 'light.png', tmp_path / 'dark.png'
+    light.write_bytes(b'light')
+    dark.write_bytes(b'dark')
+    file_cache = {}
+    key = pair_key([str(light), str(dark)], file_cache, '3')
+    assert key == pair_key([str(light), str(dark)], file_cache, '3')
+    assert key != pair_key([str(light), str(dark)], file_cache, '4')
+    dark.write_bytes(b'dark, changed')
+    assert key != pair_key([str(light), str(dark)], file_cache, '3')
+    assert file_digest(str(tmp_path / 'gone.png'), file_cache) == 'missing'
+    assert sorted(file_cache) == [str(dark), str(light)]
+
+
+def test_prune_file_cache(tmp_path):
+    paths = [str(tmp_path / f"{index}.png") for index in range(3)]
+    file_cache = {}
+    for path in paths:
+        with open(path, 'wb') as f:
+            f.write(path.encode())
+        file_digest(path, file_cache)
+    # the second screenshot was renamed, the cache forgets it
+    kept = prune_file_cache(file_cache, [paths[0], paths[2], str(tmp_path / 'renamed.png')])
+    assert sorted(kept) == [paths[0], paths[2]]
+    assert kept[paths[0]] == file_cache[paths[0]]
+
+
+def test_save_and_load(tmp_path):
+    cache_path = str(tmp_path / 'detection_cache.json')
+    assert load_cache(cache_path, '3') == empty_cache('3')
+    cache = empty_cache('3')
+    cache['pairs']['1-Home_scroll_0_light.png'] = {"key": "abc", "result": {"file": "1-Home_scroll_0_"}}
+    save_cache(cache, cache_path)
+    assert load_cache(cache_path, '3') == cache
+    assert load_cache(cache_path, '4') == empty_cache('4')
+    assert not os.path.exists(cache_path + '.tmp')
@@ -0,0 +1,49 @@
+'''
+chromaeye: text similarity tests
+the similarity backends agree with fuzz.ratio on identical, empty and repeated strings.
+'''
+
+import pytest
+
+from chromaeye.chroma_detection.utils.text_similarity import SIMILARITY_BACKENDS, similarity_scores
+
+
+def installed(backend):
+    # each backend is named after the package it imports
+    try:
+        __import__(backend)
+    except ImportError:
+        return False
+    return True
+
+
+backends = pytest.mark.parametrize('backend', [
+    pytest.param(backend, marks=pytest.mark.skipif(not installed(backend), reason=f"{backend} is not installed"))
+    for backend in sorted(SIMILARITY_BACKENDS)])
+
+
+@backends
+def test_empty_strings(backend):
+    assert similarity_scores('', ['', 'Home', ''], backend).tolist() == [100, 0, 100]
+    assert similarity_scores('Home', ['', 'Home'], backend).tolist() == [0, 100]
+
+
+@backends
+def test_identical_and_repeated_choices(backend):
+    scores = similarity_scores('Settings', ['Settings', 'Setting', 'Settings', 'Profile'], backend).tolist()
+    assert scores[0] == scores[2] == 100
+    assert scores[1] >= 75 and scores[3] < 75
+
+
+@backends
+def test_no_choices(backend):
+    assert similarity_scores('Home', [], backend).tolist() == []
+
+
+@pytest.mark.skipif(not all(installed(backend) for backend in SIMILARITY_BACKENDS), reason="a backend is not installed")
+def test_backends_agree_on_ocr_like_words():
+    words = ['', 'Home', 'home', 'Home.', 'Hom', 'Settings', 'Sett1ngs', 'Log in', 'Login', '2024', '€9.99', 'ñandú']
+    for query in words:
+        scores = [similarity_scores(query, words, backend).tolist() for backend in sorted(SIMILARITY_BACKENDS)]
+        assert [[score >= 75 for score in backend_scores] for backend_scores in scores] == \
+            [[score >= 75 for score in scores[0]]] * len(scores), query